@@ -0,0 +1,994 @@
+# BASIC BENCHMARKING
+# Run with: python HashMap_benchmark.py [benchmark name ...]
+
+import asyncio
+import gc
+import os
+import pickle
+import random
+import sys
+import threading
+import tempfile
+import time
+import tracemalloc
+
+import hash_map_sc
+from hash_map_sc import HashMapSC
+from hash_map_oa import HashMapOA
+from hash_map_tp import (HashMapTP, mix_hash)
+from hash_map_rh import HashMapRH
+from hash_map_ca import HashMapCA
+from hash_map_mm import HashMapMM
+from hash_map_cc import HashMapCC
+from hash_map_mp import HashMapMP
+from hash_map_async import AsyncHashMap
+from cache import (HashMapCache, POLICIES)
+from instrumentation import (InstrumentedHashMapOA, InstrumentedHashMapSC)
+from GIVEN_DATA_STRUCTURES import (HashEntry, SLNode, hash_function_1, hash_function_2)
+from hash_batch import hash_batch
+from hash_functions import seeded
+from capacity import next_prime
+
+MAP_CLASSES = (HashMapSC, HashMapOA)
+
+
+def _filled(map_class, n: int, capacity: int = 11, function=hash_function_2):
+    """
+    Returns a new map of the given class holding n 'str' + str(i) keys.
+    """
+    m = map_class(capacity, function)
+    for i in range(n):
+        m.put('str' + str(i), i)
+    return m
+
+
+def _report(label: str, seconds: float, n: int) -> None:
+    """
+    Prints a single result line as total time and time per operation.
+    """
+    print(f"  {label:<28} {seconds * 1000:10.1f} ms {seconds / n * 1e9:10.0f} ns/op")
+
+
+# ------------------- Resize ----------------------------------------------- #
+
+
+def bench_resize(n: int = 20_000) -> None:
+    """
+    Compares resize_table() against replaying every pair through put(),
+    which is what resize_table() used to do.
+    """
+    print(f"resize_table() with {n} entries")
+    for map_class in MAP_CLASSES:
+        print(map_class.__name__)
+        m = _filled(map_class, n)
+        new_capacity = 2 * m.get_capacity()
+
+        start = time.perf_counter()
+        replay = map_class(new_capacity, m._hash_function)
+        for key, value in m.get_keys_and_values():
+            replay.put(key, value)
+        _report('replay through put()', time.perf_counter() - start, n)
+
+        start = time.perf_counter()
+        m.resize_table(new_capacity)
+        _report('resize_table()', time.perf_counter() - start, n)
+
+
+# ------------------- Cached hashes ---------------------------------------- #
+
+
+def _url_keys(n: int, offset: int = 0) -> list:
+    """
+    Returns n long URL-like keys that only differ near the end.
+    """
+    return ['https://www.example.com/catalog/products/category/item?id=' + str(i) + '&ref=search'
+            for i in range(offset, offset + n)]
+
+
+def bench_cached_hash(n: int = 20_000) -> None:
+    """
+    Times hashing every long key once, which is what each resize used to
+    pay on top of the rehash, against resize_table() and get() misses that
+    now reuse and compare the cached hashes.
+    """
+    keys = _url_keys(n)
+    misses = _url_keys(n, n)
+    print(f"cached hashes with {n} URL-like keys")
+    for map_class in MAP_CLASSES:
+        print(map_class.__name__)
+        m = map_class(2 * n, hash_function_2)
+        for i, key in enumerate(keys):
+            m.put(key, i)
+
+        start = time.perf_counter()
+        for key in keys:
+            m._hash_function(key)
+        _report('hash every key', time.perf_counter() - start, n)
+
+        start = time.perf_counter()
+        m.resize_table(2 * m.get_capacity())
+        _report('resize_table()', time.perf_counter() - start, n)
+
+        start = time.perf_counter()
+        for key in misses:
+            m.get(key)
+        _report('get() miss', time.perf_counter() - start, n)
+
+
+# ------------------- Batch hashing ---------------------------------------- #
+
+
+def bench_hash_batch(n: int = 1_000_000) -> None:
+    """
+    Compares hashing a batch of keys one at a time with both scalar hash
+    functions against a single hash_batch() call.
+    """
+    print(f"hashing {n} keys with both hash functions")
+    for label, keys in (('short keys', ['str' + str(i) for i in range(n)]),
+                        ('URL-like keys', _url_keys(n // 10))):
+        print(label)
+        start = time.perf_counter()
+        for key in keys:
+            hash_function_1(key)
+            hash_function_2(key)
+        _report('scalar functions', time.perf_counter() - start, len(keys))
+
+        start = time.perf_counter()
+        hash_batch(keys)
+        _report('hash_batch()', time.perf_counter() - start, len(keys))
+
+
+# ------------------- Batch operations ------------------------------------- #
+
+
+def bench_batch(n: int = 20_000) -> None:
+    """
+    Compares single-key put()/get()/remove() loops against put_many(),
+    get_many() and remove_many() on the same keys.
+    """
+    pairs = [('str' + str(i), i) for i in range(n)]
+    keys = [key for key, _ in pairs]
+    print(f"batch operations with {n} keys")
+    for map_class in MAP_CLASSES:
+        print(map_class.__name__)
+        m = map_class(11, hash_function_2)
+        start = time.perf_counter()
+        for key, value in pairs:
+            m.put(key, value)
+        _report('put() loop', time.perf_counter() - start, n)
+        start = time.perf_counter()
+        for key in keys:
+            m.get(key)
+        _report('get() loop', time.perf_counter() - start, n)
+        start = time.perf_counter()
+        for key in keys:
+            m.remove(key)
+        _report('remove() loop', time.perf_counter() - start, n)
+
+        m = map_class(11, hash_function_2)
+        start = time.perf_counter()
+        m.put_many(pairs)
+        _report('put_many()', time.perf_counter() - start, n)
+        start = time.perf_counter()
+        m.get_many(keys)
+        _report('get_many()', time.perf_counter() - start, n)
+        start = time.perf_counter()
+        m.remove_many(keys)
+        _report('remove_many()', time.perf_counter() - start, n)
+
+
+# ------------------- Prime capacities ------------------------------------- #
+
+
+def _trial_division_next_prime(capacity: int) -> int:
+    """
+    The odd-factor trial division both HashMaps used before capacity.py.
+    """
+    def is_prime(n):
+        if n == 2 or n == 3:
+            return True
+        if n == 1 or n % 2 == 0:
+            return False
+        factor = 3
+        while factor ** 2 <= n:
+            if n % factor == 0:
+                return False
+            factor += 2
+        return True
+
+    if capacity % 2 == 0:
+        capacity += 1
+    while not is_prime(capacity):
+        capacity += 2
+    return capacity
+
+
+def bench_next_prime(repeat: int = 20) -> None:
+    """
+    Times next_prime() against trial division for power of two capacities
+    up to 2 ** 31.
+    """
+    print(f"next prime at or above a capacity, best of {repeat}")
+    for exponent in (8, 12, 16, 20, 24, 28, 31):
+        capacity = 2 ** exponent
+        print(f"capacity 2^{exponent}")
+        for label, function in (('trial division', _trial_division_next_prime),
+                                ('capacity.next_prime()', next_prime)):
+            best = float('inf')
+            for _ in range(repeat):
+                start = time.perf_counter()
+                function(capacity)
+                best = min(best, time.perf_counter() - start)
+            _report(label, best, 1)
+
+
+# ------------------- Triangular probing ----------------------------------- #
+
+
+def _probe_sequence(m, hash: int):
+    """
+    Yields the slots a lookup visits in a HashMapOA or HashMapTP.
+    """
+    capacity = m.get_capacity()
+    if isinstance(m, HashMapTP):
+        idx = hash & (capacity - 1)
+        for x in range(1, capacity + 1):
+            yield idx
+            idx = (idx + x) & (capacity - 1)
+    else:
+        for x in range(capacity):
+            yield (hash % capacity + x ** 2) % capacity
+
+
+def _probe_count(m, key, hash: int) -> int:
+    """
+    Returns the number of slots a lookup of key visits before it finds the
+    key or an empty slot. HashMapRH lookups also stop at the first entry
+    closer to its home slot than the key would be.
+    """
+    if isinstance(m, HashMapRH):
+        capacity, idx = m.get_capacity(), hash % m.get_capacity()
+        for distance in range(capacity):
+            entry = m._buckets[(idx + distance) % capacity]
+            if entry is None or entry.distance < distance or entry.key == key:
+                return distance + 1
+        return capacity
+
+    count = 0
+    for idx in _probe_sequence(m, hash):
+        count += 1
+        entry = m._buckets[idx]
+        if entry is None or (entry.key == key and not entry.is_tombstone):
+            break
+    return count
+
+
+def bench_triangular(n: int = 20_000) -> None:
+    """
+    Compares average probe counts and throughput of HashMapTP against
+    HashMapOA for hits and misses. The built-in hash() is included to show
+    probing without the collisions of the given hash functions.
+    """
+    keys = ['str' + str(i) for i in range(n)]
+    misses = ['str' + str(i) for i in range(n, 2 * n)]
+    print(f"triangular probing with {n} keys")
+    for function in (hash_function_1, hash_function_2, hash):
+        print(function.__name__)
+        for map_class in (HashMapOA, HashMapTP):
+            m = map_class(11, function)
+            start = time.perf_counter()
+            for i, key in enumerate(keys):
+                m.put(key, i)
+            _report(f'{map_class.__name__} put()', time.perf_counter() - start, n)
+            start = time.perf_counter()
+            for key in keys:
+                m.get(key)
+            _report(f'{map_class.__name__} get() hit', time.perf_counter() - start, n)
+            start = time.perf_counter()
+            for key in misses:
+                m.get(key)
+            _report(f'{map_class.__name__} get() miss', time.perf_counter() - start, n)
+
+            mix = mix_hash if map_class is HashMapTP else int
+            hits = sum(_probe_count(m, key, mix(function(key))) for key in keys) / n
+            miss = sum(_probe_count(m, key, mix(function(key))) for key in misses) / n
+            print(f"  {map_class.__name__} probes per hit {hits:.1f}, per miss {miss:.1f}")
+
+
+# ------------------- Churn ------------------------------------------------ #
+
+
+def bench_churn(n: int = 2_000, rounds: int = 10) -> None:
+    """
+    Keeps n live keys while replacing n // 2 of them per round, and reports
+    the average probes per get() miss after each round for HashMapOA, which
+    leaves tombstones until it compacts, and HashMapRH, which shifts entries
+    back instead.
+    """
+    misses = ['miss' + str(i) for i in range(n)]
+    print(f"churn with {n} live keys, {n // 2} replaced per round")
+    for map_class in (HashMapOA, HashMapRH):
+        m = map_class(11, hash)
+        m.put_many(('str' + str(i), i) for i in range(n))
+        oldest, newest = 0, n
+        line = []
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for _ in range(n // 2):
+                m.remove('str' + str(oldest))
+                m.put('str' + str(newest), newest)
+                oldest, newest = oldest + 1, newest + 1
+            line.append(sum(_probe_count(m, key, hash(key)) for key in misses) / n)
+        seconds = time.perf_counter() - start
+        print(f"  {map_class.__name__:<10} probes per miss by round: " +
+              ' '.join(f"{probes:.1f}" for probes in line))
+        _report(f'{map_class.__name__} remove() + put()', seconds, rounds * n // 2)
+
+
+# ------------------- Memory ----------------------------------------------- #
+
+
+def _traced_bytes(build) -> int:
+    """
+    Returns the bytes still allocated by build() once it returns, holding
+    on to its result while measuring.
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    allocated = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del result
+    return allocated
+
+
+def bench_memory(n: int = 200_000) -> None:
+    """
+    Reports bytes per entry held by each map layout. Keys and values are
+    created before measuring, so only the map's own structures count.
+    """
+    pairs = [('str' + str(i), i) for i in range(n)]
+    print(f"memory with {n} entries")
+    for map_class in (HashMapSC, HashMapOA, HashMapCA):
+        allocated = _traced_bytes(lambda: map_class.from_pairs(pairs, function=hash))
+        print(f"  {map_class.__name__:<28} {allocated / 2 ** 20:10.1f} MB {allocated / n:10.1f} B/entry")
+
+
+# ------------------- Slots ------------------------------------------------ #
+
+
+class _DictNode:
+    """
+    SLNode as it was before __slots__, with a per-instance __dict__.
+    """
+
+    def __init__(self, key, value, next=None, hash=None):
+        self.key = key
+        self.value = value
+        self.next = next
+        self.hash = hash
+
+
+class _DictEntry:
+    """
+    HashEntry as it was before __slots__, with its own tombstone flag.
+    """
+
+    def __init__(self, key, value, hash=None):
+        self.key = key
+        self.value = value
+        self.hash = hash
+        self.is_tombstone = False
+
+
+def _rss() -> int:
+    """
+    Returns the resident set size of this process in bytes, or 0 where
+    /proc is not available.
+    """
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return 0
+
+
+def _allocations(build) -> tuple[int, int, int]:
+    """
+    Returns (live allocations, bytes, RSS growth) left behind by build().
+    RSS is measured on a separate untraced call, since tracing itself uses
+    memory.
+    """
+    tracemalloc.start()
+    result = build()
+    snapshot = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    del result
+    stats = snapshot.statistics('filename')
+    del snapshot
+
+    rss = _rss()
+    result = build()
+    rss = _rss() - rss
+    del result
+    return sum(stat.count for stat in stats), sum(stat.size for stat in stats), rss
+
+
+def bench_slots(n: int = 200_000) -> None:
+    """
+    Reports allocations, traced bytes and RSS growth per million nodes or
+    entries, for the old __dict__ layouts and the slotted classes, and per
+    million entries for whole maps. Keys, values and hashes are created
+    before measuring.
+    """
+    keys = ['str' + str(i) for i in range(n)]
+    hashes = [hash(key) for key in keys]
+    scale = 1_000_000 / n
+    print(f"per million objects, measured with {n}")
+
+    def report(label, build):
+        count, size, rss = _allocations(build)
+        print(f"  {label:<28} {count * scale:12,.0f} allocs {size * scale / 2 ** 20:8.1f} MB"
+              f" {rss * scale / 2 ** 20:8.1f} MB RSS")
+
+    report('node with __dict__', lambda: [_DictNode(k, k, None, h) for k, h in zip(keys, hashes)])
+    report('SLNode', lambda: [SLNode(k, k, None, h) for k, h in zip(keys, hashes)])
+    report('entry with __dict__', lambda: [_DictEntry(k, k, h) for k, h in zip(keys, hashes)])
+    report('HashEntry', lambda: [HashEntry(k, k, h) for k, h in zip(keys, hashes)])
+    pairs = [(key, key) for key in keys]
+    for map_class in (HashMapSC, HashMapOA):
+        report(map_class.__name__, lambda: map_class.from_pairs(pairs, function=hash))
+
+
+# ------------------- Bucket access ---------------------------------------- #
+
+
+def bench_access(n: int = 100_000, repeat: int = 5) -> None:
+    """
+    Times put(), get() hits and get() misses per operation with the
+    built-in hash(), so that bucket access rather than hashing dominates.
+    """
+    keys = ['str' + str(i) for i in range(n)]
+    misses = ['miss' + str(i) for i in range(n)]
+    print(f"bucket access with {n} keys, best of {repeat}")
+    for map_class in (HashMapSC, HashMapOA, HashMapTP, HashMapRH):
+        print(map_class.__name__)
+        best = {'put()': float('inf'), 'get() hit': float('inf'), 'get() miss': float('inf')}
+        for _ in range(repeat):
+            m = map_class(11, hash)
+            m.reserve(n)
+            start = time.perf_counter()
+            for key in keys:
+                m.put(key, key)
+            best['put()'] = min(best['put()'], time.perf_counter() - start)
+            start = time.perf_counter()
+            for key in keys:
+                m.get(key)
+            best['get() hit'] = min(best['get() hit'], time.perf_counter() - start)
+            start = time.perf_counter()
+            for key in misses:
+                m.get(key)
+            best['get() miss'] = min(best['get() miss'], time.perf_counter() - start)
+        for label, seconds in best.items():
+            _report(label, seconds, n)
+
+
+# ------------------- Incremental resize ----------------------------------- #
+
+
+def _percentile(samples: list, fraction: float) -> int:
+    """
+    Returns the sample below which the given fraction of sorted samples
+    fall.
+    """
+    return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+
+
+def bench_put_latency(n: int = 500_000, migrate_step: int = 4) -> None:
+    """
+    Times every put() while growing a map from empty, with resize_table()
+    rehashing everything at once and with migrate_step buckets moved per
+    operation, and reports the latency percentiles. The garbage collector is
+    paused so that its own pauses do not hide the resizes.
+    """
+    keys = ['str' + str(i) for i in range(n)]
+    print(f"put() latency with {n} keys, migrate_step={migrate_step}")
+    print(f"  {'':<28} {'mean':>8} {'p99':>8} {'p999':>8} {'max':>10} (us)")
+    for map_class in MAP_CLASSES:
+        print(map_class.__name__)
+        for label, step in (('all at once', 0), ('incremental', migrate_step)):
+            m = map_class(11, hash, migrate_step=step)
+            clock = time.perf_counter_ns
+            samples = []
+            gc.disable()
+            for key in keys:
+                start = clock()
+                m.put(key, key)
+                samples.append(clock() - start)
+            gc.enable()
+            mean = sum(samples) / n
+            samples.sort()
+            print(f"  {label:<28} {mean / 1000:8.2f} {_percentile(samples, 0.99) / 1000:8.2f} "
+                  f"{_percentile(samples, 0.999) / 1000:8.2f} {samples[-1] / 1000:10.1f}")
+
+
+# ------------------- Shrinking -------------------------------------------- #
+
+
+def _grown_and_drained(map_class, n: int, grow: int, fit: bool = False, **options):
+    """
+    Returns a map that was filled with grow * n keys and then drained back
+    to the first n, calling shrink_to_fit() at the end if fit is set.
+    """
+    m = map_class(11, hash, **options)
+    for i in range(grow * n):
+        m.put(i, i)
+    m.remove_many(range(n, grow * n))
+    if fit:
+        m.shrink_to_fit()
+    return m
+
+
+def bench_shrink(n: int = 20_000, grow: int = 10, repeat: int = 5) -> None:
+    """
+    Grows each map to grow * n keys, drains it back to n, and reports the
+    capacity, memory held and full-scan time of a map that never shrinks,
+    one that shrinks automatically and one that calls shrink_to_fit().
+    """
+    print(f"grow to {grow * n} keys and drain back to {n}")
+    shrink_loads = {HashMapSC: 0.25, HashMapOA: 0.1}
+    for map_class in MAP_CLASSES:
+        print(map_class.__name__)
+        shrink_load = shrink_loads[map_class]
+        for label, fit, options in (('never shrinks', False, {}),
+                                    (f'shrink_load={shrink_load}', False, {'shrink_load': shrink_load}),
+                                    ('shrink_to_fit()', True, {})):
+            allocated = _traced_bytes(lambda: _grown_and_drained(map_class, n, grow, fit, **options))
+            m = _grown_and_drained(map_class, n, grow, fit, **options)
+            best = float('inf')
+            for _ in range(repeat):
+                start = time.perf_counter()
+                m.get_keys_and_values()
+                m.empty_buckets()
+                best = min(best, time.perf_counter() - start)
+            print(f"  {label:<18} capacity {m.get_capacity():8} {allocated / 2 ** 20:7.1f} MB "
+                  f"scan {best * 1000:7.2f} ms")
+
+
+# ------------------- Statistics ------------------------------------------- #
+
+
+def bench_stats(n: int = 200_000, repeat: int = 100) -> None:
+    """
+    Times stats() and empty_buckets(), which read counters kept up to date
+    by every put() and remove(), against counting empty buckets with a
+    full scan as empty_buckets() used to.
+    """
+    m = HashMapSC.from_pairs(((i, i) for i in range(n)), function=hash)
+    m.reserve(5 * n)
+    print(f"HashMapSC statistics with {n} entries and capacity {m.get_capacity()}")
+    for label, read in (('scan every bucket', lambda: sum(not b.length() for b in m._buckets.raw())),
+                        ('empty_buckets()', m.empty_buckets),
+                        ('stats()', m.stats)):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            read()
+        _report(label, time.perf_counter() - start, repeat)
+
+
+# ------------------- Instrumentation -------------------------------------- #
+
+
+def _anagram_keys(n: int) -> list:
+    """
+    Returns n distinct keys built from the same ten letters, so that every
+    key has the same hash_function_1 hash.
+    """
+    keys = []
+    for i in range(n):
+        letters = list('abcdefghij')
+        for x in range(len(letters) - 1, 0, -1):
+            i, j = divmod(i, x + 1)
+            letters[x], letters[j] = letters[j], letters[x]
+        keys.append(''.join(letters))
+    return keys
+
+
+def bench_instrumentation(n: int = 100_000, anagrams: int = 2_000) -> None:
+    """
+    Compares put() and get() throughput of the plain maps, which carry no
+    instrumentation, with the instrumented subclasses, then prints what
+    the snapshots report for anagram keys under each given hash function.
+    """
+    keys = ['str' + str(i) for i in range(n)]
+    print(f"instrumentation overhead with {n} keys")
+    for map_class in (HashMapSC, InstrumentedHashMapSC, HashMapOA, InstrumentedHashMapOA):
+        m = map_class(11, hash)
+        start = time.perf_counter()
+        for key in keys:
+            m.put(key, key)
+        _report(f'{map_class.__name__} put()', time.perf_counter() - start, n)
+        start = time.perf_counter()
+        for key in keys:
+            m.get(key)
+        _report(f'{map_class.__name__} get()', time.perf_counter() - start, n)
+
+    keys = _anagram_keys(anagrams)
+    print(f"snapshots with {anagrams} anagram keys")
+    for map_class in (InstrumentedHashMapSC, InstrumentedHashMapOA):
+        for function in (hash_function_1, hash_function_2):
+            m = map_class(11, function)
+            for key in keys:
+                m.put(key, key)
+            snapshot = m.snapshot()
+            print(f"  {map_class.__name__:<22} {function.__name__}: "
+                  f"hash collisions {snapshot['hash_collision_rate']:.3f}, "
+                  f"mean put() probes {snapshot['operations']['put']['mean_probes']:.1f}")
+
+
+def bench_treeify(n: int = 5_000) -> None:
+    """
+    Puts and gets n anagram keys, which all share one hash_function_1
+    hash, with long chains kept sorted and with treeifying turned off.
+    """
+    keys = _anagram_keys(n)
+    print(f"collision flood with {n} anagram keys")
+    for label, length in (('LinkedList chains', n + 1), ('sorted chains', hash_map_sc.TREEIFY_LENGTH)):
+        treeify_length, hash_map_sc.TREEIFY_LENGTH = hash_map_sc.TREEIFY_LENGTH, length
+        try:
+            m = HashMapSC(11, hash_function_1)
+            start = time.perf_counter()
+            for key in keys:
+                m.put(key, key)
+            _report(f'{label} put()', time.perf_counter() - start, n)
+            start = time.perf_counter()
+            for key in keys:
+                m.get(key)
+            _report(f'{label} get()', time.perf_counter() - start, n)
+        finally:
+            hash_map_sc.TREEIFY_LENGTH = treeify_length
+
+
+def bench_mmap(n: int = 200_000) -> None:
+    """
+    Compares opening a HashMapMM file that already holds n pairs with
+    rebuilding a HashMapOA from the same pairs with put(), then compares
+    get() throughput of the two. Keys are hashed with xxhash64 under a
+    fixed seed, since the file outlives the process.
+    """
+    function = seeded('xxhash64', 0)
+    keys = ['str' + str(i) for i in range(n)]
+    values = [key.encode() * 4 for key in keys]
+    directory = '/dev/shm' if os.path.isdir('/dev/shm') else None
+    with tempfile.TemporaryDirectory(dir=directory) as path:
+        path = os.path.join(path, 'map')
+        with HashMapMM(path, 11, function) as m:
+            m.reserve(n)
+            for key, value in zip(keys, values):
+                m.put(key, value)
+        print(f"restart with {n} pairs, file of {os.path.getsize(path) / 2**20:.1f} MiB")
+
+        start = time.perf_counter()
+        m = HashMapMM(path, 11, function)
+        m.get(keys[0])
+        _report('HashMapMM open', time.perf_counter() - start, n)
+        start = time.perf_counter()
+        oa = HashMapOA(11, function)
+        oa.reserve(n)
+        for key, value in zip(keys, values):
+            oa.put(key, value)
+        _report('HashMapOA rebuild', time.perf_counter() - start, n)
+
+        for label, target in (('HashMapMM get()', m), ('HashMapOA get()', oa)):
+            start = time.perf_counter()
+            for key in keys:
+                target.get(key)
+            _report(label, time.perf_counter() - start, n)
+        m.close()
+
+
+def bench_snapshot(n: int = 10_000_000) -> None:
+    """
+    Compares restoring a map of n pairs from a save() snapshot with load()
+    against writing get_keys_and_values() to a pickle and replaying every
+    pair through put().
+    """
+    directory = '/dev/shm' if os.path.isdir('/dev/shm') else None
+    print(f"restore with {n} pairs")
+    for map_class in MAP_CLASSES:
+        with tempfile.TemporaryDirectory(dir=directory) as path:
+            m = map_class(11, hash)
+            m.put_many(('str' + str(i), i) for i in range(n))
+            m.save(os.path.join(path, 'snapshot'))
+            with open(os.path.join(path, 'pairs'), 'wb') as file:
+                pickle.dump(list(m.get_keys_and_values()), file, pickle.HIGHEST_PROTOCOL)
+            del m
+            gc.collect()
+
+            start = time.perf_counter()
+            with open(os.path.join(path, 'pairs'), 'rb') as file:
+                m = map_class(11, hash)
+                for key, value in pickle.load(file):
+                    m.put(key, value)
+            _report(f'{map_class.__name__} replay put()', time.perf_counter() - start, n)
+            del m
+            gc.collect()
+
+            start = time.perf_counter()
+            m = map_class.load(os.path.join(path, 'snapshot'), hash)
+            _report(f'{map_class.__name__} load()', time.perf_counter() - start, n)
+            del m
+            gc.collect()
+
+
+def bench_concurrent(n: int = 400_000, keys: int = 10_000, writes: float = 0.1) -> None:
+    """
+    Runs n operations split over 1 to 8 threads, a share of writes puts and
+    the rest gets, on a HashMapCC and on a HashMapSC behind a single lock.
+    Threads only run in parallel on a free-threaded build.
+    """
+    gil = getattr(sys, '_is_gil_enabled', lambda: True)()
+    print(f"concurrent access, {n} operations, {writes:.0%} writes, GIL {'on' if gil else 'off'}, "
+          f"{os.cpu_count()} CPUs")
+    names = ['str' + str(i) for i in range(keys)]
+
+    class LockedHashMapSC(HashMapSC):
+        def __init__(self, *args) -> None:
+            super().__init__(*args)
+            self.lock = threading.Lock()
+
+        def get(self, key):
+            with self.lock:
+                return super().get(key)
+
+        def put(self, key, value):
+            with self.lock:
+                super().put(key, value)
+
+    for map_class in (LockedHashMapSC, HashMapCC):
+        for threads in (1, 2, 4, 8):
+            m = map_class(11, hash)
+            for key in names:
+                m.put(key, key)
+
+            def work(seed: int) -> None:
+                step = int(1 / writes)
+                for i in range(n // threads):
+                    key = names[(seed + i * 7919) % keys]
+                    if i % step:
+                        m.get(key)
+                    else:
+                        m.put(key, i)
+
+            workers = [threading.Thread(target=work, args=(seed,)) for seed in range(threads)]
+            start = time.perf_counter()
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            _report(f'{map_class.__name__} {threads} threads', time.perf_counter() - start, n)
+
+
+def bench_sharded(n: int = 200_000, batch: int = 10_000) -> None:
+    """
+    Loads and reads n pairs in batches with put_many() and get_many(), on a
+    single HashMapSC and on HashMapMP with 1 to 8 worker processes. Keys
+    are hashed with xxhash64, so that each put costs enough CPU for the
+    workers to be worth their IPC.
+    """
+    print(f"sharded ingest, {n} pairs in batches of {batch}, {os.cpu_count()} CPUs")
+    pairs = [('str' + str(i), i) for i in range(n)]
+    batches = [pairs[x:x + batch] for x in range(0, n, batch)]
+    for shards in (0, 1, 2, 4, 8):
+        if shards:
+            m, label = HashMapMP(shards, HashMapSC, 11, 'xxhash64'), f'HashMapMP {shards} shards'
+        else:
+            m, label = HashMapSC(11, 'xxhash64'), 'HashMapSC'
+        start = time.perf_counter()
+        for pairs_batch in batches:
+            m.put_many(pairs_batch)
+        _report(f'{label} put_many()', time.perf_counter() - start, n)
+        start = time.perf_counter()
+        for pairs_batch in batches:
+            m.get_many(key for key, value in pairs_batch)
+        _report(f'{label} get_many()', time.perf_counter() - start, n)
+        if shards:
+            m.close()
+
+
+def bench_async(n: int = 1_000_000, clients: int = 100, writes: float = 0.5) -> None:
+    """
+    Runs clients that together make n calls, a share of writes puts of new
+    keys and the rest gets, while a ticker task sleeps 1 ms at a time and
+    records how late it wakes up. Compares calling a HashMapSC directly,
+    yielding to the loop after every call, with AsyncHashMap. The garbage
+    collector is off while timing, so that its pauses do not hide the
+    resizes.
+    """
+    class DirectHashMap:
+        def __init__(self, m) -> None:
+            self._map = m
+
+        async def get(self, key):
+            await asyncio.sleep(0)
+            return self._map.get(key)
+
+        async def put(self, key, value):
+            await asyncio.sleep(0)
+            self._map.put(key, value)
+
+    async def run(front) -> tuple:
+        lags = []
+        done = False
+
+        async def tick() -> None:
+            while not done:
+                start = time.perf_counter()
+                await asyncio.sleep(0.001)
+                lags.append(time.perf_counter() - start - 0.001)
+
+        async def client(seed: int) -> None:
+            step = int(1 / writes)
+            for i in range(n // clients):
+                if i % step:
+                    await front.get('str' + str(seed + clients * (i // 2)))
+                else:
+                    await front.put('str' + str(seed + clients * i), i)
+
+        ticker = asyncio.ensure_future(tick())
+        start = time.perf_counter()
+        await asyncio.gather(*[client(seed) for seed in range(clients)])
+        seconds = time.perf_counter() - start
+        done = True
+        await ticker
+        return seconds, sorted(lags)
+
+    print(f"event loop lag with {clients} clients making {n} calls, {writes:.0%} puts")
+    for label, front in (('direct', DirectHashMap(HashMapSC(11, hash))),
+                         ('AsyncHashMap', AsyncHashMap(HashMapSC(11, hash)))):
+        gc.disable()
+        try:
+            seconds, lags = asyncio.run(run(front))
+        finally:
+            gc.enable()
+        print(f"  {label:<14} {seconds / n * 1e9:8.0f} ns/call   lag p50 {_percentile(lags, 0.5) * 1000:6.2f} ms"
+              f"   p99 {_percentile(lags, 0.99) * 1000:6.2f} ms   max {lags[-1] * 1000:7.2f} ms")
+
+
+def _zipf_trace(n: int, keys: int, skew: float, seed: int = 0) -> list:
+    """
+    Returns n keys drawn from a universe of the given size with Zipf's law:
+    the key of rank k is drawn with weight 1 / k ** skew.
+    """
+    cum_weights = []
+    total = 0.0
+    for rank in range(1, keys + 1):
+        total += 1 / rank ** skew
+        cum_weights.append(total)
+    universe = ['key' + str(rank) for rank in range(keys)]
+    return random.Random(seed).choices(universe, cum_weights=cum_weights, k=n)
+
+
+def bench_cache(n: int = 1_000_000, keys: int = 100_000) -> None:
+    """
+    Replays Zipfian traces of n lookups against caches holding 1% and 10%
+    of the keys, with every eviction policy. A miss puts the key, as a
+    read-through cache would. Reports the hit ratio and the time per
+    lookup, next to an unbounded HashMapSC doing the same gets and puts.
+    Keys are hashed with the builtin hash(), so that the times show the
+    cost of the cache rather than of hashing.
+    """
+    function = hash
+    for skew in (0.8, 1.0, 1.2):
+        trace = _zipf_trace(n, keys, skew)
+        print(f"Zipf trace, skew {skew}, {n} lookups of {keys} keys")
+
+        m = HashMapSC(11, function)
+        start = time.perf_counter()
+        for key in trace:
+            if m.get(key) is None:
+                m.put(key, key)
+        _report('unbounded HashMapSC', time.perf_counter() - start, n)
+
+        for share in (0.01, 0.1):
+            for policy in POLICIES:
+                c = HashMapCache(int(keys * share), policy=policy, function=function)
+                start = time.perf_counter()
+                for key in trace:
+                    if c.get(key) is None:
+                        c.put(key, key)
+                seconds = time.perf_counter() - start
+                print(f"  {policy:>5} {share:4.0%} cache: hit ratio {c.stats()['hit_ratio']:.3f}, "
+                      f"{seconds / n * 1e9:5.0f} ns/op")
+
+
+def bench_views(n: int = 2_000_000) -> None:
+    """
+    Scans a map of n entries with get_keys_and_values() and with items(),
+    reporting the time of each scan and the peak memory it allocated on top
+    of the map, as traced by tracemalloc in a separate run.
+    """
+    def scan_copy(m) -> None:
+        for key, value in m.get_keys_and_values():
+            pass
+
+    def scan_view(m) -> None:
+        for key, value in m.items():
+            pass
+
+    pairs = [('str' + str(i), i) for i in range(n)]
+    print(f"scanning {n} entries")
+    for map_class in MAP_CLASSES:
+        m = map_class.from_pairs(pairs, function=hash)
+        for label, scan in (('get_keys_and_values()', scan_copy), ('items()', scan_view)):
+            start = time.perf_counter()
+            scan(m)
+            seconds = time.perf_counter() - start
+            tracemalloc.start()
+            scan(m)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"  {map_class.__name__} {label:<22} {seconds * 1000:8.1f} ms, "
+                  f"peak {peak / 2 ** 20:8.1f} MB")
+        del m
+
+
+# ------------------- Seeded hash functions -------------------------------- #
+
+
+def bench_hash_functions(n: int = 100_000) -> None:
+    """
+    Compares the given hash functions with the seeded ones on 'str' +
+    str(i) keys: time per hash, distinct hashes, and how the keys spread
+    over a HashMapSC reserved for n keys. With an ideal hash, a share of
+    about 1/e of the buckets stays empty.
+    """
+    keys = ['str' + str(i) for i in range(n)]
+    print(f"hash functions with {n} keys")
+    print(f"  {'':<16} {'ns/hash':>8} {'distinct':>9} {'empty':>7} {'longest':>8} {'put() ns/op':>12}")
+    for function in (hash_function_1, hash_function_2, seeded('xxhash64'), seeded('siphash24'), hash):
+        start = time.perf_counter()
+        hashes = [function(key) for key in keys]
+        per_hash = (time.perf_counter() - start) / n * 1e9
+
+        m = HashMapSC(11, function)
+        m.reserve(n)
+        start = time.perf_counter()
+        for key in keys:
+            m.put(key, key)
+        per_put = (time.perf_counter() - start) / n * 1e9
+        stats = m.stats()
+        print(f"  {function.__name__:<16} {per_hash:8.0f} {len(set(hashes)):9} "
+              f"{stats['empty_buckets'] / stats['capacity']:7.1%} {stats['longest_chain']:8} {per_put:12.0f}")
+
+
+BENCHMARKS = {
+    'resize': bench_resize,
+    'cached_hash': bench_cached_hash,
+    'hash_batch': bench_hash_batch,
+    'batch': bench_batch,
+    'next_prime': bench_next_prime,
+    'triangular': bench_triangular,
+    'churn': bench_churn,
+    'memory': bench_memory,
+    'slots': bench_slots,
+    'access': bench_access,
+    'put_latency': bench_put_latency,
+    'shrink': bench_shrink,
+    'stats': bench_stats,
+    'instrumentation': bench_instrumentation,
+    'treeify': bench_treeify,
+    'mmap': bench_mmap,
+    'snapshot': bench_snapshot,
+    'concurrent': bench_concurrent,
+    'sharded': bench_sharded,
+    'async': bench_async,
+    'cache': bench_cache,
+    'views': bench_views,
+    'hash_functions': bench_hash_functions,
+}
+
+
+if __name__ == '__main__':
+    for name in sys.argv[1:] or BENCHMARKS:
+        BENCHMARKS[name]()
@@ -3,7 +3,27 @@
 
 from hash_map_sc import *
 from hash_map_oa import *
+from hash_map_tp import *
+from hash_map_rh import *
+from hash_map_ca import *
+from hash_map_mm import *
+from hash_map_cc import *
+from hash_map_mp import *
+from hash_map_async import *
+from cache import *
+from instrumentation import *
 from GIVEN_DATA_STRUCTURES import *
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import threading
+import pytest
+import hash_batch
+import hash_functions
+import capacity
+import hash_map_mm
 
 # ------------------- Linked List HashMap ---------------------------------- #
 
@@ -118,6 +138,266 @@ def test_find_mode_sc():
     assert mode == ['1']
     assert frequency == 3
 
+def test_resize_table_sc():
+    """
+    Resizes a filled HashMap up and then below its size, and checks that
+    every pair survives and the capacity grows back past the load limit.
+    """
+    m = HashMapSC(53, hash_function_1)
+    for i in range(100):
+        m.put('str' + str(i), i)
+    m.resize_table(200)
+    assert m.get_capacity() == 211
+    assert m.get_size() == 100
+    assert all(m.get('str' + str(i)) == i for i in range(100))
+
+    m.resize_table(10)
+    assert m.get_capacity() == 197
+    assert m.table_load() < 1.0
+    assert sorted(m.get_keys_and_values()) == sorted(('str' + str(i), i) for i in range(100))
+
+def test_cached_hash_sc():
+    """
+    Counts hash function calls to check that resizing reuses the hash
+    cached on each node instead of hashing every key again.
+    """
+    calls = []
+
+    def counting_hash(key):
+        calls.append(key)
+        return hash_function_2(key)
+
+    m = HashMapSC(11, counting_hash)
+    for i in range(50):
+        m.put('str' + str(i), i)
+    assert len(calls) == 50
+    m.resize_table(500)
+    assert len(calls) == 50
+    assert all(m.get('str' + str(i)) == i for i in range(50))
+
+def test_batch_operations_sc():
+    """
+    Checks that put_many() ends with the same size and capacity as putting
+    each pair, and that get_many() and remove_many() follow input order.
+    """
+    pairs = [('str' + str(i), i) for i in range(150)]
+    m = HashMapSC(53, hash_function_1)
+    m.put_many(pairs)
+    assert [m.get_size(), m.get_capacity()] == [150, 223]
+    assert sorted(m.get_keys_and_values()) == sorted(pairs)
+
+    m.put_many([('str1', 'a'), ('str1', 'b')])
+    assert m.get_size() == 150
+    assert list(m.get_many(['str1', 'missing', 'str0'])) == ['b', None, 0]
+
+    m.remove_many(['str0', 'str1', 'missing', 'str0'])
+    assert m.get_size() == 148
+    assert list(m.get_many(['str0', 'str1', 'str2'])) == [None, None, 2]
+
+def test_reserve_sc(monkeypatch):
+    """
+    Reserves room for a known number of keys and checks that loading them
+    with put() and with from_pairs() never resizes the table.
+    """
+    resizes = []
+    rehash = HashMapSC._rehash
+
+    def counting_rehash(self, capacity):
+        resizes.append(capacity)
+        rehash(self, capacity)
+
+    monkeypatch.setattr(HashMapSC, '_rehash', counting_rehash)
+    m = HashMapSC(11, hash_function_1)
+    m.reserve(1000)
+    assert m.get_capacity() == 1009
+    resizes.clear()
+    for i in range(1000):
+        m.put('str' + str(i), i)
+    assert resizes == []
+    m.reserve(10)
+    assert m.get_capacity() == 1009
+
+    pairs = [('str' + str(i % 1000), i) for i in range(3000)]
+    m = HashMapSC.from_pairs(pairs, expected_size=1000)
+    assert resizes == [1009]
+    assert m.get_size() == 1000
+    assert m.get('str5') == 2005
+
+def test_incremental_resize_sc():
+    """
+    Grows a HashMap that moves one bucket per operation and checks that it
+    follows the same capacities as resizing all at once, and that keys are
+    found, removed and listed correctly while the old table is in use.
+    """
+    m = HashMapSC(53, hash_function_1, migrate_step=1)
+    eager = HashMapSC(53, hash_function_1)
+    for i in range(54):
+        m.put('str' + str(i), i)
+        eager.put('str' + str(i), i)
+    assert m.get_capacity() == eager.get_capacity() == 107
+    assert m._old_buckets is not None
+
+    m.put('str1', 'a')
+    m.remove('str2')
+    m.remove('missing')
+    assert m.get_size() == 53
+    assert [m.get('str1'), m.get('str2'), m.get('str3')] == ['a', None, 3]
+    assert m.contains_key('str53') and not m.contains_key('str2')
+    expected = [('str' + str(i), i) for i in range(54) if i not in (1, 2)] + [('str1', 'a')]
+    assert sorted(m.get_keys_and_values(), key=str) == sorted(expected, key=str)
+
+    for i in range(54, 150):
+        m.put('str' + str(i), i)
+    assert [m.get_size(), m.get_capacity()] == [149, 223]
+    assert all(m.get('str' + str(i)) == i for i in range(3, 150))
+    assert m._old_buckets is None
+
+def test_shrink_sc():
+    """
+    Drains a large HashMap and checks that it shrinks each time the load
+    drops below shrink_load, and that shrink_to_fit() gives the smallest
+    capacity that still holds every element.
+    """
+    m = HashMapSC(11, hash_function_1, shrink_load=0.25)
+    for i in range(1000):
+        m.put('str' + str(i), i)
+    capacities = [m.get_capacity()]
+    for i in range(950):
+        m.remove('str' + str(i))
+        if m.get_capacity() != capacities[-1]:
+            capacities.append(m.get_capacity())
+            assert m.table_load() == 0.62
+    assert capacities == [1597, 641, 257, 103]
+    assert sorted(m.get_keys_and_values()) == sorted(('str' + str(i), i) for i in range(950, 1000))
+
+    m = HashMapSC(11, hash_function_1)
+    for i in range(1000):
+        m.put('str' + str(i), i)
+    m.remove_many('str' + str(i) for i in range(900))
+    assert m.get_capacity() == 1597
+    m.shrink_to_fit()
+    assert [m.get_size(), m.get_capacity()] == [100, 101]
+    assert all(m.get('str' + str(i)) == i for i in range(900, 1000))
+
+    # Removing missing keys from a drained table neither shrinks nor moves it
+    for step in (0, 1):
+        m = HashMapSC(11, hash_function_1, migrate_step=step, shrink_load=0.45)
+        for i in range(100):
+            m.put('str' + str(i), i)
+        m.remove_many('str' + str(i) for i in range(100))
+        m._finish_migration()
+        assert m.get_capacity() == 3
+        state = [m.get_capacity(), m._mod_count]
+        for i in range(1000):
+            m.remove('missing' + str(i))
+        m.remove_many(['missing'])
+        assert [m.get_capacity(), m._mod_count] == state
+
+
+def test_stats_sc():
+    """
+    Checks that stats() and empty_buckets() match a count over every
+    bucket after puts, removes, resizes and clear().
+    """
+    def counted(m):
+        lengths = [bucket.length() for bucket in m._buckets.raw()]
+        return tuple(lengths.count(x) for x in range(max(lengths) + 1))
+
+    m = HashMapSC(53, hash_function_1)
+    assert m.stats() == {'size': 0, 'capacity': 53, 'load': 0.0, 'empty_buckets': 53,
+                         'longest_chain': 0, 'chain_lengths': (53,)}
+    for i in range(150):
+        m.put('str' + str(i), i)
+        assert m.stats()['chain_lengths'] == counted(m)
+    for i in range(0, 150, 2):
+        m.remove('str' + str(i))
+    m.remove_many(['str1', 'str3', 'missing'])
+    stats = m.stats()
+    assert stats['chain_lengths'] == counted(m)
+    assert [stats['size'], stats['capacity'], stats['empty_buckets']] == \
+        [73, 223, m.empty_buckets()]
+    assert stats['longest_chain'] == len(stats['chain_lengths']) - 1
+
+    m.resize_table(50)
+    assert m.stats()['chain_lengths'] == counted(m)
+    m.clear()
+    assert m.stats()['chain_lengths'] == (m.get_capacity(),)
+
+
+def test_treeify_sc():
+    """
+    Puts anagrams that share a hash_function_1 hash and checks that their
+    bucket is sorted once it holds TREEIFY_LENGTH nodes, turns back into a
+    LinkedList at UNTREEIFY_LENGTH, and that keys which cannot be ordered
+    are still found.
+    """
+    keys = ['abcd', 'abdc', 'acbd', 'acdb', 'adbc', 'adcb', 'bacd', 'badc', 'bcad', 'bcda']
+    m = HashMapSC(53, hash_function_1)
+    idx = hash_function_1('abcd') % 53
+    for i, key in enumerate(keys):
+        m.put(key, i)
+        assert type(m._buckets[idx]) is (SortedBucket if i + 1 >= TREEIFY_LENGTH else LinkedList)
+    assert [node.key for node in m._buckets[idx]] == sorted(keys)
+    m.put('abcd', 'new')
+    assert [m.get_size(), m.get('abcd'), m.get('bcda')] == [10, 'new', 9]
+    assert m.stats()['longest_chain'] == 10
+
+    m.resize_table(100)
+    idx = hash_function_1('abcd') % m.get_capacity()
+    assert type(m._buckets[idx]) is SortedBucket
+    m.remove_many(keys[:3])
+    m.remove('missing')
+    assert type(m._buckets[idx]) is SortedBucket
+    m.remove(keys[3])
+    assert type(m._buckets[idx]) is LinkedList
+    assert sorted(m.get_keys_and_values()) == [(key, i) for i, key in enumerate(keys) if i > 3]
+
+    m = HashMapSC(11, lambda key: 0)
+    m.put_many(((i, 'int'), i) for i in range(10))
+    m.put('str', 'str')
+    assert [m.get('str'), m.get((3, 'int')), m.contains_key(3)] == ['str', 3, False]
+    m.remove((3, 'int'))
+    assert m.get_size() == 10
+
+
+def test_views_sc():
+    """
+    Iterates keys(), values() and items() while a resize is in progress,
+    nested, and after changes, which must stop the iterators that were
+    already running.
+    """
+    m = HashMapSC(11, hash_function_1, migrate_step=2)
+    for i in range(100):
+        m.put('str' + str(i), i)
+    assert m._old_buckets is not None
+    target = sorted(('str' + str(i), i) for i in range(100))
+    assert sorted(m.items()) == target
+    assert m._old_buckets is None
+    assert sorted(m.keys()) == [key for key, value in target]
+    assert sorted(m.values()) == list(range(100))
+    assert [len(m.items()), 'str5' in m.keys(), 'str100' in m.keys()] == [100, True, False]
+    assert sorted((node.key, node.value) for node in m) == target
+    assert sum(1 for key in m.keys() for other in m.keys()) == 100 * 100
+
+    keys, values = iter(m.keys()), iter(m.values())
+    next(keys)
+    m.put(next(keys), 'new')
+    next(keys)
+    m.remove('str0')
+    for iterator in (keys, values):
+        with pytest.raises(RuntimeError):
+            next(iterator)
+    assert len(list(m.keys())) == 99
+
+    # Replacing values at the load limit must not resize under the iterator
+    m = HashMapSC(11, hash_function_1)
+    for i in range(11):
+        m.put('str' + str(i), i)
+    for key in m.keys():
+        m.put(key, 0)
+    assert [m.get_capacity(), sorted(m.values())] == [11, [0] * 11]
+
+
 # ------------------- Open Addressing HashMap ------------------------------ #
 
 
@@ -219,3 +499,1299 @@ def test_get_keys_and_values_oa():
     for i in range(1, 6):
         m.put(str(i), str(i * 10))
     assert sorted(list(m.get_keys_and_values())) == target
+
+def test_resize_table_oa():
+    """
+    Resizes a HashMap with tombstones up and then close to its size, and
+    checks that tombstones are dropped and every live pair survives.
+    """
+    m = HashMapOA(53, hash_function_1)
+    for i in range(100):
+        m.put('str' + str(i), i)
+    for i in range(0, 100, 2):
+        m.remove('str' + str(i))
+    m.resize_table(200)
+    assert m.get_capacity() == 211
+    assert m.get_size() == 50
+    assert m.empty_buckets() == 161
+    assert all(m.get('str' + str(i)) == (i if i % 2 else None) for i in range(100))
+
+    m.resize_table(50)
+    assert m.get_capacity() == 107
+    assert m.table_load() < 0.5
+    assert sorted(m.get_keys_and_values()) == sorted(('str' + str(i), i) for i in range(1, 100, 2))
+
+def test_cached_hash_oa():
+    """
+    Counts hash function calls to check that resizing reuses the hash
+    cached on each entry instead of hashing every key again.
+    """
+    calls = []
+
+    def counting_hash(key):
+        calls.append(key)
+        return hash_function_2(key)
+
+    m = HashMapOA(11, counting_hash)
+    for i in range(50):
+        m.put('str' + str(i), i)
+    assert len(calls) == 50
+    m.resize_table(500)
+    assert len(calls) == 50
+    assert all(m.get('str' + str(i)) == i for i in range(50))
+
+
+def test_put_after_remove_oa():
+    """
+    Removes a key that sits earlier in a probe sequence, then updates a key
+    further along and checks that it is not stored twice.
+    """
+    m = HashMapOA(11, hash_function_1)
+    m.put('ab', 1)
+    m.put('ba', 2)
+    m.remove('ab')
+    m.put('ba', 3)
+    assert m.get_size() == 1
+    assert list(m.get_keys_and_values()) == [('ba', 3)]
+
+def test_batch_operations_oa():
+    """
+    Checks that put_many() ends with the same size and capacity as putting
+    each pair, and that get_many() and remove_many() follow input order.
+    """
+    pairs = [('str' + str(i), i) for i in range(150)]
+    m = HashMapOA(53, hash_function_1)
+    m.put_many(pairs)
+    assert [m.get_size(), m.get_capacity()] == [150, 449]
+    assert sorted(m.get_keys_and_values()) == sorted(pairs)
+
+    m.put_many([('str1', 'a'), ('str1', 'b')])
+    assert m.get_size() == 150
+    assert list(m.get_many(['str1', 'missing', 'str0'])) == ['b', None, 0]
+
+    m.remove_many(['str0', 'str1', 'missing', 'str0'])
+    assert m.get_size() == 148
+    assert list(m.get_many(['str0', 'str1', 'str2'])) == [None, None, 2]
+
+def test_reserve_oa(monkeypatch):
+    """
+    Reserves room for a known number of keys and checks that loading them
+    with put() and with from_pairs() never resizes the table.
+    """
+    resizes = []
+    rehash = HashMapOA._rehash
+
+    def counting_rehash(self, capacity):
+        resizes.append(capacity)
+        rehash(self, capacity)
+
+    monkeypatch.setattr(HashMapOA, '_rehash', counting_rehash)
+    m = HashMapOA(11, hash_function_1)
+    m.reserve(1000)
+    assert m.get_capacity() == 2027
+    resizes.clear()
+    for i in range(1000):
+        m.put('str' + str(i), i)
+    assert resizes == []
+    m.reserve(10)
+    assert m.get_capacity() == 2027
+
+    pairs = [('str' + str(i % 1000), i) for i in range(3000)]
+    m = HashMapOA.from_pairs(pairs, expected_size=1000)
+    assert resizes == [2027]
+    assert m.get_size() == 1000
+    assert m.get('str5') == 2005
+
+def test_tombstones_oa():
+    """
+    Checks that removed keys still occupy their bucket until compact()
+    rebuilds the table at the same capacity.
+    """
+    m = HashMapOA(53, hash_function_1)
+    for i in range(20):
+        m.put('str' + str(i), i)
+    for i in range(10):
+        m.remove('str' + str(i))
+    assert [m.get_size(), m.empty_buckets(), m.table_load()] == [10, 33, 0.19]
+
+    m.compact()
+    assert [m.get_size(), m.empty_buckets(), m.get_capacity()] == [10, 43, 53]
+    assert all(m.get('str' + str(i)) == (i if i >= 10 else None) for i in range(20))
+
+
+def test_churn_oa():
+    """
+    Removes and re-adds keys many times and checks that tombstones never
+    push the table past its load limit. The table doubles once while live
+    keys use more than half of the limit, and is only compacted after that.
+    """
+    m = HashMapOA(53, hash_function_2, tombstone_ratio=0.1)
+    m.put_many(('str' + str(i), i) for i in range(100))
+    for i in range(100, 2000):
+        m.remove('str' + str(i - 100))
+        m.put('str' + str(i), i)
+        assert m.get_capacity() - m.empty_buckets() <= m.get_capacity() / 2
+    assert [m.get_size(), m.get_capacity()] == [100, 449]
+    assert list(m.get_many('str' + str(i) for i in range(1895, 1905))) == \
+        [None] * 5 + list(range(1900, 1905))
+
+    # put_many() compacts by the same rules as put()
+    m = HashMapOA(1009, hash_function_2)
+    for batch in range(20):
+        m.put_many(('str' + str(i), i) for i in range(batch * 100, batch * 100 + 100))
+        m.remove_many('str' + str(i) for i in range(batch * 100, batch * 100 + 90))
+        assert m._tombstones <= 0.2 * 1009 + 100
+    assert [m.get_size(), m.get_capacity()] == [200, 1009]
+
+def test_tombstone_sentinel_oa():
+    """
+    Checks that entries carry no per-instance dictionary and that removed
+    entries are replaced by the shared tombstone.
+    """
+    m = HashMapOA(11, hash_function_1)
+    m.put('a', 1)
+    m.put('b', 2)
+    idx = hash_function_1('a') % 11
+    assert not hasattr(m._buckets[idx], '__dict__')
+    m.remove('a')
+    assert m._buckets[idx] is TOMBSTONE
+    assert m._buckets[idx].is_tombstone is True
+    m.put('a', 3)
+    assert m._buckets[idx].is_tombstone is False
+    assert m.get('a') == 3
+
+def test_incremental_resize_oa():
+    """
+    Grows a HashMap that moves one slot per operation and checks that it
+    follows the same capacities as resizing all at once, and that keys are
+    found, removed and listed correctly while the old table is in use.
+    """
+    for map_class in (HashMapOA, HashMapRH):
+        m = map_class(53, hash_function_1, migrate_step=1)
+        eager = map_class(53, hash_function_1)
+        for i in range(28):
+            m.put('str' + str(i), i)
+            eager.put('str' + str(i), i)
+        assert m.get_capacity() == eager.get_capacity() == 107
+        assert m._old_buckets is not None
+
+        m.put('str1', 'a')
+        m.remove('str2')
+        m.remove('missing')
+        assert m.get_size() == 27
+        assert [m.get('str1'), m.get('str2'), m.get('str3')] == ['a', None, 3]
+        assert m.contains_key('str27') and not m.contains_key('str2')
+        expected = [('str' + str(i), i) for i in range(28) if i not in (1, 2)] + [('str1', 'a')]
+        assert sorted(m.get_keys_and_values(), key=str) == sorted(expected, key=str)
+
+        for i in range(28, 150):
+            m.put('str' + str(i), i)
+        assert [m.get_size(), m.get_capacity()] == [149, 449]
+        assert list(m.get_many('str' + str(i) for i in range(1, 150))) == ['a', None] + list(range(3, 150))
+        assert m.get_keys_and_values().length() == 149
+
+def test_shrink_oa():
+    """
+    Drains a large HashMap and checks that it shrinks each time the load
+    drops below shrink_load, and that shrink_to_fit() gives the smallest
+    capacity that still holds every element.
+    """
+    m = HashMapOA(11, hash_function_1, shrink_load=0.1)
+    for i in range(1000):
+        m.put('str' + str(i), i)
+    capacities = [m.get_capacity()]
+    for i in range(950):
+        m.remove('str' + str(i))
+        if m.get_capacity() != capacities[-1]:
+            capacities.append(m.get_capacity())
+            assert m.table_load() == 0.3
+    assert capacities == [3203, 1069, 359]
+    assert sorted(m.get_keys_and_values()) == sorted(('str' + str(i), i) for i in range(950, 1000))
+
+    m = HashMapOA(11, hash_function_1)
+    for i in range(1000):
+        m.put('str' + str(i), i)
+    m.remove_many('str' + str(i) for i in range(900))
+    assert m.get_capacity() == 3203
+    m.shrink_to_fit()
+    assert [m.get_size(), m.get_capacity(), m.empty_buckets()] == [100, 211, 111]
+    assert all(m.get('str' + str(i)) == i for i in range(900, 1000))
+
+    # Removing missing keys from a drained table neither shrinks nor moves it
+    for step in (0, 1):
+        m = HashMapOA(11, hash_function_1, migrate_step=step, shrink_load=0.45)
+        for i in range(100):
+            m.put('str' + str(i), i)
+        m.remove_many('str' + str(i) for i in range(100))
+        m._finish_migration()
+        assert m.get_capacity() == 3
+        state = [m.get_capacity(), m._mod_count]
+        for i in range(1000):
+            m.remove('missing' + str(i))
+        m.remove_many(['missing'])
+        assert [m.get_capacity(), m._mod_count] == state
+
+
+def test_views_oa():
+    """
+    Checks that iteration returns an entry in slot 0, that iterators keep
+    their own cursor, and that changes stop them.
+    """
+    m = HashMapOA(11, lambda key: 0)
+    m.put('first', 1)
+    assert m._buckets[0].key == 'first'
+    assert [entry.key for entry in m] == ['first']
+    assert list(m.items()) == [('first', 1)]
+
+    m = HashMapOA(11, hash_function_2, migrate_step=1)
+    for i in range(50):
+        m.put('str' + str(i), i)
+    m.remove('str7')
+    items = sorted(m.items())
+    assert items == sorted(('str' + str(i), i) for i in range(50) if i != 7)
+    assert [key for key, value in items] == sorted(m.keys())
+    outer, inner = iter(m.keys()), iter(m.keys())
+    assert [next(outer) for _ in range(3)] == [next(inner) for _ in range(3)]
+    assert len(list(inner)) == 46
+
+    m.put('str7', 7)
+    with pytest.raises(RuntimeError):
+        next(outer)
+    assert len(m.values()) == 50
+
+    # Replacing values must neither grow the table at the load limit nor
+    # compact its tombstones under the iterator
+    m = HashMapOA(11, hash_function_1)
+    for i in range(6):
+        m.put('str' + str(i), i)
+    for key in m.keys():
+        m.put(key, 0)
+    assert [m.get_capacity(), sorted(m.values())] == [11, [0] * 6]
+    m = HashMapOA(23, hash_function_1)
+    for i in range(11):
+        m.put('str' + str(i), i)
+    m.remove_many('str' + str(i) for i in range(5))
+    for key in m.keys():
+        m.put(key, 1)
+    assert [m.get_capacity(), m.empty_buckets(), sorted(m.values())] == [23, 12, [1] * 6]
+    m.put('new', 2)
+    assert [m.get_capacity(), m.empty_buckets()] == [23, 16]
+
+
+# ------------------- Triangular Probing HashMap --------------------------- #
+
+
+def test_put_tp():
+    """
+    Tests put(), resize(), table_load() empty_buckets(), get_size(),
+    get_capacity().
+    Adds values, then periodically checks actual output against expected
+    output.
+    """
+    m = HashMapTP(64, hash_function_1)
+    expected = [[39, 0.39, 25, 64], [78, 0.39, 50, 128], [181, 0.29, 75, 256],
+                [156, 0.39, 100, 256], [131, 0.49, 125, 256], [362, 0.29, 150, 512]]
+    outputs = []
+    for i in range(150):
+        m.put('str' + str(i), i * 100)
+        if i % 25 == 24:
+            outputs.append([m.empty_buckets(), m.table_load(), m.get_size(), m.get_capacity()])
+    assert outputs == expected
+
+
+def test_capacity_tp():
+    """
+    Checks that capacities are rounded up to a power of two.
+    """
+    assert HashMapTP(53, hash_function_1).get_capacity() == 64
+    m = HashMapTP(64, hash_function_1)
+    m.resize_table(100)
+    assert m.get_capacity() == 128
+    m.reserve(1000)
+    assert m.get_capacity() == 2048
+
+
+def test_get_contains_remove_tp():
+    """
+    Gets, checks and removes keys, including anagrams that share a hash.
+    """
+    m = HashMapTP(8, hash_function_1)
+    assert m.get("test_key") is None
+    assert m.contains_key("test_key") is False
+    for key in ('abc', 'acb', 'bac', 'bca', 'cab', 'cba'):
+        m.put(key, key.upper())
+    assert m.get('bca') == 'BCA'
+    m.remove('abc')
+    assert m.contains_key('abc') is False
+    m.put('cba', 'new')
+    assert m.get_size() == 5
+    assert m.get('cba') == 'new'
+
+
+def test_probes_visit_every_slot_tp():
+    """
+    Fills a table with keys that all share one hash and checks that
+    triangular probing still finds a free slot for each of them.
+    """
+    m = HashMapTP(64, lambda key: 0)
+    m.put_many((str(i), i) for i in range(31))
+    assert m.get_capacity() == 64
+    assert list(m.get_many(str(i) for i in range(31))) == list(range(31))
+
+
+def test_get_keys_and_values_tp():
+    """
+    Creates a HashMap using set values and compares the output of keys and
+    values, and of iteration, to the expected output.
+    """
+    m = HashMapTP(53, hash_function_1)
+    target = [('1', '10'), ('2', '20'), ('3', '30'), ('4', '40'), ('5', '50')]
+    for i in range(1, 6):
+        m.put(str(i), str(i * 10))
+    assert sorted(list(m.get_keys_and_values())) == target
+    assert sorted((entry.key, entry.value) for entry in m) == target
+
+
+def test_tombstones_tp():
+    """
+    Churns a small set of keys and checks that tombstones count towards
+    the load, are compacted by put() and put_many(), and are not reported
+    as empty buckets.
+    """
+    m = HashMapTP(64, hash_function_2)
+    for i in range(20):
+        m.put('str' + str(i), i)
+    m.remove_many('str' + str(i) for i in range(10))
+    assert [m.get_size(), m._tombstones, m.empty_buckets()] == [10, 10, 44]
+
+    for round in range(1000):
+        m.put('churn' + str(round), round)
+        m.remove('churn' + str(round))
+    assert m.get_capacity() == 64
+    assert m._tombstones <= 0.2 * 64 + 1
+    assert m.empty_buckets() == sum(1 for entry in m._buckets.raw() if entry is None)
+
+    m.remove_many('str' + str(i) for i in range(10, 20))
+    m.put_many(('new' + str(i), i) for i in range(3))
+    assert [m.get_size(), m._tombstones, m.empty_buckets()] == [3, 0, 61]
+    assert m.get_capacity() == 64
+
+
+# ------------------- Robin Hood HashMap ----------------------------------- #
+
+
+def test_put_rh():
+    """
+    Checks that HashMapRH sizes its table exactly like HashMapOA.
+    """
+    m = HashMapRH(53, hash_function_1)
+    expected = [[28, 0.47, 25, 53], [57, 0.47, 50, 107], [148, 0.34, 75, 223],
+                [123, 0.45, 100, 223], [324, 0.28, 125, 449], [299, 0.33, 150, 449]]
+    outputs = []
+    for i in range(150):
+        m.put('str' + str(i), i * 100)
+        if i % 25 == 24:
+            outputs.append([m.empty_buckets(), m.table_load(), m.get_size(), m.get_capacity()])
+    assert outputs == expected
+
+
+def test_remove_backward_shift_rh():
+    """
+    Removes the first of a run of colliding keys and checks that the rest
+    shift back towards their home slot without leaving a tombstone.
+    """
+    m = HashMapRH(11, hash_function_1)
+    for key in ('abc', 'acb', 'bac', 'bca'):
+        m.put(key, key)
+    home = hash_function_1('abc') % 11
+    assert [m._buckets[(home + i) % 11].distance for i in range(4)] == [0, 1, 2, 3]
+
+    m.remove(m._buckets[home].key)
+    assert [m._buckets[(home + i) % 11].distance for i in range(3)] == [0, 1, 2]
+    assert m._buckets[(home + 3) % 11] is None
+    assert m.get_size() == 3
+    assert sum(m.contains_key(key) for key in ('abc', 'acb', 'bac', 'bca')) == 3
+
+
+def test_churn_rh():
+    """
+    Removes and re-adds keys many times and checks that no tombstones are
+    left behind and every key is still found.
+    """
+    m = HashMapRH(53, hash_function_2)
+    m.put_many(('str' + str(i), i) for i in range(100))
+    for i in range(100, 2000):
+        m.remove('str' + str(i - 100))
+        m.put('str' + str(i), i)
+    assert m.get_size() == 100
+    assert m.get_capacity() == 223
+    assert all(m._buckets[x] is None or not m._buckets[x].is_tombstone for x in range(223))
+    assert list(m.get_many('str' + str(i) for i in range(1895, 1905))) == \
+        [None] * 5 + list(range(1900, 1905))
+
+
+# ------------------- Compact Array HashMap -------------------------------- #
+
+
+def test_put_ca():
+    """
+    Checks that HashMapCA sizes its table exactly like HashMapOA.
+    """
+    m = HashMapCA(53, hash_function_1)
+    expected = [[28, 0.47, 25, 53], [57, 0.47, 50, 107], [148, 0.34, 75, 223],
+                [123, 0.45, 100, 223], [324, 0.28, 125, 449], [299, 0.33, 150, 449]]
+    outputs = []
+    for i in range(150):
+        m.put('str' + str(i), i * 100)
+        if i % 25 == 24:
+            outputs.append([m.empty_buckets(), m.table_load(), m.get_size(), m.get_capacity()])
+    assert outputs == expected
+
+
+def test_get_contains_remove_ca():
+    """
+    Gets, checks and removes keys, and checks that a removed slot releases
+    its key and value until compact() clears the tombstone.
+    """
+    m = HashMapCA(31, hash_function_1)
+    assert m.get("test_key") is None
+    m.put("test_key", "test_value")
+    m.put("key_test", "value_test")
+    assert m.get("test_key") == "test_value"
+    assert m.contains_key("key_test") is True
+
+    m.remove("test_key")
+    assert m.contains_key("test_key") is False
+    assert m.get("key_test") == "value_test"
+    assert "test_value" not in m._values
+    assert m.empty_buckets() == 29
+    m.compact()
+    assert m.empty_buckets() == 30
+
+
+def test_get_keys_and_values_ca():
+    """
+    Creates a HashMap using set values and compares the output of keys and
+    values to the expected output, before and after clearing it.
+    """
+    m = HashMapCA.from_pairs((str(i), str(i * 10)) for i in range(1, 6))
+    target = [('1', '10'), ('2', '20'), ('3', '30'), ('4', '40'), ('5', '50')]
+    assert sorted(list(m.get_keys_and_values())) == target
+    assert sorted((entry.key, entry.value) for entry in m) == target
+    m.clear()
+    assert list(m.get_keys_and_values()) == []
+    assert list(m) == []
+    assert m.get_size() == 0
+
+
+def test_put_many_compacts_ca():
+    """
+    Checks that put_many() compacts tombstones by the same rules as put().
+    """
+    m = HashMapCA(1009, hash_function_2)
+    for batch in range(20):
+        m.put_many(('str' + str(i), i) for i in range(batch * 100, batch * 100 + 100))
+        m.remove_many('str' + str(i) for i in range(batch * 100, batch * 100 + 90))
+        assert m._tombstones <= 0.2 * 1009 + 100
+    assert [m.get_size(), m.get_capacity()] == [200, 1009]
+
+    # Replacing a value at the load limit neither grows nor compacts
+    m = HashMapCA(11, hash_function_1)
+    m.put_many(('str' + str(i), i) for i in range(6))
+    m.put('str0', 'a')
+    m.put_many([('str1', 'b')])
+    assert [m.get_capacity(), m.get('str0'), m.get('str1')] == [11, 'a', 'b']
+
+
+# ------------------- Memory-mapped HashMap -------------------------------- #
+
+
+@pytest.fixture
+def tmpfs_path(tmp_path):
+    """
+    Returns the path of a new file on tmpfs, or under tmp_path where
+    /dev/shm does not exist.
+    """
+    if not os.path.isdir('/dev/shm'):
+        yield str(tmp_path / 'map')
+        return
+    with tempfile.TemporaryDirectory(dir='/dev/shm') as directory:
+        yield os.path.join(directory, 'map')
+
+
+def test_put_mm(tmpfs_path):
+    """
+    Checks that HashMapMM sizes its table exactly like HashMapOA.
+    """
+    m = HashMapMM(tmpfs_path, 53, hash_function_1)
+    expected = [[28, 0.47, 25, 53], [57, 0.47, 50, 107], [148, 0.34, 75, 223],
+                [123, 0.45, 100, 223], [324, 0.28, 125, 449], [299, 0.33, 150, 449]]
+    outputs = []
+    for i in range(150):
+        m.put('str' + str(i), str(i * 100).encode())
+        if i % 25 == 24:
+            outputs.append([m.empty_buckets(), m.table_load(), m.get_size(), m.get_capacity()])
+    assert outputs == expected
+    m.close()
+
+
+def test_get_contains_remove_mm(tmpfs_path):
+    """
+    Gets, checks, replaces and removes keys, and checks that values are
+    read-only views that stay valid while the file grows.
+    """
+    m = HashMapMM(tmpfs_path, 11, hash_function_1)
+    assert m.get('test_key') is None
+    m.put('test_key', b'test_value')
+    value = m.get('test_key')
+    assert isinstance(value, memoryview) and value.readonly
+    assert value == b'test_value'
+
+    for i in range(2000):
+        m.put('str' + str(i), bytes([i % 256]) * (i % 50))
+    m.put('test_key', bytearray(b'new'))
+    assert value == b'test_value'
+    assert [m.get('test_key'), m.get('str1999'), m.get('\u00e9')] == [b'new', b'\xcf' * 49, None]
+
+    m.remove('test_key')
+    m.remove('missing')
+    assert [m.contains_key('test_key'), m.contains_key('str0'), m.get_size()] == [False, True, 2000]
+    with pytest.raises(TypeError):
+        m.put('str', 'not bytes')
+    m.clear()
+    assert [m.get_size(), m.get_capacity(), m.get('str5')] == [0, 6421, None]
+    m.close()
+
+
+def test_reopen_mm(tmpfs_path):
+    """
+    Closes a HashMapMM and opens its file again, and checks that every
+    pair is there without being put again.
+    """
+    with HashMapMM(tmpfs_path, 11, hash_function_2) as m:
+        for i in range(500):
+            m.put('str' + str(i), str(i).encode())
+        m.remove('str0')
+        capacity = m.get_capacity()
+
+    with HashMapMM(tmpfs_path, 11, hash_function_2) as m:
+        assert [m.get_size(), m.get_capacity()] == [499, capacity]
+        assert [m.get('str0'), m.get('str499')] == [None, b'499']
+        assert sorted((key, bytes(value)) for key, value in m.get_keys_and_values()) == \
+            sorted(('str' + str(i), str(i).encode()) for i in range(1, 500))
+
+    with pytest.raises(ValueError):
+        HashMapMM(tmpfs_path, 11, hash_function_1)
+
+    with open(tmpfs_path, 'wb') as file:
+        file.write(b'not a map')
+    with pytest.raises(ValueError):
+        HashMapMM(tmpfs_path)
+
+
+def test_reclaim_mm(tmpfs_path):
+    """
+    Replaces and removes values over and over, and checks that the file
+    stays small, that compact() copies only the live pairs into a new file,
+    and that views taken before stay valid.
+    """
+    m = HashMapMM(tmpfs_path, 11, hash_function_2)
+    m.put('kept', b'kept')
+    view = m.get('kept')
+    for i in range(100):
+        m.put('replaced', bytes([i]) * 10000)
+        for j in range(20):
+            m.put('str' + str(j), b'x' * 10000)
+        for j in range(20):
+            m.remove('str' + str(j))
+    assert os.path.getsize(tmpfs_path) < 4 * hash_map_mm.MIN_GARBAGE
+    assert [m.get_size(), m.get('replaced'), view] == [2, bytes([99]) * 10000, b'kept']
+
+    m.compact()
+    live = [('kept', 4), ('replaced', 10000)]
+    assert os.path.getsize(tmpfs_path) == (hash_map_mm.HEADER_SIZE + m.get_capacity() * 32 +
+                                            sum(16 + len(key) + size for key, size in live))
+    assert [m.get('kept'), view, os.listdir(os.path.dirname(tmpfs_path))] == [b'kept', b'kept', ['map']]
+    m.clear()
+    assert [m.get_size(), os.path.getsize(tmpfs_path)] == [0, hash_map_mm.HEADER_SIZE + m.get_capacity() * 32]
+    m.close()
+
+
+# ------------------- Concurrent HashMap ----------------------------------- #
+
+
+def test_put_get_remove_cc():
+    """
+    Puts, gets and removes keys across segments, and checks that segments
+    grow and shrink on their own.
+    """
+    m = HashMapCC(11, hash_function_2, segments=4, shrink_load=0.2)
+    assert [m.get_capacity(), m.get('str0'), m.contains_key('str0')] == [12, None, False]
+    for i in range(1000):
+        m.put('str' + str(i), i)
+    m.put('str0', 'a')
+    assert [m.get_size(), m.get('str0'), m.get('str999'), m.contains_key('str500')] == [1000, 'a', 999, True]
+    assert m.get_capacity() > 1000
+    for i in range(990):
+        m.remove('str' + str(i))
+    m.remove('missing')
+    assert m.get_size() == 10
+    assert m.get_capacity() < 500
+    assert sorted(m.get_keys_and_values()) == sorted(('str' + str(i), i) for i in range(990, 1000))
+
+    m.reserve(1000)
+    assert all(segment.get_capacity() >= 250 for segment in m._segments)
+    m.clear()
+    assert [m.get_size(), m.get('str995')] == [0, None]
+
+
+def test_compute_if_absent_merge_cc():
+    """
+    Checks that compute_if_absent() only calls its function for missing
+    keys and that merge() combines, stores and removes values.
+    """
+    m = HashMapCC(11, hash_function_1)
+    calls = []
+    assert m.compute_if_absent('a', lambda key: calls.append(key) or key.upper()) == 'A'
+    assert m.compute_if_absent('a', lambda key: calls.append(key) or 'B') == 'A'
+    assert m.compute_if_absent('b', lambda key: None) is None
+    assert [calls, m.contains_key('b')] == [['a'], False]
+
+    assert m.merge('n', 1, lambda old, value: old + value) == 1
+    assert m.merge('n', 2, lambda old, value: old + value) == 3
+    assert m.merge('n', 0, lambda old, value: None) is None
+    assert [m.contains_key('n'), m.get_size()] == [False, 1]
+
+
+def test_threads_cc():
+    """
+    Runs writers that resize segments and merge into a shared counter
+    while readers look up keys that are always present, switching threads
+    as often as possible, and checks that no read misses and no update is
+    lost.
+    """
+    m = HashMapCC(3, hash, segments=4, shrink_load=0.3)
+    keys = ['key' + str(i) for i in range(500)]
+    for key in keys:
+        m.put(key, key)
+    misses = []
+    done = threading.Event()
+
+    def read():
+        while not done.is_set():
+            misses.extend(key for key in keys[::7] if m.get(key) != key)
+
+    def write(thread):
+        added = [str(thread) + '_' + str(i) for i in range(1000)]
+        for key in added:
+            m.put(key, 1)
+            m.merge('count', 1, lambda old, value: old + value)
+        for key in added:
+            m.remove(key)
+
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        readers = [threading.Thread(target=read) for _ in range(2)]
+        writers = [threading.Thread(target=write, args=(thread,)) for thread in range(4)]
+        for thread in readers + writers:
+            thread.start()
+        for thread in writers:
+            thread.join()
+        done.set()
+        for thread in readers:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+    assert [misses, m.get('count'), m.get_size()] == [[], 4000, 501]
+
+
+def test_unlocked_reads_cc():
+    """
+    Looks keys up in a sorted bucket between the updates of its two lists,
+    as a reader without the lock can, and checks that writes hash each key
+    only once.
+    """
+    keys = ['str' + str(i) for i in range(10)]
+    bucket = SortedBucket(SLNode(key, key, None, 0) for key in keys[1:])
+    found = []
+
+    class Watched(list):
+        def insert(self, idx, item):
+            found.extend(bucket.contains(key, 0) for key in keys)
+            super().insert(idx, item)
+
+        def __delitem__(self, idx):
+            found.extend(bucket.contains(key, 0) for key in keys)
+            super().__delitem__(idx)
+
+    bucket._keys, bucket._nodes = Watched(bucket._keys), Watched(bucket._nodes)
+    bucket.insert('str0', 'str0', 0)
+    bucket.remove('str5', 0)
+    assert len(found) == 40
+    assert all(node is None or node.key in keys for node in found)
+
+    calls = []
+    m = HashMapCC(11, lambda key: calls.append(key) or hash_function_1(key))
+    m.put('a', 1)
+    m.merge('a', 1, lambda old, value: old + value)
+    m.compute_if_absent('b', str)
+    m.remove('a')
+    assert [calls, m.get_size()] == [['a', 'a', 'b', 'a'], 1]
+
+
+# ------------------- Sharded HashMap -------------------------------------- #
+
+
+def test_put_get_remove_mp():
+    """
+    Puts, gets and removes keys one at a time and in batches across shards
+    of both map classes, and gathers every pair from the shards.
+    """
+    pairs = [('str' + str(i), i) for i in range(300)]
+    for map_class in (HashMapSC, HashMapOA):
+        with HashMapMP(3, map_class, 11, hash_function_2) as m:
+            m.put_many(pairs)
+            m.put('str0', 'a')
+            m.put('new', 'b')
+            assert [m.get_size(), m.get('str0'), m.get('new'), m.get('missing')] == [301, 'a', 'b', None]
+            assert list(m.get_many(['str299', 'missing', 'str1', 'str1'])) == [299, None, 1, 1]
+
+            m.remove('new')
+            m.remove_many('str' + str(i) for i in range(100, 300))
+            assert [m.contains_key('new'), m.contains_key('str99'), m.get_size()] == [False, True, 100]
+            assert sorted(m.get_keys_and_values(), key=str) == \
+                sorted([('str0', 'a')] + pairs[1:100], key=str)
+            m.clear()
+            assert [m.get_size(), list(m.get_many([]))] == [0, []]
+
+
+def test_seeds_and_errors_mp():
+    """
+    Checks that every shard uses the same seed for a named hash function,
+    and that errors raised in a worker are raised again in the caller.
+    """
+    with HashMapMP(2, HashMapSC, 11, 'xxhash64', seed=5) as m:
+        m.put_many(('str' + str(i), i) for i in range(50))
+        assert list(m.get_many(['str7', 'str49'])) == [7, 49]
+
+    with pytest.raises(ValueError):
+        HashMapMP(2, HashMapOA, shrink_load=0.7)
+
+    with HashMapMP(2, HashMapSC, 11, len) as m:
+        with pytest.raises(TypeError):
+            m.put(5, 'int keys have no len()')
+        m.put('still', 'works')
+        assert m.get('still') == 'works'
+
+    # A batch that cannot be pickled must not leave any shard's reply
+    # unread, or every later call would read the wrong reply
+    with HashMapMP(4) as m:
+        pairs = [('a' + str(i), i) for i in range(8)]
+        m.put_many(pairs)
+        with pytest.raises(Exception):
+            m.put_many(pairs + [('bad', lambda: 'cannot be pickled')])
+        assert [m.get(key) for key, value in pairs] == list(range(8))
+        assert m.get_size() == 8
+
+
+# ------------------- Async HashMap ---------------------------------------- #
+
+
+def test_coalescing_async():
+    """
+    Makes many calls at once and checks that they are applied as one batch
+    per run of calls of the same kind, in call order.
+    """
+    class CountingHashMapSC(HashMapSC):
+        def get_many(self, keys):
+            calls.append(('get_many', len(keys)))
+            return super().get_many(keys)
+
+        def put_many(self, pairs):
+            pairs = list(pairs)
+            calls.append(('put_many', len(pairs)))
+            super().put_many(pairs)
+
+    async def run():
+        m = AsyncHashMap(CountingHashMapSC(1000, hash_function_1))
+        results = await asyncio.gather(
+            *[m.put('str' + str(i), i) for i in range(100)],
+            *[m.get('str' + str(i)) for i in range(0, 200, 2)],
+            m.remove('str0'), m.remove('missing'), m.get('str0'), m.contains_key('str2'))
+        assert results[100:200] == [i if i < 100 else None for i in range(0, 200, 2)]
+        assert results[200:] == [None, None, None, True]
+        assert [m.get_size(), await m.get('str99')] == [99, 99]
+
+    calls = []
+    asyncio.run(run())
+    assert calls == [('put_many', 100), ('get_many', 100), ('get_many', 1), ('get_many', 1)]
+
+
+def test_executor_async():
+    """
+    Checks that batches that resize the map and bulk operations run in an
+    executor thread, that calls made meanwhile wait for them, and that
+    errors reach the caller.
+    """
+    class ThreadHashMapOA(HashMapOA):
+        def _rehash(self, capacity):
+            threads.append(threading.current_thread())
+            super()._rehash(capacity)
+
+    async def run():
+        m = AsyncHashMap(ThreadHashMapOA(11, hash_function_2))
+        await asyncio.gather(*[m.put('str' + str(i), i) for i in range(3)])
+        assert threads == []
+        await asyncio.gather(*[m.put('str' + str(i), i) for i in range(3, 500)])
+        assert threads and threading.main_thread() not in threads
+
+        bulk = m.put_many(('key' + str(i), i) for i in range(1000))
+        assert await asyncio.gather(bulk, m.get('key999'), m.get('str499')) == [None, 999, 499]
+        assert (await m.get_keys_and_values()).length() == 1500
+
+        with pytest.raises(TypeError):
+            await m.put(5, 'int keys cannot be hashed')
+        assert await m.get('str1') == 1
+
+    threads = []
+    asyncio.run(run())
+
+
+def test_errors_async():
+    """
+    Checks that a bad call in a batch only fails its own caller, and that
+    put batches only go to the executor when put_many() would resize.
+    """
+    class ThreadHashMapOA(HashMapOA):
+        def _rehash(self, capacity):
+            threads.append(threading.current_thread())
+            super()._rehash(capacity)
+
+    async def run():
+        m = AsyncHashMap(HashMapSC(11, hash_function_1))
+        results = await asyncio.gather(m.put('good', 1), m.put(5, 'bad'), m.get('good'), m.get(7),
+                                       m.remove('good'), m.remove(8), return_exceptions=True)
+        assert results[0] is None and results[2] == 1 and results[4] is None
+        assert [type(results[x]) for x in (1, 3, 5)] == [TypeError] * 3
+        assert [m.get_size(), await m.get('good')] == [0, None]
+
+        m = AsyncHashMap(ThreadHashMapOA(1009, hash_function_2))
+        await asyncio.gather(*[m.put('str' + str(i), i) for i in range(230)])
+        await asyncio.gather(*[m.remove('str' + str(i)) for i in range(230)])
+        threads.clear()
+        for batch in range(20):
+            await asyncio.gather(*[m.put('new' + str(batch * 5 + i), i) for i in range(5)])
+        # The first batch compacts the tombstones, and the others fit
+        assert len(threads) == 1
+        assert m.get_size() == 100
+
+    threads = []
+    asyncio.run(run())
+
+
+# ------------------- Bounded cache ---------------------------------------- #
+
+
+def test_policies_cache():
+    """
+    Fills caches of 3 entries past their bound and checks which key each
+    eviction policy drops, and the counters.
+    """
+    evicted = {}
+    for policy in POLICIES:
+        c = HashMapCache(max_entries=3, policy=policy)
+        for key in ['a', 'b', 'c']:
+            c.put(key, key.upper())
+        assert [c.get('a'), c.get('a'), c.get('b'), c.get('z')] == ['A', 'A', 'B', None]
+        c.put('d', 'D')
+        c.put('e', 'E')
+        assert c.get_size() == 3
+        evicted[policy] = [key for key in 'abcde' if not c.contains_key(key)]
+        assert c.stats() == {'hits': 3, 'misses': 1, 'hit_ratio': 0.75, 'evictions': 2,
+                             'expirations': 0, 'size': 3, 'bytes': 0}
+
+    # LRU drops c, then a. LFU drops c, then the new d. SIEVE clears the
+    # visited marks of a and b on its way to c, so it drops a next.
+    assert evicted == {'lru': ['a', 'c'], 'lfu': ['c', 'd'], 'sieve': ['a', 'c']}
+
+    c = HashMapCache(max_entries=2, policy=LFUPolicy())
+    c.put('a', 1)
+    c.put('a', 2)
+    c.put('b', 1)
+    c.remove('b')
+    c.remove('missing')
+    c.put('c', 1)
+    c.put('d', 1)
+    assert [c.get('a'), c.get('c'), c.get('d')] == [2, None, 1]
+    c.clear()
+    assert [c.get_size(), c.get('a'), c.evictions] == [0, None, 1]
+
+    class TaggedPolicy(LRUPolicy):
+        def __init__(self, tag: str) -> None:
+            super().__init__()
+            self.tag = tag
+
+    policy = TaggedPolicy('t')
+    c = HashMapCache(max_entries=1000, policy=policy)
+    for i in range(1000):
+        c.put('key' + str(i), i)
+    assert c._map.stats()['longest_chain'] < 10
+    c.clear()
+    c.put('a', 1)
+    c.put('b', 2)
+    assert [c._policy is policy, policy.victim().key] == [True, 'a']
+
+
+def test_bytes_ttl_cache():
+    """
+    Checks the byte budget and expiry, with sizes and time under the
+    test's control.
+    """
+    now = [0.0]
+    c = HashMapCache(max_bytes=10, ttl=5, sizeof=len, clock=lambda: now[0])
+    c.put('a', 'xxxx')
+    c.put('b', 'xxxx', ttl=1)
+    assert c.get_bytes() == 10
+    c.put('c', 'x')
+    assert [c.contains_key('a'), c.get_bytes()] == [False, 7]
+    c.put('d', 'x' * 10)
+    assert [c.contains_key('d'), c.get_size()] == [False, 2]
+    c.put('b', 'xxxxxxxx', ttl=1)
+    assert [c.contains_key('c'), c.get_bytes()] == [False, 9]
+
+    now[0] = 1.0
+    assert [c.get('b'), c.get_size(), c.expirations] == [None, 0, 1]
+    c.put('e', 'x')
+    now[0] = 5.5
+    assert c.get('e') == 'x'
+    now[0] = 6.0
+    assert [c.contains_key('e'), c.expirations, c.get_bytes()] == [False, 2, 0]
+    with pytest.raises(ValueError):
+        HashMapCache()
+    for bounds in ({'max_entries': 0}, {'max_bytes': 0}, {'max_entries': 5, 'max_bytes': -1}):
+        with pytest.raises(ValueError):
+            HashMapCache(**bounds)
+
+
+def test_expired_first_cache():
+    """
+    Checks that expired entries are dropped before the policy evicts a
+    live one, and are counted as expirations.
+    """
+    now = [0.0]
+    c = HashMapCache(max_entries=3, clock=lambda: now[0])
+    c.put('short', 1, ttl=1)
+    c.put('long', 2, ttl=10)
+    c.put('kept', 3)
+    c.get('short')
+    now[0] = 2.0
+    c.put('new', 4)
+    assert [c.contains_key(key) for key in ('short', 'long', 'kept', 'new')] == [False, True, True, True]
+    assert [c.evictions, c.expirations] == [0, 1]
+    c.put('long', 5, ttl=0.5)
+    c.put('newer', 6)
+    assert [c.contains_key('long'), c.evictions, c.expirations] == [True, 1, 1]
+    now[0] = 3.0
+    c.put('newest', 7)
+    assert [c.contains_key('long'), c.evictions, c.expirations] == [False, 1, 2]
+
+    c = HashMapCache(max_entries=1, ttl=0)
+    c.put('a', 1)
+    c.put('b', 2)
+    assert [c.evictions, c.expirations] == [0, 1]
+
+
+# ------------------- Batch hashing ---------------------------------------- #
+
+
+BATCH_KEYS = ['', 'a', 'ab', 'ba', '\x00a\x00', 'caf\u00e9', '\U0001F600 key'] + \
+             ['str' + str(i) for i in range(100)]
+
+
+def test_hash_batch():
+    """
+    Checks that the batch hash returns exactly the scalar hash values.
+    """
+    hashes_1, hashes_2 = hash_batch.hash_batch(BATCH_KEYS)
+    assert hashes_1 == [hash_function_1(key) for key in BATCH_KEYS]
+    assert hashes_2 == [hash_function_2(key) for key in BATCH_KEYS]
+    assert hash_batch.hash_batch([]) == ([], [])
+
+
+def test_hash_batch_chunks(monkeypatch):
+    """
+    Checks that chunks stay within CHUNK_SIZE keys and CHUNK_CODE_POINTS
+    code points, except for a key that is longer on its own, and that
+    chunking does not change the hash values.
+    """
+    pytest.importorskip('numpy')
+    monkeypatch.setattr(hash_batch, 'CHUNK_SIZE', 3)
+    monkeypatch.setattr(hash_batch, 'CHUNK_CODE_POINTS', 8)
+    keys = BATCH_KEYS[:20] + ['x' * 20000] + BATCH_KEYS[20:]
+    chunks = [chunk for chunk, lengths in hash_batch._chunks(keys)]
+    assert [key for chunk in chunks for key in chunk] == keys
+    assert all(len(chunk) <= 3 for chunk in chunks)
+    assert all(sum(map(len, chunk)) <= 8 or len(chunk) == 1 for chunk in chunks)
+    assert ['x' * 20000] in chunks
+
+    hashes_1, hashes_2 = hash_batch.hash_batch(keys)
+    assert hashes_1 == [hash_function_1(key) for key in keys]
+    assert hashes_2 == [hash_function_2(key) for key in keys]
+
+
+def test_hash_batch_without_numpy(monkeypatch):
+    """
+    Checks that the scalar fallback is used when NumPy is not installed.
+    """
+    monkeypatch.setattr(hash_batch, 'np', None)
+    hashes_1, hashes_2 = hash_batch.hash_batch(BATCH_KEYS)
+    assert hashes_1 == [hash_function_1(key) for key in BATCH_KEYS]
+    assert hashes_2 == [hash_function_2(key) for key in BATCH_KEYS]
+
+
+def test_hash_many():
+    """
+    Checks batch hashing with the given hash functions and with any other
+    function, which is applied one key at a time.
+    """
+    for function in (hash_function_1, hash_function_2, len):
+        assert hash_batch.hash_many(function, BATCH_KEYS) == [function(key) for key in BATCH_KEYS]
+    assert HashMapOA(11, hash_function_2)._hash_keys(BATCH_KEYS) == hash_batch.hash_batch(BATCH_KEYS)[1]
+
+# ------------------- Seeded hash functions -------------------------------- #
+
+
+def test_xxhash64():
+    """
+    Checks xxhash64() against published XXH64 values, including keys long
+    enough to use the 32-byte stripes, and that str, bytes and int keys
+    hash their UTF-8 or little-endian bytes.
+    """
+    assert hash_functions.xxhash64(b'') == 0xEF46DB3751D8E999
+    assert hash_functions.xxhash64(b'a') == 0xD24EC4F1A98C6E5B
+    assert hash_functions.xxhash64('abc') == 0x44BC2CF5AD770999
+    assert hash_functions.xxhash64(b'abc', 1) != hash_functions.xxhash64(b'abc')
+    assert hash_functions.xxhash64(bytes(range(40))) == \
+        hash_functions.xxhash64(bytearray(range(40)))
+    assert hash_functions.xxhash64(258) == hash_functions.xxhash64(b'\x02\x01')
+    assert hash_functions.xxhash64(-1) == hash_functions.xxhash64(b'\xff')
+
+
+def test_siphash24():
+    """
+    Checks siphash24() against the test vectors from the SipHash paper.
+    """
+    seed = int.from_bytes(bytes(range(16)), 'little')
+    assert hash_functions.siphash24(b'', seed) == 0x726FDB47DD0E0E31
+    assert hash_functions.siphash24(bytes(range(15)), seed) == 0xA129CA6149BE45E5
+
+
+def test_seeded_hash_maps():
+    """
+    Checks that a map given the name of a seeded hash function draws its
+    own seed, that a given seed is reused, and that the maps still work.
+    """
+    keys = ['str' + str(i) for i in range(200)]
+    for map_class in (HashMapSC, HashMapOA):
+        first = map_class(11, 'xxhash64')
+        second = map_class(11, 'xxhash64')
+        assert first._hash_function.seed != second._hash_function.seed
+
+        m = map_class(11, 'siphash24', seed=7)
+        assert [m._hash_function(key) for key in keys] == \
+            [hash_functions.siphash24(key, 7) for key in keys]
+        m.put_many((key, key) for key in keys)
+        m.remove('str0')
+        assert m.get_size() == 199
+        assert list(m.get_many(keys[:3])) == [None, 'str1', 'str2']
+
+
+def test_seeded_from_pairs():
+    """
+    Checks that from_pairs() passes its seed on, so that a map it builds
+    can be rebuilt with the same hashes, and that a seed given with a
+    callable hash function is an error.
+    """
+    pairs = [('str' + str(i), i) for i in range(100)]
+    for map_class in (HashMapSC, HashMapOA):
+        first = map_class.from_pairs(pairs, function='xxhash64', seed=3)
+        second = map_class.from_pairs(pairs, function='xxhash64', seed=3)
+        assert first._hash_function.seed == second._hash_function.seed == 3
+        assert str(first) == str(second)
+
+        with pytest.raises(ValueError):
+            map_class.from_pairs(pairs, seed=3)
+        with pytest.raises(ValueError):
+            map_class(11, hash_function_1, seed=3)
+
+    with pytest.raises(ValueError):
+        hash_functions.resolve(hash_function_1, 0)
+    assert hash_functions.resolve(hash_function_1) is hash_function_1
+
+
+# ------------------- Capacity planning ------------------------------------ #
+
+
+def test_is_prime():
+    """
+    Compares is_prime() against trial division, inside and above the
+    precomputed prime table.
+    """
+    def trial_division(n):
+        return n > 1 and all(n % factor for factor in range(2, int(n ** 0.5) + 1))
+
+    for n in list(range(-2, 2000)) + list(range(capacity.TABLE_LIMIT - 50, capacity.TABLE_LIMIT + 2000)):
+        assert capacity.is_prime(n) == trial_division(n)
+    assert capacity.is_prime(2 ** 31 - 1)
+    assert not capacity.is_prime(3215031751)
+
+
+def test_next_prime():
+    """
+    Checks that next_prime() returns the smallest odd prime at or above the
+    requested capacity.
+    """
+    assert [capacity.next_prime(n) for n in range(0, 12)] == [3, 3, 3, 3, 5, 5, 7, 7, 11, 11, 11, 11]
+    assert capacity.next_prime(106) == 107
+    assert capacity.next_prime(65530) == 65537
+    assert capacity.next_prime(2 ** 31) == 2147483659
+
+
+def test_insert_action():
+    """
+    Checks when an open addressing table grows, compacts or does nothing
+    before taking a new key.
+    """
+    act = capacity.insert_action
+    assert [act(11, 5, 0, 0.5, 0.2), act(11, 6, 0, 0.5, 0.2), act(11, 2, 4, 0.5, 0.2)] == \
+        [capacity.KEEP, capacity.GROW, capacity.COMPACT]
+    assert [act(100, 20, 20, 0.5, 0.2), act(100, 20, 21, 0.5, 0.2)] == [capacity.KEEP, capacity.COMPACT]
+    for cap in (3, 11, 64, 101):
+        full_at, compact_at = capacity.insert_limits(cap, 0.5, 0.2)
+        for size in range(cap):
+            for tombstones in range(cap - size):
+                below = size + tombstones < full_at and tombstones <= compact_at
+                assert below == (act(cap, size, tombstones, 0.5, 0.2) == capacity.KEEP)
+
+
+# ------------------- Snapshots -------------------------------------------- #
+
+
+def test_save_load(tmp_path, monkeypatch):
+    """
+    Saves maps in several chunks, including one in the middle of a resize,
+    and checks that load() restores size, capacity, options and pairs
+    without putting keys. Only the keys of the first chunk are hashed, to
+    check the cached hashes.
+    """
+    monkeypatch.setattr('snapshot.CHUNK_SIZE', 7)
+    calls = []
+
+    def counting_hash(key):
+        calls.append(key)
+        return hash_function_2(key)
+
+    path = str(tmp_path / 'map')
+    pairs = [('str' + str(i), i) for i in range(100)]
+    for map_class in (HashMapSC, HashMapOA, HashMapRH):
+        m = map_class(11, counting_hash, migrate_step=1)
+        for key, value in pairs:
+            m.put(key, value)
+        m.remove('str0')
+        assert m._old_buckets is not None
+        m.save(path)
+
+        calls.clear()
+        loaded = map_class.load(path, counting_hash)
+        assert len(calls) == 7
+        assert [loaded.get_size(), loaded.get_capacity(), loaded._migrate_step] == [99, m.get_capacity(), 1]
+        assert sorted(loaded.get_keys_and_values()) == sorted(pairs[1:])
+        loaded.put('str0', 0)
+        assert loaded.get('str0') == 0 and loaded.get('str99') == 99
+        assert all(loaded.get(key) == value for key, value in pairs)
+        loaded.remove_many(key for key, value in pairs[:50])
+        assert sorted(loaded.get_keys_and_values()) == sorted(pairs[50:])
+
+
+def test_load_rehashes(tmp_path):
+    """
+    Checks that keys are hashed again when a snapshot is loaded with a
+    different hash function, and that a seeded function keeps its seed.
+    """
+    path = str(tmp_path / 'map')
+    keys = ['abc', 'acb', 'bac', 'bca', 'cab', 'cba', 'str1', 'str2', 'str3'] * 2
+    for map_class in (HashMapSC, HashMapOA):
+        m = map_class(11, hash_function_1)
+        m.put_many((key, key) for key in keys)
+        m.save(path)
+        loaded = map_class.load(path, hash_function_2)
+        assert all(loaded.get(key) == key for key in keys)
+        assert loaded.get_size() == 9
+
+        m = map_class(11, 'siphash24')
+        m.put_many((key, key) for key in keys)
+        m.save(path)
+        loaded = map_class.load(path, 'siphash24')
+        assert loaded._hash_function.seed == m._hash_function.seed
+        assert all(loaded.get(key) == key for key in keys)
+
+    HashMapSC(11, hash_function_1).save(path)
+    with pytest.raises(ValueError):
+        HashMapOA.load(path)
+    assert HashMapSC.load(path).get_size() == 0
+
+
+# ------------------- Instrumentation -------------------------------------- #
+
+
+def test_instrumented_sc():
+    """
+    Checks the probe counts, resize count and table shape reported by an
+    instrumented HashMapSC, and that every anagram collides under
+    hash_function_1.
+    """
+    m = InstrumentedHashMapSC(11, hash_function_1)
+    for key in ('abc', 'acb', 'bac', 'bca', 'cab', 'cba'):
+        m.put(key, key)
+    m.get('cba')
+    m.get('abc')
+    m.get('xyz')
+    m.remove('bac')
+    snapshot = m.snapshot()
+    assert snapshot['operations']['put']['probe_lengths'] == [1, 1, 1, 1, 1, 1]
+    assert snapshot['operations']['get']['probe_lengths'] == [1, 1, 0, 0, 0, 0, 1]
+    assert snapshot['operations']['remove'] == {'count': 1, 'probes': 4, 'mean_probes': 4.0,
+                                                'max_probes': 4, 'probe_lengths': [0, 0, 0, 0, 1]}
+    assert [snapshot['size'], snapshot['capacity'], snapshot['chain_lengths']] == [5, 11, [10, 0, 0, 0, 0, 1]]
+    assert snapshot['collision_rate'] == snapshot['hash_collision_rate'] == 0.8
+
+    m.resize_table(50)
+    assert m.metrics.to_dict()['resizes']['count'] == 1
+    assert json.loads(m.to_json())['chain_lengths'] == [52, 0, 0, 0, 0, 1]
+
+
+def test_instrumented_oa():
+    """
+    Checks the probe counts, tombstones and probe distances reported by an
+    instrumented HashMapOA.
+    """
+    m = InstrumentedHashMapOA(11, hash_function_1)
+    for key in ('abc', 'acb', 'bac', 'xyz'):
+        m.put(key, key)
+    m.get('bac')
+    m.remove('abc')
+    snapshot = m.snapshot()
+    assert snapshot['operations']['put']['probe_lengths'] == [0, 2, 1, 1]
+    assert snapshot['operations']['get']['probe_lengths'] == [0, 0, 0, 1]
+    assert [snapshot['size'], snapshot['tombstones']] == [3, 1]
+    assert snapshot['probe_distances'] == [1, 1, 1]
+    assert round(snapshot['hash_collision_rate'], 2) == 0.33
+
+    for i in range(20):
+        m.put('str' + str(i), i)
+    resizes = m.snapshot()['resizes']
+    assert resizes['count'] == 2
+    assert 0 < resizes['max_seconds'] <= resizes['seconds']
+    assert m.get_capacity() == 47
+
@@ -0,0 +1,502 @@
+# This file implements a bounded cache on top of HashMapSC. The map holds a
+# CacheEntry per key, and the entries are also threaded onto doubly linked
+# lists owned by an eviction policy, so that a hit or an eviction changes a
+# few links instead of searching anything. The cache is bounded by a number
+# of entries, a byte budget or both, entries can expire after a TTL, and
+# hits, misses, evictions and expirations are counted. Expired entries are
+# dropped when they are looked up, or before any live entry is evicted.
+
+import sys
+import time
+
+from hash_map_sc import HashMapSC
+
+
+class CacheEntry:
+    """
+    Cached key-value pair, linked into the list of its eviction policy
+    """
+
+    __slots__ = ('key', 'value', 'size', 'expires', 'prev', 'next', 'frequency', 'visited',
+                 'ttl', 'sooner', 'later')
+
+    def __init__(self, key: str, value: object, size: int, expires: float) -> None:
+        """Initialize an unlinked entry."""
+        self.key = key
+        self.value = value
+        self.size = size
+        self.expires = expires
+        self.prev = None
+        self.next = None
+        self.frequency = None
+        self.visited = False
+        self.ttl = None
+        self.sooner = None
+        self.later = None
+
+
+class ExpiryLists:
+    """
+    Entries that expire, in one list per TTL. The clock only moves forward,
+    so each list is in order of expiry, and the entry that expires first
+    is at the front of one of them. Finding it takes one look per TTL in
+    use, and lists are dropped once they are empty.
+    """
+
+    __slots__ = ('_lists',)
+
+    def __init__(self) -> None:
+        """Initialize with no entries."""
+        self._lists = {}
+
+    def push(self, entry: CacheEntry, ttl: float) -> None:
+        """Link the entry at the back of the list for its TTL."""
+        sentinel = self._lists.get(ttl)
+        if sentinel is None:
+            sentinel = self._lists[ttl] = CacheEntry(None, None, 0, None)
+            sentinel.sooner = sentinel.later = sentinel
+        entry.ttl = ttl
+        entry.sooner, entry.later = sentinel.sooner, sentinel
+        sentinel.sooner.later = entry
+        sentinel.sooner = entry
+
+    def unlink(self, entry: CacheEntry) -> None:
+        """Remove the entry from its list."""
+        entry.sooner.later = entry.later
+        entry.later.sooner = entry.sooner
+        if entry.sooner is entry.later:
+            # Only the sentinel is left
+            del self._lists[entry.ttl]
+        entry.sooner = entry.later = None
+
+    def __bool__(self) -> bool:
+        """Return True if any entry expires."""
+        return bool(self._lists)
+
+    def expired(self, now: float) -> CacheEntry:
+        """Return an entry that has expired by now, or None."""
+        for sentinel in self._lists.values():
+            if sentinel.later.expires <= now:
+                return sentinel.later
+        return
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        self._lists = {}
+
+
+class EntryList:
+    """
+    Doubly linked list of CacheEntry objects around a sentinel, newest at
+    the front
+    """
+
+    __slots__ = ('_sentinel', '_size')
+
+    def __init__(self) -> None:
+        """Initialize an empty list."""
+        self._sentinel = CacheEntry(None, None, 0, None)
+        self._sentinel.prev = self._sentinel.next = self._sentinel
+        self._size = 0
+
+    def push_front(self, entry: CacheEntry) -> None:
+        """Link the entry at the front of the list."""
+        sentinel = self._sentinel
+        entry.prev, entry.next = sentinel, sentinel.next
+        sentinel.next.prev = entry
+        sentinel.next = entry
+        self._size += 1
+
+    def unlink(self, entry: CacheEntry) -> None:
+        """Remove the entry from the list."""
+        entry.prev.next = entry.next
+        entry.next.prev = entry.prev
+        entry.prev = entry.next = None
+        self._size -= 1
+
+    def newer(self, entry: CacheEntry) -> CacheEntry:
+        """Return the entry in front of the given one, or None."""
+        entry = entry.prev
+        return None if entry is self._sentinel else entry
+
+    def back(self) -> CacheEntry:
+        """Return the oldest entry, or None if the list is empty."""
+        entry = self._sentinel.prev
+        return None if entry is self._sentinel else entry
+
+    def length(self) -> int:
+        """Return the number of entries in the list."""
+        return self._size
+
+
+class LRUPolicy:
+    """
+    Evicts the least recently used entry. Every hit moves its entry to the
+    front of one list, and the victim is at the back.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty policy."""
+        self.clear()
+
+    def clear(self) -> None:
+        """Stop tracking every entry."""
+        self._entries = EntryList()
+
+    def insert(self, entry: CacheEntry) -> None:
+        """Track a new entry."""
+        self._entries.push_front(entry)
+
+    def touch(self, entry: CacheEntry) -> None:
+        """Record a hit on the entry."""
+        self._entries.unlink(entry)
+        self._entries.push_front(entry)
+
+    def remove(self, entry: CacheEntry) -> None:
+        """Stop tracking the entry."""
+        self._entries.unlink(entry)
+
+    def victim(self) -> CacheEntry:
+        """Return the entry to evict next."""
+        return self._entries.back()
+
+
+class FrequencyNode:
+    """
+    Entries used the same number of times, in a list of such groups sorted
+    by use count
+    """
+
+    __slots__ = ('count', 'entries', 'prev', 'next')
+
+    def __init__(self, count: int) -> None:
+        """Initialize an unlinked group with no entries."""
+        self.count = count
+        self.entries = EntryList()
+        self.prev = None
+        self.next = None
+
+
+class LFUPolicy:
+    """
+    Evicts the least frequently used entry, and the least recently used
+    one among entries with the same count. Each entry points at the group
+    of entries with its use count, and the groups form a list sorted by
+    count, so a hit moves the entry to the next group, created if needed,
+    and the victim is the oldest entry of the first group.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty policy."""
+        self.clear()
+
+    def clear(self) -> None:
+        """Stop tracking every entry."""
+        self._head = FrequencyNode(0)
+        self._head.prev = self._head.next = self._head
+
+    def _group_after(self, node: FrequencyNode, count: int) -> FrequencyNode:
+        """Return the group for count, which follows node, creating it."""
+        if node.next.count == count:
+            return node.next
+        group = FrequencyNode(count)
+        group.prev, group.next = node, node.next
+        node.next.prev = group
+        node.next = group
+        return group
+
+    def _unlink(self, entry: CacheEntry) -> None:
+        """Unlink the entry from its group, dropping the group if empty."""
+        node = entry.frequency
+        node.entries.unlink(entry)
+        if not node.entries.length():
+            node.prev.next = node.next
+            node.next.prev = node.prev
+        entry.frequency = None
+
+    def insert(self, entry: CacheEntry) -> None:
+        """Track a new entry, used once."""
+        entry.frequency = self._group_after(self._head, 1)
+        entry.frequency.entries.push_front(entry)
+
+    def touch(self, entry: CacheEntry) -> None:
+        """Record a hit on the entry."""
+        node = entry.frequency
+        group = self._group_after(node, node.count + 1)
+        self._unlink(entry)
+        entry.frequency = group
+        group.entries.push_front(entry)
+
+    def remove(self, entry: CacheEntry) -> None:
+        """Stop tracking the entry."""
+        self._unlink(entry)
+
+    def victim(self) -> CacheEntry:
+        """Return the entry to evict next."""
+        return self._head.next.entries.back()
+
+
+class SievePolicy:
+    """
+    SIEVE, a CLOCK variant: entries stay in insertion order and a hit only
+    marks its entry as visited. A hand moves from the oldest entry towards
+    the newest, clearing marks, and evicts the first entry that is not
+    marked, then stays there for the next eviction.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty policy."""
+        self.clear()
+
+    def clear(self) -> None:
+        """Stop tracking every entry."""
+        self._entries = EntryList()
+        self._hand = None
+
+    def insert(self, entry: CacheEntry) -> None:
+        """Track a new entry."""
+        entry.visited = False
+        self._entries.push_front(entry)
+
+    def touch(self, entry: CacheEntry) -> None:
+        """Record a hit on the entry."""
+        entry.visited = True
+
+    def remove(self, entry: CacheEntry) -> None:
+        """Stop tracking the entry."""
+        if self._hand is entry:
+            self._hand = self._entries.newer(entry)
+        self._entries.unlink(entry)
+
+    def victim(self) -> CacheEntry:
+        """Return the entry to evict next, clearing marks on the way."""
+        entry = self._hand or self._entries.back()
+        while entry is not None and entry.visited:
+            entry.visited = False
+            entry = self._entries.newer(entry) or self._entries.back()
+        self._hand = entry
+        return entry
+
+
+# Eviction policies by name
+POLICIES = {
+    'lru': LRUPolicy,
+    'lfu': LFUPolicy,
+    'sieve': SievePolicy,
+}
+
+
+class HashMapCache:
+    def __init__(self, max_entries: int = None, max_bytes: int = None, policy='lru',
+                 ttl: float = None, function: callable = hash,
+                 sizeof: callable = sys.getsizeof, clock: callable = time.monotonic,
+                 seed: int = None) -> None:
+        """
+        Initialize new cache that holds at most max_entries entries and at
+        most max_bytes bytes of keys and values, as measured by sizeof, and
+        evicts entries with the given policy to stay within both. Either
+        bound may be None. Entries expire ttl seconds after they are put,
+        as measured by clock, unless put() is given its own ttl.
+        Args:
+            max_entries: Most entries held, or None
+            max_bytes: Most bytes of keys and values held, or None
+            policy: Key of POLICIES, or an object with the methods of LRUPolicy
+            ttl: Default seconds an entry lives, or None to keep it
+            function: Hash function, or the name of a seeded hash function.
+                The builtin hash spreads keys evenly enough for short chains
+            sizeof: Returns the size in bytes of a key or value
+            clock: Returns the current time in seconds
+            seed: Seed for a seeded hash function
+        """
+        if max_entries is None and max_bytes is None:
+            raise ValueError('a cache needs max_entries, max_bytes or both')
+        if max_entries is not None and max_entries < 1:
+            raise ValueError('max_entries must be at least 1')
+        if max_bytes is not None and max_bytes < 1:
+            raise ValueError('max_bytes must be at least 1')
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._policy = POLICIES[policy]() if isinstance(policy, str) else policy
+        self._ttl = ttl
+        self._sizeof = sizeof
+        self._clock = clock
+
+        self._map = HashMapSC(function=function, seed=seed)
+        if max_entries is not None:
+            self._map.reserve(max_entries)
+        self._bytes = 0
+        self._expiry = ExpiryLists()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get_size(self) -> int:
+        """
+        Return number of entries in the cache, including expired entries
+        that have not been looked up since they expired
+        """
+        return self._map.get_size()
+
+    def get_bytes(self) -> int:
+        """
+        Return bytes of keys and values in the cache
+        """
+        return self._bytes
+
+    def stats(self) -> dict:
+        """
+        Returns the counters, the hit ratio and the size of the cache.
+        Returns:
+            dict of numbers
+        """
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'size': self.get_size(),
+            'bytes': self._bytes,
+        }
+
+    # ------------------------------------------------------------------ #
+
+    def _live(self, key: str) -> CacheEntry:
+        """
+        Returns the entry for the given key, or None if there is none or it
+        has expired, in which case it is dropped.
+        """
+        entry = self._map.get(key)
+        if entry is not None and entry.expires is not None and entry.expires <= self._clock():
+            self._drop(entry)
+            self.expirations += 1
+            return
+        return entry
+
+    def _drop(self, entry: CacheEntry) -> None:
+        """
+        Removes the given entry from the map, the policy and the expiry
+        lists.
+        """
+        self._policy.remove(entry)
+        if entry.expires is not None:
+            self._expiry.unlink(entry)
+        self._map.remove(entry.key)
+        self._bytes -= entry.size
+
+    def get(self, key: str) -> object:
+        """
+        Returns the value cached for the given key, else None, and counts a
+        hit or a miss.
+        Args:
+            key: Key to find
+        Returns:
+            Value if key cached, else None
+        """
+        entry = self._live(key)
+        if entry is None:
+            self.misses += 1
+            return
+        self.hits += 1
+        self._policy.touch(entry)
+        return entry.value
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Returns True if the given key is cached and has not expired. Does
+        not count as a use of the entry.
+        Args:
+            key: Key to find
+        Returns:
+            bool: True if found, else False
+        """
+        return self._live(key) is not None
+
+    def _make_room(self, entries: int, size: int) -> None:
+        """
+        Drops entries until the given number of entries of the given total
+        size fit within the bounds. Expired entries are dropped first, and
+        counted as expirations; after that the policy picks live entries
+        to evict.
+        """
+        now = None
+        while ((self._max_entries is not None and self._map.get_size() + entries > self._max_entries) or
+               (self._max_bytes is not None and self._bytes + size > self._max_bytes)):
+            entry = None
+            if self._expiry:
+                if now is None:
+                    now = self._clock()
+                entry = self._expiry.expired(now)
+            if entry is not None:
+                self._drop(entry)
+                self.expirations += 1
+            else:
+                self._drop(self._policy.victim())
+                self.evictions += 1
+
+    def put(self, key: str, value: object, ttl: float = None) -> None:
+        """
+        Caches the value for the given key, evicting entries until it fits.
+        If the key is already cached, its value and expiry are replaced and
+        the put counts as a use of the entry. A key and value larger than
+        max_bytes on their own are not cached.
+        Args:
+            key
+            value
+            ttl: Seconds the entry lives, the cache's ttl if None
+        Returns:
+            None
+        """
+        ttl = self._ttl if ttl is None else ttl
+        expires = None if ttl is None else self._clock() + ttl
+        size = self._sizeof(key) + self._sizeof(value) if self._max_bytes is not None else 0
+
+        entry = self._map.get(key)
+        if self._max_bytes is not None and size > self._max_bytes:
+            if entry is not None:
+                self._drop(entry)
+            return
+
+        if entry is not None:
+            self._bytes += size - entry.size
+            if entry.expires is not None:
+                self._expiry.unlink(entry)
+            entry.value, entry.size, entry.expires = value, size, expires
+            if expires is not None:
+                self._expiry.push(entry, ttl)
+            self._policy.touch(entry)
+            self._make_room(0, 0)
+            return
+
+        self._make_room(1, size)
+        entry = CacheEntry(key, value, size, expires)
+        self._map.put(key, entry)
+        self._policy.insert(entry)
+        if expires is not None:
+            self._expiry.push(entry, ttl)
+        self._bytes += size
+
+    def remove(self, key: str) -> None:
+        """
+        Removes the given key from the cache.
+        If the key does not exist, this method does nothing.
+        Args:
+            key: Key to remove
+        Returns:
+            None
+        """
+        entry = self._map.get(key)
+        if entry is not None:
+            self._drop(entry)
+
+    def clear(self) -> None:
+        """
+        Removes every entry. The counters are kept.
+        """
+        self._map.clear()
+        self._policy.clear()
+        self._expiry.clear()
+        self._bytes = 0
@@ -0,0 +1,215 @@
+# This file implements capacity planning shared by the HashMap classes.
+# Prime capacities are found with a precomputed table of small primes and
+# a deterministic Miller-Rabin test for anything above the table.
+
+from bisect import bisect_left
+
+# What insert_action() tells a table to do before it takes a new key
+KEEP = 0
+GROW = 1
+COMPACT = 2
+
+# Every prime below this bound is precomputed
+TABLE_LIMIT = 2 ** 16
+
+# Miller-Rabin with the given bases is exact for every n below the bound
+WITNESSES = (
+    (3215031751, (2, 3, 5, 7)),
+    (3474749660383, (2, 3, 5, 7, 11, 13)),
+    (341550071728321, (2, 3, 5, 7, 11, 13, 17)),
+    (3825123056546413051, (2, 3, 5, 7, 11, 13, 17, 19, 23)),
+    (318665857834031151167461, (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37)),
+)
+
+
+def _sieve(limit: int) -> list:
+    """
+    Returns every prime below limit using the Sieve of Eratosthenes.
+    """
+    is_composite = bytearray(limit)
+    primes = []
+    for n in range(2, limit):
+        if not is_composite[n]:
+            primes.append(n)
+            is_composite[n * n::n] = b'\x01' * len(range(n * n, limit, n))
+    return primes
+
+
+PRIMES = _sieve(TABLE_LIMIT)
+
+# Primes tried as factors before running Miller-Rabin
+SMALL_PRIMES = PRIMES[:64]
+
+
+def _miller_rabin(n: int) -> bool:
+    """
+    Deterministic Miller-Rabin primality test for odd n > 37. Falls back
+    to probable-prime testing with the largest witness set above
+    3.3 * 10 ** 24, far beyond any table capacity.
+    """
+    d, s = n - 1, 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+
+    for bound, bases in WITNESSES:
+        if n < bound:
+            break
+
+    for a in bases:
+        x = pow(a, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def is_prime(n: int) -> bool:
+    """
+    Determine if given integer is a prime number and return boolean
+    Args:
+        n: Integer to test
+    Returns:
+        bool: True if n is prime, else False
+    """
+    if n < TABLE_LIMIT:
+        idx = bisect_left(PRIMES, n)
+        return idx < len(PRIMES) and PRIMES[idx] == n
+
+    # Most composites have a small factor, which is cheaper to find than
+    # running Miller-Rabin
+    for factor in SMALL_PRIMES:
+        if n % factor == 0:
+            return False
+    return _miller_rabin(n)
+
+
+def next_prime(capacity: int) -> int:
+    """
+    Returns the smallest odd prime greater than or equal to the given
+    capacity.
+    Args:
+        capacity: Requested capacity
+    Returns:
+        Prime capacity
+    """
+    if capacity <= PRIMES[-1]:
+        return PRIMES[bisect_left(PRIMES, max(capacity, 3))]
+
+    if capacity % 2 == 0:
+        capacity += 1
+    while not is_prime(capacity):
+        capacity += 2
+    return capacity
+
+
+def next_power_of_two(capacity: int) -> int:
+    """
+    Returns the smallest power of two greater than or equal to the given
+    capacity.
+    Args:
+        capacity: Requested capacity
+    Returns:
+        Power of two capacity
+    """
+    return 1 << max(capacity - 1, 0).bit_length()
+
+
+def grown_capacity(capacity: int, size: int, load_limit: float,
+                   next_capacity: callable = next_prime) -> int:
+    """
+    Returns the capacity a table of the given capacity ends up with after
+    growing to hold size elements one put() at a time, doubling to the next
+    valid capacity whenever the load factor reaches load_limit.
+    Args:
+        capacity: Starting capacity
+        size: Number of elements
+        load_limit: Load factor at which put() resizes
+        next_capacity: Rounds a capacity up to a valid one
+    Returns:
+        Capacity after doubling until the load limit is respected
+    """
+    while size and round((size - 1) / capacity, 2) >= load_limit:
+        capacity = next_capacity(2 * capacity)
+    return capacity
+
+
+def fill_limit(capacity: int, load_limit: float) -> int:
+    """
+    Returns the smallest size at which put() would resize a table of the
+    given capacity.
+    Args:
+        capacity: Table capacity
+        load_limit: Load factor at which put() resizes
+    Returns:
+        Size
+    """
+    size = max(0, int(capacity * (load_limit - 0.005)) - 2)
+    while round(size / capacity, 2) < load_limit:
+        size += 1
+    return size
+
+
+def insert_action(capacity: int, size: int, tombstones: int, load_limit: float,
+                  tombstone_ratio: float) -> int:
+    """
+    Returns what an open addressing table must do before it takes a new
+    key. Tombstones count towards the load, since probes still walk them.
+    At the load limit the table grows if its live entries fill at least
+    half of the limit, and is compacted in place otherwise. Below the limit
+    it is compacted once tombstones fill more than tombstone_ratio of it.
+    Args:
+        capacity: Table capacity
+        size: Number of live entries
+        tombstones: Number of tombstones
+        load_limit: Load factor at which put() resizes
+        tombstone_ratio: Share of the table that tombstones may fill
+    Returns:
+        KEEP, GROW or COMPACT
+    """
+    if round((size + tombstones) / capacity, 2) >= load_limit:
+        if round(size / capacity, 2) >= load_limit / 2:
+            return GROW
+        return COMPACT
+    if tombstones > tombstone_ratio * capacity:
+        return COMPACT
+    return KEEP
+
+
+def insert_limits(capacity: int, load_limit: float, tombstone_ratio: float) -> tuple:
+    """
+    Returns the limits below which insert_action() always returns KEEP for
+    a table of the given capacity, so that tables only call it once live
+    entries and tombstones together reach the first limit, or tombstones
+    alone pass the second.
+    Args:
+        capacity: Table capacity
+        load_limit: Load factor at which put() resizes
+        tombstone_ratio: Share of the table that tombstones may fill
+    Returns:
+        (used slots, tombstones)
+    """
+    return fill_limit(capacity, load_limit), int(tombstone_ratio * capacity)
+
+
+def reserved_capacity(size: int, load_limit: float,
+                      next_capacity: callable = next_prime) -> int:
+    """
+    Returns the smallest valid capacity that holds the given number of
+    elements without put() resizing.
+    Args:
+        size: Number of elements
+        load_limit: Load factor at which put() resizes
+        next_capacity: Rounds a capacity up to a valid one
+    Returns:
+        Capacity
+    """
+    capacity = next_capacity(int(max(size - 1, 0) / (load_limit - 0.005)))
+    while fill_limit(capacity, load_limit) < size:
+        capacity = next_capacity(capacity + 1)
+    return capacity
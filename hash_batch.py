@@ -0,0 +1,125 @@
+# This file implements batch versions of the given hash functions.
+# When NumPy is installed, a batch of string keys is encoded into one flat
+# array of code points, and both hash functions are computed for every key
+# in one vectorized pass with np.add.reduceat over each key's run of code
+# points. Without NumPy the scalar functions are used.
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from GIVEN_DATA_STRUCTURES import (hash_function_1, hash_function_2)
+
+# Most keys hashed per chunk
+CHUNK_SIZE = 8192
+
+# Most code points per chunk, so that a batch never needs more than a few
+# int64 arrays of this length on top of the keys themselves. A longer key
+# gets a chunk of its own.
+CHUNK_CODE_POINTS = 2 ** 20
+
+# Longest key the int64 position-weighted sum can hold without overflowing
+MAX_KEY_LENGTH = 2 ** 21
+
+
+def _vectorizable(keys: list) -> bool:
+    """
+    Returns True if the vectorized path gives exactly the scalar results
+    for the given keys.
+    """
+    if np is None:
+        return False
+    for key in keys:
+        if type(key) is not str or len(key) > MAX_KEY_LENGTH:
+            return False
+    return True
+
+
+def _chunks(keys: list):
+    """
+    Yields (keys, lengths) for runs of consecutive keys of at most
+    CHUNK_SIZE keys and, unless a single key is longer, CHUNK_CODE_POINTS
+    code points.
+    """
+    lengths = np.fromiter(map(len, keys), dtype=np.int64, count=len(keys))
+    ends = np.cumsum(lengths)
+    start = 0
+    while start < len(keys):
+        # Last key whose end stays within the budget, counted from start
+        budget = (ends[start - 1] if start else 0) + CHUNK_CODE_POINTS
+        end = int(np.searchsorted(ends, budget, side='right'))
+        end = min(max(end, start + 1), start + CHUNK_SIZE)
+        yield keys[start:end], lengths[start:end]
+        start = end
+
+
+def _chunk_hashes(keys: list, lengths) -> tuple:
+    """
+    Returns NumPy arrays of the hash_function_1 and hash_function_2 values
+    of the given keys. The keys' code points are laid end to end, and each
+    key's sums are taken over its own run, weighted by position within the
+    key for hash_function_2. Empty keys hash to 0.
+    Args:
+        keys: List of strings
+        lengths: int64 array of the keys' lengths
+    Returns:
+        tuple: (int64 array, int64 array)
+    """
+    code_points = np.frombuffer(''.join(keys).encode('utf-32-le', 'surrogatepass'),
+                                dtype=np.uint32).astype(np.int64)
+    starts = np.cumsum(lengths) - lengths
+    positions = np.arange(1, len(code_points) + 1, dtype=np.int64) - np.repeat(starts, lengths)
+
+    # reduceat() returns the element at the start of an empty run, not 0
+    hashes_1 = np.zeros(len(keys), dtype=np.int64)
+    hashes_2 = np.zeros(len(keys), dtype=np.int64)
+    filled = lengths > 0
+    if filled.any():
+        hashes_1[filled] = np.add.reduceat(code_points, starts[filled])
+        hashes_2[filled] = np.add.reduceat(code_points * positions, starts[filled])
+    return hashes_1, hashes_2
+
+
+def hash_batch(keys) -> tuple[list, list]:
+    """
+    Computes hash_function_1 and hash_function_2 for a batch of keys.
+    Returns exactly the same integers as calling the scalar functions on
+    each key.
+    Args:
+        keys: Iterable of string keys
+    Returns:
+        tuple: (list of hash_function_1 values, list of hash_function_2 values)
+    """
+    keys = list(keys)
+    if not _vectorizable(keys):
+        return ([hash_function_1(key) for key in keys],
+                [hash_function_2(key) for key in keys])
+
+    hashes_1, hashes_2 = [], []
+    for chunk, lengths in _chunks(keys):
+        chunk_1, chunk_2 = _chunk_hashes(chunk, lengths)
+        hashes_1.extend(chunk_1.tolist())
+        hashes_2.extend(chunk_2.tolist())
+    return hashes_1, hashes_2
+
+
+def hash_many(function: callable, keys) -> list:
+    """
+    Hashes a batch of keys with the given hash function, using the
+    vectorized path when it is one of the given hash functions.
+    Args:
+        function: Scalar hash function
+        keys: Iterable of keys
+    Returns:
+        List of hash values in input order
+    """
+    keys = list(keys)
+    if function not in (hash_function_1, hash_function_2) or not _vectorizable(keys):
+        return [function(key) for key in keys]
+
+    hashes = []
+    which = 0 if function is hash_function_1 else 1
+    for chunk, lengths in _chunks(keys):
+        hashes.extend(_chunk_hashes(chunk, lengths)[which].tolist())
+    return hashes
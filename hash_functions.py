@@ -0,0 +1,208 @@
+# This file implements seeded hash functions for the HashMap classes.
+# Unlike hash_function_1 and hash_function_2, which add up code points, they
+# spread every input bit over all 64 bits of the result, and a random seed
+# picked per map keeps other processes from precomputing colliding keys.
+# xxhash64 is the faster of the two; siphash24 is keyed with 128 bits and
+# is the one to use when keys may be chosen by an attacker.
+
+import secrets
+from struct import unpack_from
+
+MASK_64 = 0xFFFFFFFFFFFFFFFF
+
+# xxHash64 primes
+PRIME_1 = 0x9E3779B185EBCA87
+PRIME_2 = 0xC2B2AE3D27D4EB4F
+PRIME_3 = 0x165667B19E3779F9
+PRIME_4 = 0x85EBCA77C2B2AE63
+PRIME_5 = 0x27D4EB2F165667C5
+
+
+def key_bytes(key) -> bytes:
+    """
+    Returns the bytes that are hashed for the given key. Strings are
+    encoded as UTF-8 and integers as signed little-endian bytes.
+    Args:
+        key: str, bytes-like or int key
+    Returns:
+        bytes
+    """
+    if isinstance(key, str):
+        return key.encode('utf-8', 'surrogatepass')
+    if isinstance(key, int):
+        return key.to_bytes(key.bit_length() // 8 + 1, 'little', signed=True)
+    return bytes(key)
+
+
+def _xxh64_round(acc: int, lane: int) -> int:
+    """
+    Mixes one 8-byte lane into an xxHash64 accumulator.
+    """
+    acc = (acc + lane * PRIME_2) & MASK_64
+    acc = ((acc << 31) | (acc >> 33)) & MASK_64
+    return (acc * PRIME_1) & MASK_64
+
+
+def xxhash64(key, seed: int = 0) -> int:
+    """
+    Returns the XXH64 hash of the given key.
+    Args:
+        key: str, bytes-like or int key
+        seed: 64-bit seed
+    Returns:
+        64-bit hash
+    """
+    data = key_bytes(key)
+    length = len(data)
+    seed &= MASK_64
+    idx = 0
+
+    if length >= 32:
+        v1 = (seed + PRIME_1 + PRIME_2) & MASK_64
+        v2 = (seed + PRIME_2) & MASK_64
+        v3 = seed
+        v4 = (seed - PRIME_1) & MASK_64
+        while idx <= length - 32:
+            lane_1, lane_2, lane_3, lane_4 = unpack_from('<4Q', data, idx)
+            v1 = _xxh64_round(v1, lane_1)
+            v2 = _xxh64_round(v2, lane_2)
+            v3 = _xxh64_round(v3, lane_3)
+            v4 = _xxh64_round(v4, lane_4)
+            idx += 32
+
+        hash = (((v1 << 1) | (v1 >> 63)) + ((v2 << 7) | (v2 >> 57)) +
+                ((v3 << 12) | (v3 >> 52)) + ((v4 << 18) | (v4 >> 46))) & MASK_64
+        for v in (v1, v2, v3, v4):
+            hash ^= _xxh64_round(0, v)
+            hash = (hash * PRIME_1 + PRIME_4) & MASK_64
+    else:
+        hash = (seed + PRIME_5) & MASK_64
+
+    hash = (hash + length) & MASK_64
+
+    while idx <= length - 8:
+        hash ^= _xxh64_round(0, unpack_from('<Q', data, idx)[0])
+        hash = ((hash << 27) | (hash >> 37)) & MASK_64
+        hash = (hash * PRIME_1 + PRIME_4) & MASK_64
+        idx += 8
+
+    if idx <= length - 4:
+        hash ^= (unpack_from('<I', data, idx)[0] * PRIME_1) & MASK_64
+        hash = ((hash << 23) | (hash >> 41)) & MASK_64
+        hash = (hash * PRIME_2 + PRIME_3) & MASK_64
+        idx += 4
+
+    while idx < length:
+        hash ^= (data[idx] * PRIME_5) & MASK_64
+        hash = ((hash << 11) | (hash >> 53)) & MASK_64
+        hash = (hash * PRIME_1) & MASK_64
+        idx += 1
+
+    hash ^= hash >> 33
+    hash = (hash * PRIME_2) & MASK_64
+    hash ^= hash >> 29
+    hash = (hash * PRIME_3) & MASK_64
+    hash ^= hash >> 32
+    return hash
+
+
+def _sip_rounds(v0: int, v1: int, v2: int, v3: int, rounds: int) -> tuple:
+    """
+    Runs the given number of SipRounds over the SipHash state.
+    """
+    for _ in range(rounds):
+        v0 = (v0 + v1) & MASK_64
+        v1 = ((v1 << 13) | (v1 >> 51)) & MASK_64
+        v1 ^= v0
+        v0 = ((v0 << 32) | (v0 >> 32)) & MASK_64
+        v2 = (v2 + v3) & MASK_64
+        v3 = ((v3 << 16) | (v3 >> 48)) & MASK_64
+        v3 ^= v2
+        v0 = (v0 + v3) & MASK_64
+        v3 = ((v3 << 21) | (v3 >> 43)) & MASK_64
+        v3 ^= v0
+        v2 = (v2 + v1) & MASK_64
+        v1 = ((v1 << 17) | (v1 >> 47)) & MASK_64
+        v1 ^= v2
+        v2 = ((v2 << 32) | (v2 >> 32)) & MASK_64
+    return v0, v1, v2, v3
+
+
+def siphash24(key, seed: int = 0) -> int:
+    """
+    Returns the SipHash-2-4 hash of the given key.
+    Args:
+        key: str, bytes-like or int key
+        seed: 128-bit seed, used as the little-endian SipHash key
+    Returns:
+        64-bit hash
+    """
+    data = key_bytes(key)
+    length = len(data)
+    k0, k1 = seed & MASK_64, (seed >> 64) & MASK_64
+    v0 = k0 ^ 0x736F6D6570736575
+    v1 = k1 ^ 0x646F72616E646F6D
+    v2 = k0 ^ 0x6C7967656E657261
+    v3 = k1 ^ 0x7465646279746573
+
+    # Every full 8-byte word, then the remaining bytes with the length in
+    # the top byte
+    words = list(unpack_from('<' + 'Q' * (length // 8), data))
+    tail = data[length - length % 8:] + bytes(7 - length % 8) + bytes((length & 0xFF,))
+    words.append(unpack_from('<Q', tail)[0])
+
+    for word in words:
+        v3 ^= word
+        v0, v1, v2, v3 = _sip_rounds(v0, v1, v2, v3, 2)
+        v0 ^= word
+    v2 ^= 0xFF
+    v0, v1, v2, v3 = _sip_rounds(v0, v1, v2, v3, 4)
+    return v0 ^ v1 ^ v2 ^ v3
+
+
+# Seeded hash functions by name, with the number of seed bits each uses
+FAMILIES = {
+    'xxhash64': (xxhash64, 64),
+    'siphash24': (siphash24, 128),
+}
+
+
+def seeded(name: str, seed: int = None) -> callable:
+    """
+    Returns a one-argument hash function that hashes keys with the named
+    function and a fixed seed, which is drawn at random if none is given.
+    The seed is kept as the function's seed attribute.
+    Args:
+        name: Key of FAMILIES
+        seed: Seed to use
+    Returns:
+        Hash function
+    """
+    function, bits = FAMILIES[name]
+    if seed is None:
+        seed = secrets.randbits(bits)
+
+    def hash_key(key) -> int:
+        return function(key, seed)
+
+    hash_key.__name__ = name
+    hash_key.seed = seed
+    return hash_key
+
+
+def resolve(function, seed: int = None) -> callable:
+    """
+    Returns the hash function a HashMap constructor was given. Names from
+    FAMILIES become a seeded function, and callables are returned as is.
+    A seed can only be given with a name, since a callable has no use for it.
+    Args:
+        function: Hash function or name of a seeded hash function
+        seed: Seed for a named function, random if None
+    Returns:
+        Hash function
+    """
+    if isinstance(function, str):
+        return seeded(function, seed)
+    if seed is not None:
+        raise ValueError('a seed needs the name of a seeded hash function, not a callable')
+    return function
@@ -0,0 +1,255 @@
+# This file implements an asyncio front end for the HashMap classes.
+# Single-key calls made while the event loop is busy are queued, and the
+# queue is drained in batches: consecutive calls of the same kind become one
+# get_many(), put_many() or remove_many() call. A batch that could resize
+# the table, and every bulk operation, runs in an executor thread instead,
+# and the loop queues further calls until it is done. Batches run on the
+# loop stop after a time budget, so other tasks get to run in between. If a
+# batch raises, its calls are applied again one at a time, so each caller
+# gets only its own result or error.
+
+import asyncio
+import time
+
+from hash_map_sc import HashMapSC
+from capacity import fill_limit
+
+# Longest run of queued calls applied as one batch
+MAX_BATCH = 1024
+
+
+class AsyncHashMap:
+    def __init__(self, m, budget: float = 0.002, executor=None) -> None:
+        """
+        Initialize new asyncio front end for the given HashMapSC, HashMapOA
+        or other map with the same batch methods. The map must not be used
+        directly while the front end is in use.
+        Args:
+            m: Map to wrap
+            budget: Seconds of batches applied on the loop before yielding
+            executor: concurrent.futures executor for resizes and bulk
+                operations, or None for the loop's default thread pool.
+                Resizes change the map in place, so it must run threads.
+        """
+        self._map = m
+        self._budget = budget
+        self._executor = executor
+
+        # Load limit the wrapped map resizes at
+        self._load_limit = 1.0 if isinstance(m, HashMapSC) else 0.5
+
+        # Queued (method, argument, future) calls, in call order
+        self._pending = []
+        self._scheduled = False
+        # True while an executor thread is using the map
+        self._busy = False
+
+    def get_size(self) -> int:
+        """
+        Return size of map, not counting queued calls
+        """
+        return self._map.get_size()
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._map.get_capacity()
+
+    # ------------------------------------------------------------------ #
+
+    def _submit(self, method: str, argument) -> asyncio.Future:
+        """
+        Queues a call and returns the future its result is set on.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((method, argument, future))
+        if not self._scheduled and not self._busy:
+            self._scheduled = True
+            loop.call_soon(self._flush)
+        return future
+
+    async def get(self, key: str) -> object:
+        """
+        Returns the value associated with the given key, else None.
+        """
+        return await self._submit('get', key)
+
+    async def contains_key(self, key: str) -> bool:
+        """
+        Returns True if the given key is in the HashMap, else False.
+        """
+        return await self._submit('contains_key', key)
+
+    async def put(self, key: str, value: object) -> None:
+        """
+        Updates the key-value pair in the given HashMap.
+        If the key already exists, only the value is updated.
+        """
+        await self._submit('put', (key, value))
+
+    async def remove(self, key: str) -> None:
+        """
+        Remove the given key-value pair from the given HashMap.
+        If the key does not exist, this method does nothing.
+        """
+        await self._submit('remove', key)
+
+    async def put_many(self, pairs) -> None:
+        """
+        Puts every (key, value) pair in the given iterable, in order, in an
+        executor thread.
+        """
+        await self._submit('put_many', list(pairs))
+
+    async def get_keys_and_values(self):
+        """
+        Returns a DynamicArray of every (key, value) pair, built in an
+        executor thread.
+        """
+        return await self._submit('get_keys_and_values', None)
+
+    def _take_run(self) -> tuple:
+        """
+        Removes the longest run of queued calls of the same method, up to
+        MAX_BATCH, from the front of the queue and returns the method and
+        the run. Bulk calls always form a run of their own.
+        """
+        method = self._pending[0][0]
+        end = 1
+        if method not in ('put_many', 'get_keys_and_values'):
+            while end < min(len(self._pending), MAX_BATCH) and self._pending[end][0] == method:
+                end += 1
+        run = self._pending[:end]
+        del self._pending[:end]
+        return method, run
+
+    def _may_resize(self, method: str, run: list) -> bool:
+        """
+        Returns True if applying the given run could resize or compact the
+        map, following the rules of the map's put_many() and remove_many().
+        Bulk calls are always treated as if they could.
+        """
+        m = self._map
+        size, capacity = m.get_size(), m.get_capacity()
+        tombstones = getattr(m, '_tombstones', 0)
+        if method == 'put':
+            # put_many() finishes a resize in progress, then grows or
+            # compacts before adding a key once the load limit is reached
+            # or tombstones exceed the map's tombstone_ratio
+            if getattr(m, '_old_buckets', None) is not None:
+                return True
+            if size + tombstones + len(run) >= fill_limit(capacity, self._load_limit):
+                return True
+            return tombstones > getattr(m, '_tombstone_ratio', 1.0) * capacity
+        if method == 'remove':
+            return size - len(run) < getattr(m, '_shrink_load', 0.0) * capacity
+        return method in ('put_many', 'get_keys_and_values')
+
+    def _apply(self, method: str, run: list) -> list:
+        """
+        Applies a run of calls to the map and returns a (result, error)
+        pair for each call, in order. The run is applied as one batch, and
+        if that raises, each call is applied again on its own, so that a
+        bad call only fails its own caller. Puts and removes give the same
+        result when applied again, so the part of the batch applied before
+        it failed does no harm.
+        """
+        try:
+            return [(result, None) for result in self._apply_batch(method, run)]
+        except Exception:
+            if len(run) == 1:
+                raise
+
+        outcomes = []
+        for call in run:
+            try:
+                outcomes.append((self._apply_batch(method, [call])[0], None))
+            except Exception as error:
+                outcomes.append((None, error))
+        return outcomes
+
+    def _apply_batch(self, method: str, run: list) -> list:
+        """
+        Applies a run of calls to the map as one batch and returns their
+        results in order.
+        """
+        m = self._map
+        arguments = [call[1] for call in run]
+        if method == 'get':
+            return list(m.get_many(arguments))
+        if method == 'contains_key':
+            return [m.contains_key(key) for key in arguments]
+        if method == 'put':
+            m.put_many(arguments)
+        elif method == 'remove':
+            m.remove_many(arguments)
+        elif method == 'put_many':
+            m.put_many(arguments[0])
+        else:
+            return [m.get_keys_and_values()]
+        return [None] * len(run)
+
+    def _resolve(self, run: list, outcomes: list = None, error: BaseException = None) -> None:
+        """
+        Sets the result or error of every call in the run from its (result,
+        error) outcome, or the given error for every call if the run could
+        not be applied at all. Calls whose caller stopped waiting are
+        skipped.
+        """
+        for x, (method, argument, future) in enumerate(run):
+            if future.done():
+                continue
+            if error is None:
+                result, call_error = outcomes[x]
+            else:
+                call_error = error
+            if call_error is not None:
+                future.set_exception(call_error)
+            else:
+                future.set_result(result)
+
+    def _flush(self) -> None:
+        """
+        Applies queued calls in batches until the queue is empty, the time
+        budget is used up, or a batch has to run in the executor.
+        """
+        self._scheduled = False
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        while self._pending:
+            method, run = self._take_run()
+            if self._may_resize(method, run):
+                self._busy = True
+                task = loop.run_in_executor(self._executor, self._apply, method, run)
+                task.add_done_callback(lambda task, run=run: self._executor_done(task, run))
+                return
+
+            try:
+                outcomes = self._apply(method, run)
+            except Exception as error:
+                self._resolve(run, error=error)
+            else:
+                self._resolve(run, outcomes)
+
+            if self._pending and time.perf_counter() - start >= self._budget:
+                self._scheduled = True
+                loop.call_soon(self._flush)
+                return
+
+    def _executor_done(self, task: asyncio.Future, run: list) -> None:
+        """
+        Resolves a run that finished in the executor and resumes draining
+        the queue.
+        """
+        self._busy = False
+        if task.cancelled():
+            self._resolve(run, error=asyncio.CancelledError())
+        elif task.exception() is not None:
+            self._resolve(run, error=task.exception())
+        else:
+            self._resolve(run, task.result())
+        if self._pending and not self._scheduled:
+            self._scheduled = True
+            asyncio.get_running_loop().call_soon(self._flush)
@@ -0,0 +1,423 @@
+# This file implements a HashMap Class that can be used to
+# store key-value pairs without allocating an object per entry. Slots are
+# kept in parallel flat arrays: a control byte per slot, the cached hash of
+# each key in an unsigned 64-bit array, and plain lists of keys and values.
+# Open addressing and quadratic probing is utilized to manage collisions,
+# with the same capacities and load limits as HashMapOA.
+
+from array import array
+
+from GIVEN_DATA_STRUCTURES import (DynamicArray, HashEntry, hash_function_1)
+from hash_batch import hash_many
+from capacity import (GROW, grown_capacity, insert_action, insert_limits, is_prime, next_prime,
+                      reserved_capacity)
+
+# Control byte of each slot
+EMPTY = 0
+LIVE = 1
+DELETED = 2
+
+MASK_64 = 0xFFFFFFFFFFFFFFFF
+
+
+class HashMapCA:
+    def __init__(self, capacity: int, function, tombstone_ratio: float = 0.2) -> None:
+        """
+        Initialize new HashMap that stores its slots in flat arrays and
+        uses quadratic probing for collision resolution
+        """
+        # capacity must be a prime number
+        self._capacity = next_prime(capacity)
+        self._allocate(self._capacity)
+
+        self._hash_function = function
+        self._size = 0
+
+        # The table is compacted once tombstones fill this share of it
+        self._tombstone_ratio = tombstone_ratio
+        self._tombstones = 0
+        # put() grows or compacts the table once live entries and tombstones
+        # reach _full_at, or tombstones pass _compact_at
+        self._full_at, self._compact_at = insert_limits(self._capacity, 0.5, tombstone_ratio)
+
+    @classmethod
+    def from_pairs(cls, pairs, expected_size: int = None,
+                   function: callable = hash_function_1) -> "HashMapCA":
+        """
+        Returns a new HashMap holding the given (key, value) pairs. The table
+        is reserved for expected_size elements up front, or for the number
+        of pairs if no size is given, so the load itself never resizes.
+        Args:
+            pairs: Iterable of (key, value) tuples
+            expected_size: Number of distinct keys in pairs
+            function: Hash function
+        Returns:
+            New HashMapCA
+        """
+        pairs = list(pairs)
+        m = cls(11, function)
+        m.reserve(len(pairs) if expected_size is None else expected_size)
+        m.put_many(pairs)
+        return m
+
+    def _allocate(self, capacity: int) -> None:
+        """
+        Replaces the slot arrays with empty arrays of the given capacity.
+        """
+        self._control = bytearray(capacity)
+        self._hashes = array('Q', bytes(8 * capacity))
+        self._keys = [None] * capacity
+        self._values = [None] * capacity
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        out = ''
+        for i in range(self._capacity):
+            if self._control[i] == EMPTY:
+                out += str(i) + ': None\n'
+            else:
+                out += (str(i) + ': K: ' + str(self._keys[i]) + ' V: ' + str(self._values[i]) +
+                        ' TS: ' + str(self._control[i] == DELETED) + '\n')
+        return out
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._capacity
+
+    def _hash_keys(self, keys) -> list:
+        """
+        Returns the 64-bit hash of every key in the given batch in input
+        order, using the vectorized batch hash where possible.
+        """
+        return [hash & MASK_64 for hash in hash_many(self._hash_function, keys)]
+
+    # ------------------------------------------------------------------ #
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Updates the key-value pair in the given HashMap.
+        If the key already exists, only the value is updated.
+        Args:
+            key
+            value
+        Returns:
+            None
+        """
+        hash = self._hash_function(key) & MASK_64
+        if self._size + self._tombstones >= self._full_at or self._tombstones > self._compact_at:
+            idx = self._find(key, hash)
+            if idx is not None:
+                self._values[idx] = value
+                return
+            if insert_action(self._capacity, self._size, self._tombstones, 0.5,
+                             self._tombstone_ratio) == GROW:
+                self.resize_table(2 * self._capacity)
+            else:
+                self.compact()
+
+        self._insert(key, value, hash)
+
+    def _insert(self, key: str, value: object, hash: int) -> None:
+        """
+        Stores the key-value pair with its precomputed hash without
+        checking the load factor. A new key takes the first deleted slot on
+        its probe sequence, if any.
+        Args:
+            key
+            value
+            hash: 64-bit hash of the key
+        Returns:
+            None
+        """
+        control, hashes, keys = self._control, self._hashes, self._keys
+        capacity = self._capacity
+        idx_initial = hash % capacity
+        idx = idx_initial
+        tombstone = None
+        x = 1
+        while control[idx] != EMPTY and x < capacity:
+            if control[idx] == DELETED:
+                if tombstone is None:
+                    tombstone = idx
+            elif hashes[idx] == hash and keys[idx] == key:
+                self._values[idx] = value
+                return
+            idx = (idx_initial + (x**2)) % capacity
+            x += 1
+
+        if tombstone is not None:
+            idx = tombstone
+            self._tombstones -= 1
+        control[idx] = LIVE
+        hashes[idx] = hash
+        keys[idx] = key
+        self._values[idx] = value
+        self._size += 1
+
+    def table_load(self) -> float:
+        """
+        Returns the load factor of the HashMap.
+        (Number of elements) / (Number of buckets).
+        Returns:
+            Load factor
+        """
+        return round(self._size / self._capacity, 2)
+
+    def empty_buckets(self) -> int:
+        """
+        Returns the number of empty buckets in the HashMap.
+        Buckets holding a tombstone are not empty.
+        """
+        return self._capacity - self._size - self._tombstones
+
+    def compact(self) -> None:
+        """
+        Rebuilds the table at the same capacity, dropping every tombstone.
+        """
+        self._rehash(self._capacity)
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Resizes the underlying arrays of the given HashMap.
+        The new capacity must be a prime number greater than the current
+        number of elements in the HashMap.
+        All key-value pairs are rehashed.
+        Args:
+            new_capacity: New array length
+        Returns:
+            None
+        """
+        cap = new_capacity
+        if cap < self._size:
+            return
+
+        if not is_prime(cap):
+            cap = next_prime(cap)
+
+        self._rehash(grown_capacity(cap, self._size, 0.5))
+
+    def reserve(self, size: int) -> None:
+        """
+        Grows the table to the smallest prime capacity that holds the given
+        number of elements without resizing, so that loading a known number
+        of elements never triggers resize_table(). Never shrinks the table.
+        Args:
+            size: Number of elements to make room for
+        Returns:
+            None
+        """
+        cap = reserved_capacity(size, 0.5)
+        if cap > self._capacity:
+            self._rehash(cap)
+
+    def _rehash(self, capacity: int) -> None:
+        """
+        Moves every live slot into new arrays of the given capacity, reusing
+        the cached hashes. Tombstones are dropped, and no key comparisons
+        are made since every key is already unique.
+        Args:
+            capacity: New array length, assumed to be prime
+        Returns:
+            None
+        """
+        control, hashes, keys, values = self._control, self._hashes, self._keys, self._values
+        self._allocate(capacity)
+        new_control, new_hashes = self._control, self._hashes
+        new_keys, new_values = self._keys, self._values
+
+        for x in range(self._capacity):
+            if control[x] != LIVE:
+                continue
+
+            hash = hashes[x]
+            idx_initial = hash % capacity
+            idx = idx_initial
+            j = 1
+            while new_control[idx] != EMPTY:
+                idx = (idx_initial + (j ** 2)) % capacity
+                j += 1
+            new_control[idx] = LIVE
+            new_hashes[idx] = hash
+            new_keys[idx] = keys[x]
+            new_values[idx] = values[x]
+
+        self._capacity = capacity
+        self._tombstones = 0
+        self._full_at, self._compact_at = insert_limits(capacity, 0.5, self._tombstone_ratio)
+
+    def _find(self, key: str, hash: int) -> int:
+        """
+        Returns the slot holding the given key, or None if the key is not in
+        the HashMap.
+        Args:
+            key: Key to find
+            hash: 64-bit hash of the key
+        Returns:
+            Slot index if key found, else None
+        """
+        control, hashes, keys = self._control, self._hashes, self._keys
+        capacity = self._capacity
+        idx_initial = hash % capacity
+        idx = idx_initial
+        x = 1
+        while control[idx] != EMPTY and x < capacity:
+            if control[idx] == LIVE and hashes[idx] == hash and keys[idx] == key:
+                return idx
+            idx = (idx_initial + (x**2)) % capacity
+            x += 1
+        return
+
+    def _delete(self, idx: int) -> None:
+        """
+        Turns the given live slot into a tombstone and releases its key and
+        value.
+        """
+        self._control[idx] = DELETED
+        self._keys[idx] = None
+        self._values[idx] = None
+        self._size -= 1
+        self._tombstones += 1
+
+    def get(self, key: str) -> object:
+        """
+        Returns the value associated with the given key, else None.
+        Args:
+            key: Key to find
+        Returns:
+            Value if key found, else None
+        """
+        idx = self._find(key, self._hash_function(key) & MASK_64)
+        if idx is not None:
+            return self._values[idx]
+        return
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Returns True if the given key is in the HashMap, else False.
+        An empty HashMap returns False.
+        Args:
+            key: Key to find
+        Returns:
+            bool: True if found, else False
+        """
+        return self._find(key, self._hash_function(key) & MASK_64) is not None
+
+    def remove(self, key: str) -> None:
+        """
+        Remove the given key-value pair from the given HashMap.
+        If the key does not exist, this method does nothing.
+        Args:
+            key: Key-Value pair to be removed
+        Returns:
+            None
+        """
+        idx = self._find(key, self._hash_function(key) & MASK_64)
+        if idx is not None:
+            self._delete(idx)
+
+    def clear(self) -> None:
+        """
+        Clears the entire HashMap contents without changing the capacity.
+        """
+        self._allocate(self._capacity)
+        self._size = 0
+        self._tombstones = 0
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Returns a DynamicArray where each element is a tuple of (key,
+        value) pair from the given HashMap.
+        Returns:
+            target_da
+        """
+        target_da = DynamicArray()
+        for x in range(self._capacity):
+            if self._control[x] == LIVE:
+                target_da.append((self._keys[x], self._values[x]))
+        return target_da
+
+    def put_many(self, pairs) -> None:
+        """
+        Puts every (key, value) pair in the given iterable, in order.
+        All keys are hashed up front, and the load factor is only checked
+        before adding a new key, by the same rules as in put(). If the table
+        has to grow or be compacted, it is rebuilt once for the case where
+        every remaining key is new.
+        Args:
+            pairs: Iterable of (key, value) tuples
+        Returns:
+            None
+        """
+        pairs = list(pairs)
+        hashes = self._hash_keys([pair[0] for pair in pairs])
+
+        for x, hash in enumerate(hashes):
+            key, value = pairs[x]
+            if self._size + self._tombstones >= self._full_at or self._tombstones > self._compact_at:
+                idx = self._find(key, hash)
+                if idx is not None:
+                    self._values[idx] = value
+                    continue
+
+                capacity = self._capacity
+                if insert_action(capacity, self._size, self._tombstones, 0.5,
+                                 self._tombstone_ratio) == GROW:
+                    capacity = next_prime(2 * capacity)
+                self._rehash(grown_capacity(capacity, self._size + len(pairs) - x, 0.5))
+
+            self._insert(key, value, hash)
+
+    def get_many(self, keys) -> DynamicArray:
+        """
+        Returns a DynamicArray with the value of every given key, in input
+        order, with None for keys that are not in the HashMap.
+        Args:
+            keys: Iterable of keys to find
+        Returns:
+            target_da
+        """
+        keys = list(keys)
+        hashes = self._hash_keys(keys)
+
+        values = []
+        for key, hash in zip(keys, hashes):
+            idx = self._find(key, hash)
+            values.append(None if idx is None else self._values[idx])
+        return DynamicArray(values)
+
+    def remove_many(self, keys) -> None:
+        """
+        Removes every given key from the HashMap.
+        Keys that do not exist are skipped.
+        Args:
+            keys: Iterable of keys to remove
+        Returns:
+            None
+        """
+        keys = list(keys)
+        hashes = self._hash_keys(keys)
+
+        for key, hash in zip(keys, hashes):
+            idx = self._find(key, hash)
+            if idx is not None:
+                self._delete(idx)
+
+    def __iter__(self):
+        """
+        Return an iterator over the live entries. Slots hold no entry
+        objects, so each one is returned as a new HashEntry, and setting
+        its value does not change the HashMap.
+        """
+        for x in range(self._capacity):
+            if self._control[x] == LIVE:
+                yield HashEntry(self._keys[x], self._values[x], self._hashes[x])
@@ -0,0 +1,295 @@
+# This file implements a thread-safe HashMap Class built from HashMapSC
+# segments. Every key belongs to one segment, picked by its hash, and each
+# segment has its own lock, so threads that write to different segments do
+# not wait for each other, and a segment resizes while holding only its own
+# lock. Reads take no lock: they check a version counter that a segment
+# bumps around every change that relinks nodes, and fall back to the lock if
+# one happened during the read.
+
+import threading
+
+from GIVEN_DATA_STRUCTURES import (DynamicArray, hash_function_1)
+from hash_map_sc import (HashMapSC, SortedBucket)
+from hash_functions import resolve
+
+
+class Segment(HashMapSC):
+    """
+    HashMapSC with a lock for writers and a version counter for readers.
+    The version is odd while nodes are being relinked, and changes whenever
+    a lookup that started before the relinking could have missed a key.
+    """
+
+    def __init__(self, capacity: int, function: callable, shrink_load: float = 0.0) -> None:
+        """Initialize new segment that resizes all at once."""
+        super().__init__(capacity, function, shrink_load=shrink_load)
+        self.lock = threading.Lock()
+        self.version = 0
+
+    def _rehash(self, capacity: int) -> None:
+        """
+        Moves every node into a new bucket array, with the version odd
+        while it does.
+        """
+        self.version += 1
+        try:
+            super()._rehash(capacity)
+        finally:
+            self.version += 1
+
+    def _chain_shrank(self, buckets: list, idx: int) -> None:
+        """
+        Records that the given bucket has just lost a node. Turning a sorted
+        chain back into a LinkedList relinks its nodes, so it is done with
+        the version odd.
+        """
+        if type(buckets[idx]) is not SortedBucket:
+            super()._chain_shrank(buckets, idx)
+            return
+        self.version += 1
+        try:
+            super()._chain_shrank(buckets, idx)
+        finally:
+            self.version += 1
+
+
+class HashMapCC:
+    def __init__(self, capacity: int = 11, function: callable = hash_function_1,
+                 segments: int = 16, shrink_load: float = 0.0, seed: int = None) -> None:
+        """
+        Initialize new HashMap that splits its keys over the given number of
+        separately locked HashMapSC segments
+        """
+        # A name from hash_functions.FAMILIES picks a seeded hash function,
+        # with a random seed unless one is given
+        self._hash_function = resolve(function, seed)
+        self._segments = [Segment(capacity // segments, self._hash_function, shrink_load)
+                          for _ in range(segments)]
+
+    def _segment(self, hash: int) -> Segment:
+        """
+        Returns the segment that holds keys with the given hash.
+        """
+        return self._segments[hash % len(self._segments)]
+
+    def _find(self, key: str, hash: int):
+        """
+        Returns the node holding the given key, or None if the key is not in
+        the HashMap. The segment is read without its lock, and only locked
+        if the unlocked read cannot be trusted.
+        Args:
+            key: Key to find
+            hash: Hash of the key
+        Returns:
+            SLNode if key found, else None
+        """
+        segment = self._segment(hash)
+        version = segment.version
+        buckets = segment._buckets.raw()
+        bucket = buckets[hash % len(buckets)]
+        node = bucket.contains(key, hash)
+        if node is not None:
+            # A sorted bucket that is being written to can return a node
+            # next to the one asked for
+            if node.hash == hash and node.key == key:
+                return node
+        elif type(bucket) is not SortedBucket and version == segment.version and not version & 1:
+            return
+
+        with segment.lock:
+            return self._find_locked(segment, key, hash)
+
+    @staticmethod
+    def _find_locked(segment: Segment, key: str, hash: int):
+        """
+        Returns the node holding the given key in the given segment, whose
+        lock the caller holds, or None if the key is not in it.
+        """
+        buckets = segment._buckets.raw()
+        return buckets[hash % len(buckets)].contains(key, hash)
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return sum(segment.get_size() for segment in self._segments)
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map, the total number of buckets over all segments
+        """
+        return sum(segment.get_capacity() for segment in self._segments)
+
+    def table_load(self) -> float:
+        """
+        Returns the load factor of the HashMap.
+        (Number of elements) / (Number of buckets).
+        Returns:
+            Load factor
+        """
+        return self.get_size() / self.get_capacity()
+
+    # ------------------------------------------------------------------ #
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Updates the key-value pair in the given HashMap.
+        If the key already exists, only the value is updated.
+        Args:
+            key
+            value
+        Returns:
+            None
+        """
+        hash = self._hash_function(key)
+        segment = self._segment(hash)
+        with segment.lock:
+            segment._put(key, value, hash)
+
+    def get(self, key: str) -> object:
+        """
+        Returns the value associated with the given key, else None.
+        Takes no lock unless the key's segment changes during the lookup.
+        Args:
+            key: Key to find
+        Returns:
+            Value if key found, else None
+        """
+        node = self._find(key, self._hash_function(key))
+        if node is not None:
+            return node.value
+        return
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Returns True if the given key is in the HashMap, else False.
+        Takes no lock unless the key's segment changes during the lookup.
+        Args:
+            key: Key to find
+        Returns:
+            bool: True if found, else False
+        """
+        return self._find(key, self._hash_function(key)) is not None
+
+    def remove(self, key: str) -> None:
+        """
+        Remove the given key-value pair from the given HashMap.
+        If the key does not exist, this method does nothing.
+        Args:
+            key: Key-value pair to be removed
+        Returns:
+            None
+        """
+        hash = self._hash_function(key)
+        segment = self._segment(hash)
+        with segment.lock:
+            segment._remove(key, hash)
+
+    def compute_if_absent(self, key: str, function: callable) -> object:
+        """
+        Returns the value of the given key. If the key is not in the
+        HashMap, function(key) is called and its result is stored, unless it
+        is None. No other thread writes to the key's segment meanwhile, so
+        function must not use this HashMap.
+        Args:
+            key
+            function: Called with key to make the missing value
+        Returns:
+            Current value of the key
+        """
+        hash = self._hash_function(key)
+        segment = self._segment(hash)
+        with segment.lock:
+            node = self._find_locked(segment, key, hash)
+            if node is not None and node.value is not None:
+                return node.value
+            value = function(key)
+            if value is not None:
+                segment._put(key, value, hash)
+            return value
+
+    def merge(self, key: str, value: object, function: callable) -> object:
+        """
+        Stores value for a key that is not in the HashMap, or else
+        function(old value, value). A result of None removes the key. No
+        other thread writes to the key's segment meanwhile, so function must
+        not use this HashMap.
+        Args:
+            key
+            value: Value to store or merge with the old one
+            function: Called with the old value and value
+        Returns:
+            New value of the key, or None if it was removed
+        """
+        hash = self._hash_function(key)
+        segment = self._segment(hash)
+        with segment.lock:
+            node = self._find_locked(segment, key, hash)
+            if node is not None and node.value is not None:
+                value = function(node.value, value)
+            if value is None:
+                segment._remove(key, hash)
+            else:
+                segment._put(key, value, hash)
+            return value
+
+    def _lock_all(self) -> None:
+        """
+        Acquires every segment lock, always in the same order so that two
+        threads doing this cannot deadlock.
+        """
+        for segment in self._segments:
+            segment.lock.acquire()
+
+    def _unlock_all(self) -> None:
+        """
+        Releases every segment lock.
+        """
+        for segment in self._segments:
+            segment.lock.release()
+
+    def reserve(self, size: int) -> None:
+        """
+        Grows every segment to hold its share of the given number of
+        elements without resizing, with all segments locked so that the
+        HashMap resizes as one. Never shrinks a segment.
+        Args:
+            size: Number of elements to make room for
+        Returns:
+            None
+        """
+        share = -(-size // len(self._segments))
+        self._lock_all()
+        try:
+            for segment in self._segments:
+                segment.reserve(share)
+        finally:
+            self._unlock_all()
+
+    def clear(self) -> None:
+        """
+        Clears the entire HashMap contents without changing the capacity.
+        """
+        self._lock_all()
+        try:
+            for segment in self._segments:
+                segment.clear()
+        finally:
+            self._unlock_all()
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Returns a DynamicArray where each element is a tuple of (key,
+        value) pair from the given HashMap, taken with every segment locked.
+        Returns:
+            target_da
+        """
+        target_da = DynamicArray()
+        self._lock_all()
+        try:
+            for segment in self._segments:
+                for pair in segment.get_keys_and_values():
+                    target_da.append(pair)
+        finally:
+            self._unlock_all()
+        return target_da
@@ -0,0 +1,511 @@
+# This file implements a HashMap Class that keeps its key-value pairs in a
+# memory-mapped file, so that maps larger than RAM can be used and an
+# existing map is ready as soon as its file is opened. The file holds a
+# header, a bucket array of fixed-size slots (hash, key offset, value offset
+# and a state byte), and an append-only heap of length-prefixed keys and
+# values. Open addressing and quadratic probing is utilized to manage
+# collisions, with the same capacities and load limits as HashMapOA.
+#
+# Nothing written to the heap is ever overwritten, so the memoryviews that
+# get() returns stay valid while the map grows. Replaced values and removed
+# pairs are counted as garbage. Resizing or compacting the table, or garbage
+# filling half of the heap, copies the live pairs into a new file that then
+# replaces the old one, whose mapping stays open while views into it are
+# held. The header records a fingerprint of the hash function, so that the
+# file is not opened with a function that would miss its keys.
+
+import mmap
+import os
+import tempfile
+from struct import Struct
+
+from GIVEN_DATA_STRUCTURES import (DynamicArray, hash_function_1)
+from capacity import (GROW, grown_capacity, insert_action, insert_limits, is_prime, next_prime,
+                      reserved_capacity)
+
+# State byte of each slot
+EMPTY = 0
+LIVE = 1
+DELETED = 2
+
+MASK_64 = 0xFFFFFFFFFFFFFFFF
+
+MAGIC = b'HMAPMM02'
+
+# Magic, capacity, size, tombstones, bucket array offset, heap end, bytes of
+# garbage and hash function fingerprint, HEADER_SIZE bytes in all
+HEADER = Struct('<8sQQQQQQQ')
+HEADER_SIZE = 64
+
+# Key whose hash is stored as the fingerprint of the hash function
+FINGERPRINT_KEY = 'HashMapMM fingerprint'
+
+# Garbage is only collected once there is at least this many bytes of it,
+# so that a small map is not copied every few puts
+MIN_GARBAGE = 1 << 20
+
+# Hash, key offset, value offset and state byte, padded to 32 bytes
+SLOT = Struct('<QQQB7x')
+
+# Length prefix of every key and value in the heap
+LENGTH = Struct('<Q')
+
+
+class HashMapMM:
+    def __init__(self, path: str, capacity: int = 11, function: callable = hash_function_1,
+                 tombstone_ratio: float = 0.2) -> None:
+        """
+        Opens the HashMap stored in the file at path, or creates the file
+        with an empty HashMap of the given capacity if it does not exist.
+        Keys are strings and values are bytes-like objects. The hash
+        function must give the same hash in every process that opens the
+        file, so the builtin hash() cannot be used for str keys. Opening a
+        file written with a different hash function raises ValueError.
+        """
+        self._path = os.path.abspath(path)
+        self._hash_function = function
+        self._fingerprint = function(FINGERPRINT_KEY) & MASK_64
+
+        # The table is compacted once tombstones fill this share of it
+        self._tombstone_ratio = tombstone_ratio
+
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        length = os.fstat(self._fd).st_size
+        if length:
+            self._remap(length)
+            if length < HEADER_SIZE or self._map[:len(MAGIC)] != MAGIC:
+                self.close()
+                raise ValueError(path + ' is not a HashMapMM file')
+            (magic, self._capacity, self._size, self._tombstones, self._table, self._heap_end,
+             self._garbage, fingerprint) = HEADER.unpack_from(self._map, 0)
+            if fingerprint != self._fingerprint:
+                self.close()
+                raise ValueError(path + ' was written with a different hash function')
+        else:
+            # capacity must be a prime number
+            self._capacity = next_prime(capacity)
+            self._size = 0
+            self._tombstones = 0
+            self._garbage = 0
+            self._table = HEADER_SIZE
+            self._heap_end = HEADER_SIZE + self._capacity * SLOT.size
+            self._remap(self._heap_end)
+            self._write_header()
+
+        # put() grows or compacts the table once live entries and tombstones
+        # reach _full_at, or tombstones pass _compact_at
+        self._full_at, self._compact_at = insert_limits(self._capacity, 0.5, tombstone_ratio)
+
+    def _remap(self, length: int) -> None:
+        """
+        Extends the file to the given length if it is shorter, and maps all
+        of it. The previous mapping is not closed, so views into it stay
+        valid until they are released.
+        """
+        if os.fstat(self._fd).st_size < length:
+            os.ftruncate(self._fd, length)
+        self._map = mmap.mmap(self._fd, length)
+        self._view = memoryview(self._map)
+
+    def _write_header(self) -> None:
+        """
+        Stores the capacity, size, tombstone count, offsets, garbage and
+        hash function fingerprint in the header.
+        """
+        HEADER.pack_into(self._map, 0, MAGIC, self._capacity, self._size, self._tombstones,
+                         self._table, self._heap_end, self._garbage, self._fingerprint)
+
+    def _allocate(self, length: int) -> int:
+        """
+        Reserves the given number of zeroed bytes at the end of the heap and
+        returns their offset. The file at least doubles whenever it has to
+        grow, so appending n bytes remaps it O(log n) times.
+        """
+        offset = self._heap_end
+        end = offset + length
+        if end > len(self._map):
+            self._remap(max(end, 2 * len(self._map)))
+        self._heap_end = end
+        return offset
+
+    def _append(self, data) -> int:
+        """
+        Copies the given bytes-like object to the heap behind its length and
+        returns the offset of the record.
+        """
+        data = memoryview(data).cast('B')
+        offset = self._allocate(LENGTH.size + len(data))
+        LENGTH.pack_into(self._map, offset, len(data))
+        self._map[offset + LENGTH.size:offset + LENGTH.size + len(data)] = data
+        return offset
+
+    def _read(self, offset: int) -> memoryview:
+        """
+        Returns a view of the heap record at the given offset without
+        copying it.
+        """
+        start = offset + LENGTH.size
+        return self._view[start:start + LENGTH.unpack_from(self._map, offset)[0]]
+
+    def _record_size(self, offset: int) -> int:
+        """
+        Returns the number of heap bytes taken by the record at the given
+        offset, including its length.
+        """
+        return LENGTH.size + LENGTH.unpack_from(self._map, offset)[0]
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        out = ''
+        for i in range(self._capacity):
+            hash, key_offset, value_offset, state = SLOT.unpack_from(self._map, self._table + i * SLOT.size)
+            if state == EMPTY:
+                out += str(i) + ': None\n'
+            elif state == DELETED:
+                out += str(i) + ': K: None V: None TS: True\n'
+            else:
+                out += (str(i) + ': K: ' + str(self._read(key_offset), 'utf-8', 'surrogatepass') +
+                        ' V: ' + str(bytes(self._read(value_offset))) + ' TS: False\n')
+        return out
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._capacity
+
+    # ------------------------------------------------------------------ #
+
+    def put(self, key: str, value) -> None:
+        """
+        Updates the key-value pair in the given HashMap.
+        If the key already exists, only the value is updated.
+        Args:
+            key
+            value: bytes-like object
+        Returns:
+            None
+        """
+        encoded, hash = key.encode('utf-8', 'surrogatepass'), self._hash_function(key) & MASK_64
+        if self._size + self._tombstones >= self._full_at or self._tombstones > self._compact_at:
+            # Only a new key grows or compacts the table
+            if self._find(encoded, hash) is None:
+                if insert_action(self._capacity, self._size, self._tombstones, 0.5,
+                                 self._tombstone_ratio) == GROW:
+                    self.resize_table(2 * self._capacity)
+                else:
+                    self.compact()
+
+        self._insert(encoded, value, hash)
+        self._collect()
+        self._write_header()
+
+    def _insert(self, key: bytes, value, hash: int) -> None:
+        """
+        Stores the encoded key and its value with the precomputed hash
+        without checking the load factor. A replaced value becomes garbage,
+        and a new key takes the first deleted slot on its probe sequence.
+        Args:
+            key: UTF-8 encoded key
+            value: bytes-like object
+            hash: 64-bit hash of the key
+        Returns:
+            None
+        """
+        capacity = self._capacity
+        idx_initial = hash % capacity
+        idx = idx_initial
+        tombstone = None
+        x = 1
+        slot_hash, key_offset, value_offset, state = SLOT.unpack_from(self._map, self._table + idx * SLOT.size)
+        while state != EMPTY and x < capacity:
+            if state == DELETED:
+                if tombstone is None:
+                    tombstone = idx
+            elif slot_hash == hash and self._key_equals(key_offset, key):
+                self._garbage += self._record_size(value_offset)
+                value_offset = self._append(value)
+                SLOT.pack_into(self._map, self._table + idx * SLOT.size, hash, key_offset, value_offset, LIVE)
+                return
+            idx = (idx_initial + (x**2)) % capacity
+            x += 1
+            slot_hash, key_offset, value_offset, state = SLOT.unpack_from(self._map, self._table + idx * SLOT.size)
+
+        if tombstone is not None:
+            idx = tombstone
+            self._tombstones -= 1
+        # The value goes first, since it is the one that can be refused
+        value_offset = self._append(value)
+        key_offset = self._append(key)
+        SLOT.pack_into(self._map, self._table + idx * SLOT.size, hash, key_offset, value_offset, LIVE)
+        self._size += 1
+
+    def _key_equals(self, offset: int, key: bytes) -> bool:
+        """
+        Returns True if the heap record at the given offset holds key.
+        """
+        start = offset + LENGTH.size
+        return LENGTH.unpack_from(self._map, offset)[0] == len(key) and \
+            self._map[start:start + len(key)] == key
+
+    def table_load(self) -> float:
+        """
+        Returns the load factor of the HashMap.
+        (Number of elements) / (Number of buckets).
+        Returns:
+            Load factor
+        """
+        return round(self._size / self._capacity, 2)
+
+    def empty_buckets(self) -> int:
+        """
+        Returns the number of empty buckets in the HashMap.
+        Buckets holding a tombstone are not empty.
+        """
+        return self._capacity - self._size - self._tombstones
+
+    def compact(self) -> None:
+        """
+        Rebuilds the table at the same capacity in a new file, dropping
+        every tombstone and all garbage.
+        """
+        self._rehash(self._capacity)
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Resizes the bucket array of the given HashMap.
+        The new capacity must be a prime number greater than the current
+        number of elements in the HashMap.
+        All key-value pairs are rehashed and copied into a new file.
+        Args:
+            new_capacity: New array length
+        Returns:
+            None
+        """
+        cap = new_capacity
+        if cap < self._size:
+            return
+
+        if not is_prime(cap):
+            cap = next_prime(cap)
+
+        self._rehash(grown_capacity(cap, self._size, 0.5))
+
+    def reserve(self, size: int) -> None:
+        """
+        Grows the table to the smallest prime capacity that holds the given
+        number of elements without resizing, so that loading a known number
+        of elements never triggers resize_table(). Never shrinks the table.
+        Args:
+            size: Number of elements to make room for
+        Returns:
+            None
+        """
+        cap = reserved_capacity(size, 0.5)
+        if cap > self._capacity:
+            self._rehash(cap)
+
+    def _rehash(self, capacity: int) -> None:
+        """
+        Copies every live pair into a new file, behind a new bucket array of
+        the given capacity, and moves it over the current file. Tombstones
+        and garbage are dropped, the cached hashes are reused, and no key
+        comparisons are made since every key is already unique. The old
+        mapping stays open while views into it are held.
+        Args:
+            capacity: New array length, assumed to be prime
+        Returns:
+            None
+        """
+        old, table = self._map, self._table
+        end = HEADER_SIZE + capacity * SLOT.size
+        length = end + self._heap_end - HEADER_SIZE - self._capacity * SLOT.size - self._garbage
+        directory, name = os.path.split(self._path)
+        fd, path = tempfile.mkstemp(prefix=name + '.', dir=directory)
+        m = None
+        try:
+            os.fchmod(fd, os.fstat(self._fd).st_mode & 0o7777)
+            os.ftruncate(fd, length)
+            m = mmap.mmap(fd, length)
+            for x in range(self._capacity):
+                hash, key_offset, value_offset, state = SLOT.unpack_from(old, table + x * SLOT.size)
+                if state != LIVE:
+                    continue
+
+                offsets = []
+                for offset in (key_offset, value_offset):
+                    size = LENGTH.size + LENGTH.unpack_from(old, offset)[0]
+                    m[end:end + size] = old[offset:offset + size]
+                    offsets.append(end)
+                    end += size
+
+                idx_initial = hash % capacity
+                idx = idx_initial
+                j = 1
+                while m[HEADER_SIZE + idx * SLOT.size + 24] != EMPTY:
+                    idx = (idx_initial + (j ** 2)) % capacity
+                    j += 1
+                SLOT.pack_into(m, HEADER_SIZE + idx * SLOT.size, hash, offsets[0], offsets[1], LIVE)
+
+            HEADER.pack_into(m, 0, MAGIC, capacity, self._size, 0, HEADER_SIZE, end, 0,
+                             self._fingerprint)
+            m.flush()
+            os.replace(path, self._path)
+        except BaseException:
+            if m is not None:
+                m.close()
+            os.close(fd)
+            os.unlink(path)
+            raise
+
+        self._view.release()
+        try:
+            old.close()
+        except BufferError:
+            pass
+        os.close(self._fd)
+        self._fd, self._map, self._view = fd, m, memoryview(m)
+        self._table = HEADER_SIZE
+        self._heap_end = end
+        self._capacity = capacity
+        self._tombstones = 0
+        self._garbage = 0
+        self._full_at, self._compact_at = insert_limits(capacity, 0.5, self._tombstone_ratio)
+
+    def _collect(self) -> None:
+        """
+        Copies the live pairs into a new file once garbage fills half of the
+        heap.
+        """
+        if self._garbage >= MIN_GARBAGE and 2 * self._garbage > self._heap_end - HEADER_SIZE:
+            self._rehash(self._capacity)
+
+    def _find(self, key: bytes, hash: int) -> tuple:
+        """
+        Returns the slot holding the given encoded key, or None if the key
+        is not in the HashMap.
+        Args:
+            key: UTF-8 encoded key
+            hash: 64-bit hash of the key
+        Returns:
+            (index, key offset, value offset) if key found, else None
+        """
+        m, table, capacity = self._map, self._table, self._capacity
+        idx_initial = hash % capacity
+        idx = idx_initial
+        x = 1
+        slot_hash, key_offset, value_offset, state = SLOT.unpack_from(m, table + idx * SLOT.size)
+        while state != EMPTY and x < capacity:
+            if state == LIVE and slot_hash == hash and self._key_equals(key_offset, key):
+                return idx, key_offset, value_offset
+            idx = (idx_initial + (x**2)) % capacity
+            x += 1
+            slot_hash, key_offset, value_offset, state = SLOT.unpack_from(m, table + idx * SLOT.size)
+        return
+
+    def get(self, key: str) -> memoryview:
+        """
+        Returns a read-only view of the value associated with the given
+        key, else None. The value is not copied.
+        Args:
+            key: Key to find
+        Returns:
+            memoryview of the value if key found, else None
+        """
+        found = self._find(key.encode('utf-8', 'surrogatepass'), self._hash_function(key) & MASK_64)
+        if found is not None:
+            return self._read(found[2]).toreadonly()
+        return
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Returns True if the given key is in the HashMap, else False.
+        An empty HashMap returns False.
+        Args:
+            key: Key to find
+        Returns:
+            bool: True if found, else False
+        """
+        return self._find(key.encode('utf-8', 'surrogatepass'), self._hash_function(key) & MASK_64) is not None
+
+    def remove(self, key: str) -> None:
+        """
+        Remove the given key-value pair from the given HashMap.
+        If the key does not exist, this method does nothing.
+        Args:
+            key: Key-Value pair to be removed
+        Returns:
+            None
+        """
+        found = self._find(key.encode('utf-8', 'surrogatepass'), self._hash_function(key) & MASK_64)
+        if found is not None:
+            idx, key_offset, value_offset = found
+            self._map[self._table + idx * SLOT.size + 24] = DELETED
+            self._size -= 1
+            self._tombstones += 1
+            self._garbage += self._record_size(key_offset) + self._record_size(value_offset)
+            self._collect()
+            self._write_header()
+
+    def clear(self) -> None:
+        """
+        Clears the entire HashMap contents without changing the capacity,
+        and moves a new file with an empty table over the current one.
+        """
+        self._map[self._table:self._table + self._capacity * SLOT.size] = bytes(self._capacity * SLOT.size)
+        self._size = 0
+        self._tombstones = 0
+        self._garbage = self._heap_end - HEADER_SIZE - self._capacity * SLOT.size
+        self._write_header()
+        self._rehash(self._capacity)
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Returns a DynamicArray where each element is a tuple of (key,
+        value) pair from the given HashMap, with each value as a read-only
+        memoryview.
+        Returns:
+            target_da
+        """
+        target_da = DynamicArray()
+        for x in range(self._capacity):
+            hash, key_offset, value_offset, state = SLOT.unpack_from(self._map, self._table + x * SLOT.size)
+            if state == LIVE:
+                target_da.append((str(self._read(key_offset), 'utf-8', 'surrogatepass'),
+                                  self._read(value_offset).toreadonly()))
+        return target_da
+
+    def flush(self) -> None:
+        """
+        Writes every change made through the mapping back to the file.
+        """
+        self._map.flush()
+
+    def close(self) -> None:
+        """
+        Flushes the HashMap and closes its file. If views returned by get()
+        are still held, the mapping stays open until they are released.
+        """
+        self._map.flush()
+        self._view.release()
+        try:
+            self._map.close()
+        except BufferError:
+            pass
+        os.close(self._fd)
+
+    def __enter__(self) -> "HashMapMM":
+        """Return the HashMap for use in a with statement."""
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """Close the HashMap at the end of a with statement."""
+        self.close()
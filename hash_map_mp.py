@@ -0,0 +1,287 @@
+# This file implements a HashMap Class that spreads its keys over worker
+# processes, so that hashing and inserting a large batch runs on several
+# cores at once. Each worker owns a HashMapSC or HashMapOA shard and serves
+# requests sent over its own pipe. Batch operations are split by shard and
+# sent to every worker before any reply is read, so the workers run them in
+# parallel and each pays one round trip per batch instead of one per key.
+
+import multiprocessing
+from multiprocessing.reduction import ForkingPickler
+
+from GIVEN_DATA_STRUCTURES import (DynamicArray, hash_function_1)
+from hash_map_sc import HashMapSC
+from hash_functions import resolve
+
+
+def _serve(connection, map_class, capacity: int, function, seed: int, options: dict) -> None:
+    """
+    Runs in a worker process: builds the shard, then calls the requested
+    method of it for every (method name, args) request until it receives
+    None. Replies are ('ok', result) or ('error', exception).
+    """
+    try:
+        shard = map_class(capacity, function, seed=seed, **options)
+    except Exception as error:
+        connection.send(('error', error))
+        return
+    connection.send(('ok', None))
+
+    while True:
+        request = connection.recv()
+        if request is None:
+            break
+        method, args = request
+        try:
+            result = getattr(shard, method)(*args)
+        except Exception as error:
+            connection.send(('error', error))
+            continue
+        if isinstance(result, DynamicArray):
+            result = result.raw()
+        connection.send(('ok', result))
+    connection.close()
+
+
+class HashMapMP:
+    def __init__(self, shards: int = 4, map_class=HashMapSC, capacity: int = 11,
+                 function: callable = hash_function_1, seed: int = None, **options) -> None:
+        """
+        Initialize new HashMap that starts one worker process per shard,
+        each holding a map_class of the given capacity. Keys are assigned to
+        shards by the builtin hash() in this process, and each shard hashes
+        them again with function. Keys and values must be picklable, and so
+        must function unless it is the name of a seeded hash function.
+        Other keyword arguments are passed on to map_class.
+        """
+        # Checked here, so that a bad seed is not only found in the workers
+        hash_function = resolve(function, seed)
+        if isinstance(function, str):
+            # Every shard gets the same seed
+            seed = hash_function.seed
+
+        self._connections = []
+        self._workers = []
+        for _ in range(shards):
+            connection, worker_connection = multiprocessing.Pipe()
+            worker = multiprocessing.Process(
+                target=_serve, args=(worker_connection, map_class, capacity, function, seed, options),
+                daemon=True)
+            worker.start()
+            worker_connection.close()
+            self._connections.append(connection)
+            self._workers.append(worker)
+
+        try:
+            self._gather(self._connections)
+        except Exception:
+            self.close()
+            raise
+
+    def _shard(self, key) -> int:
+        """
+        Returns the index of the shard that holds the given key.
+        """
+        return hash(key) % len(self._connections)
+
+    def _gather(self, connections) -> list:
+        """
+        Reads one reply from each of the given connections, in order, and
+        raises the first error a worker replied with after reading them all.
+        """
+        replies = [connection.recv() for connection in connections]
+        for status, result in replies:
+            if status == 'error':
+                raise result
+        return [result for status, result in replies]
+
+    def _call(self, key, method: str, *args) -> object:
+        """
+        Calls the given method on the shard of key and returns its result.
+        """
+        connection = self._connections[self._shard(key)]
+        connection.send((method, (key,) + args))
+        return self._gather([connection])[0]
+
+    def _scatter(self, method: str, batches: list) -> list:
+        """
+        Sends each shard its batch, skipping empty ones, and returns the
+        replies as a list indexed by shard, with None for skipped shards.
+        Every batch is pickled before any is sent, so a batch that cannot
+        be pickled fails the call without reaching any shard. If sending
+        fails anyway, the replies of the shards already sent to are read
+        before raising, so that later calls read their own replies.
+        """
+        busy = [x for x, batch in enumerate(batches) if batch]
+        requests = [ForkingPickler.dumps((method, (batches[x],))) for x in busy]
+        for sent, x in enumerate(busy):
+            try:
+                self._connections[x].send_bytes(requests[sent])
+            except Exception:
+                for connection in [self._connections[y] for y in busy[:sent]]:
+                    connection.recv()
+                raise
+        results = [None] * len(batches)
+        for x, result in zip(busy, self._gather([self._connections[x] for x in busy])):
+            results[x] = result
+        return results
+
+    def _broadcast(self, method: str) -> list:
+        """
+        Calls the given method without arguments on every shard and returns
+        the results in shard order.
+        """
+        for connection in self._connections:
+            connection.send((method, ()))
+        return self._gather(self._connections)
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return sum(self._broadcast('get_size'))
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map, the total over all shards
+        """
+        return sum(self._broadcast('get_capacity'))
+
+    # ------------------------------------------------------------------ #
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Updates the key-value pair in the given HashMap.
+        If the key already exists, only the value is updated.
+        Takes a round trip to one worker, so loading many pairs should use
+        put_many().
+        Args:
+            key
+            value
+        Returns:
+            None
+        """
+        self._call(key, 'put', value)
+
+    def get(self, key: str) -> object:
+        """
+        Returns the value associated with the given key, else None.
+        Args:
+            key: Key to find
+        Returns:
+            Value if key found, else None
+        """
+        return self._call(key, 'get')
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Returns True if the given key is in the HashMap, else False.
+        Args:
+            key: Key to find
+        Returns:
+            bool: True if found, else False
+        """
+        return self._call(key, 'contains_key')
+
+    def remove(self, key: str) -> None:
+        """
+        Remove the given key-value pair from the given HashMap.
+        If the key does not exist, this method does nothing.
+        Args:
+            key: Key-value pair to be removed
+        Returns:
+            None
+        """
+        self._call(key, 'remove')
+
+    def clear(self) -> None:
+        """
+        Clears every shard without changing its capacity.
+        """
+        self._broadcast('clear')
+
+    def put_many(self, pairs) -> None:
+        """
+        Puts every (key, value) pair in the given iterable. Pairs are split
+        by shard, keeping their order within each shard, and the shards put
+        their pairs in parallel.
+        Args:
+            pairs: Iterable of (key, value) tuples
+        Returns:
+            None
+        """
+        batches = [[] for _ in self._connections]
+        shards = len(batches)
+        for pair in pairs:
+            batches[hash(pair[0]) % shards].append(pair)
+        self._scatter('put_many', batches)
+
+    def get_many(self, keys) -> DynamicArray:
+        """
+        Returns a DynamicArray with the value of every given key, in input
+        order, with None for keys that are not in the HashMap. The shards
+        look up their keys in parallel.
+        Args:
+            keys: Iterable of keys to find
+        Returns:
+            target_da
+        """
+        keys = list(keys)
+        shards = len(self._connections)
+        owners = [hash(key) % shards for key in keys]
+        batches = [[] for _ in range(shards)]
+        for key, owner in zip(keys, owners):
+            batches[owner].append(key)
+
+        results = [iter(values) if values is not None else None
+                   for values in self._scatter('get_many', batches)]
+        return DynamicArray([next(results[owner]) for owner in owners])
+
+    def remove_many(self, keys) -> None:
+        """
+        Removes every given key from the HashMap.
+        Keys that do not exist are skipped.
+        Args:
+            keys: Iterable of keys to remove
+        Returns:
+            None
+        """
+        batches = [[] for _ in self._connections]
+        shards = len(batches)
+        for key in keys:
+            batches[hash(key) % shards].append(key)
+        self._scatter('remove_many', batches)
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Returns a DynamicArray where each element is a tuple of (key,
+        value) pair from the given HashMap, gathered from every shard.
+        Returns:
+            target_da
+        """
+        target_da = DynamicArray()
+        for pairs in self._broadcast('get_keys_and_values'):
+            for pair in pairs:
+                target_da.append(pair)
+        return target_da
+
+    def close(self) -> None:
+        """
+        Stops every worker process. The HashMap cannot be used afterwards.
+        """
+        for connection in self._connections:
+            try:
+                connection.send(None)
+            except OSError:
+                # The worker has already exited
+                pass
+            connection.close()
+        for worker in self._workers:
+            worker.join()
+
+    def __enter__(self) -> "HashMapMP":
+        """Return the HashMap for use in a with statement."""
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """Stop the worker processes at the end of a with statement."""
+        self.close()
@@ -3,11 +3,18 @@
 # storage. Open addressing and quadratic probing is utilized to manage
 # collisions.
 
-from GIVEN_DATA_STRUCTURES import (DynamicArray, HashEntry, hash_function_1, hash_function_2)
+from GIVEN_DATA_STRUCTURES import (DynamicArray, HashEntry, TOMBSTONE, hash_function_1, hash_function_2)
+from hash_batch import hash_many
+from hash_functions import resolve
+from capacity import (GROW, grown_capacity, insert_action, insert_limits, is_prime, next_prime,
+                      reserved_capacity)
+from snapshot import (read_chunks, read_header, snapshot_header, write_snapshot)
+from views import (ItemsView, KeysView, MapIterator, ValuesView)
 
 
 class HashMapOA:
-    def __init__(self, capacity: int, function) -> None:
+    def __init__(self, capacity: int, function, tombstone_ratio: float = 0.2,
+                 migrate_step: int = 0, shrink_load: float = 0.0, seed: int = None) -> None:
         """
         Initialize new HashMap that uses
         quadratic probing for collision resolution
@@ -16,13 +23,129 @@ class HashMapOA:
         self._buckets = DynamicArray()
 
         # capacity must be a prime number
-        self._capacity = self._next_prime(capacity)
+        self._capacity = next_prime(capacity)
         for _ in range(self._capacity):
             self._buckets.append(None)
 
-        self._hash_function = function
+        # A name from hash_functions.FAMILIES picks a seeded hash function,
+        # with a random seed unless one is given
+        self._hash_function = resolve(function, seed)
         self._size = 0
 
+        # Changes that add, remove or move entries, checked by iterators
+        self._mod_count = 0
+
+        # The table is compacted once tombstones fill this share of it
+        self._tombstone_ratio = tombstone_ratio
+        self._tombstones = 0
+        # put() grows or compacts the table once live entries and tombstones
+        # reach _full_at, or tombstones pass _compact_at
+        self._full_at, self._compact_at = insert_limits(self._capacity, 0.5, tombstone_ratio)
+
+        # The table shrinks once its load drops below this, or never if 0
+        if not 0 <= shrink_load < 0.5:
+            raise ValueError('shrink_load must be below the load limit of 0.5')
+        self._shrink_load = shrink_load
+
+        # Old slots moved per operation while resizing, or 0 to move every
+        # slot as soon as the table resizes
+        self._migrate_step = migrate_step
+        self._old_buckets = None
+        self._old_capacity = 0
+        self._migrate_index = 0
+
+    @classmethod
+    def from_pairs(cls, pairs, expected_size: int = None,
+                   function: callable = hash_function_1, seed: int = None) -> "HashMapOA":
+        """
+        Returns a new HashMap holding the given (key, value) pairs. The table
+        is reserved for expected_size elements up front, or for the number
+        of pairs if no size is given, so the load itself never resizes.
+        Args:
+            pairs: Iterable of (key, value) tuples
+            expected_size: Number of distinct keys in pairs
+            function: Hash function, or the name of a seeded hash function
+            seed: Seed for a named function, random if None
+        Returns:
+            New HashMapOA
+        """
+        pairs = list(pairs)
+        m = cls(11, function, seed=seed)
+        m.reserve(len(pairs) if expected_size is None else expected_size)
+        m.put_many(pairs)
+        return m
+
+    def save(self, path: str) -> None:
+        """
+        Writes the HashMap to a binary snapshot at path, with its capacity,
+        options and the cached hash of every key, so that load() can
+        rebuild the table without hashing or resizing. Tombstones are not
+        written.
+        Args:
+            path: File to write
+        Returns:
+            None
+        """
+        buckets = self._buckets.raw()
+        if self._old_buckets is not None:
+            # Entries not moved yet are still in the old table
+            buckets = buckets + self._old_buckets[self._migrate_index:]
+        options = {'tombstone_ratio': self._tombstone_ratio, 'migrate_step': self._migrate_step,
+                   'shrink_load': self._shrink_load}
+        write_snapshot(path, snapshot_header(self, 'HashMapOA', options),
+                       ((entry.hash, entry.key, entry.value) for entry in buckets
+                        if entry is not None and not entry.is_tombstone))
+
+    @classmethod
+    def load(cls, path: str, function: callable = hash_function_1, seed: int = None) -> "HashMapOA":
+        """
+        Returns a new HashMap holding the pairs of the snapshot save() wrote
+        at path, with the saved capacity and options. Entries are placed
+        straight into free slots instead of going through put(), and the
+        snapshot is read one chunk at a time. The cached hashes are reused
+        unless the snapshot was written with a different hash function.
+        Only load snapshots from trusted sources, since they are unpickled.
+        Args:
+            path: File to read
+            function: Hash function, or the name of a seeded hash function
+            seed: Seed for a named function, the saved seed if None
+        Returns:
+            New HashMapOA
+        """
+        with open(path, 'rb') as file:
+            header = read_header(file, 'HashMapOA')
+            if seed is None and isinstance(function, str):
+                seed = header['seed']
+            m = cls(header['capacity'], function, seed=seed, **header['options'])
+            buckets, capacity = m._buckets.raw(), m._capacity
+            for hashes, keys, values in read_chunks(file, header, m):
+                for hash, key, value in zip(hashes, keys, values):
+                    m._load_entry(buckets, capacity, key, value, hash)
+            m._size = header['size']
+        return m
+
+    def _load_entry(self, buckets: list, capacity: int, key: str, value: object, hash: int) -> None:
+        """
+        Places a loaded entry, whose key is not in the table yet, in the
+        first free slot of its probe sequence. Subclasses that lay out their
+        table differently override this.
+        Args:
+            buckets: Raw bucket list without tombstones
+            capacity: Length of buckets
+            key
+            value
+            hash: Hash of the key
+        Returns:
+            None
+        """
+        idx_initial = hash % capacity
+        idx = idx_initial
+        j = 1
+        while buckets[idx] is not None:
+            idx = (idx_initial + (j ** 2)) % capacity
+            j += 1
+        buckets[idx] = HashEntry(key, value, hash)
+
     def __str__(self) -> str:
         """
         Override string method to provide more readable output
@@ -33,39 +156,6 @@ class HashMapOA:
             out += str(i) + ': ' + str(self._buckets[i]) + '\n'
         return out
 
-    def _next_prime(self, capacity: int) -> int:
-        """
-        Increment from given number to find the closest prime number
-        NOT ORIGINAL
-        """
-        if capacity % 2 == 0:
-            capacity += 1
-
-        while not self._is_prime(capacity):
-            capacity += 2
-
-        return capacity
-
-    @staticmethod
-    def _is_prime(capacity: int) -> bool:
-        """
-        Determine if given integer is a prime number and return boolean
-        NOT ORIGINAL
-        """
-        if capacity == 2 or capacity == 3:
-            return True
-
-        if capacity == 1 or capacity % 2 == 0:
-            return False
-
-        factor = 3
-        while factor ** 2 <= capacity:
-            if capacity % factor == 0:
-                return False
-            factor += 2
-
-        return True
-
     def get_size(self) -> int:
         """
         Return size of map
@@ -80,6 +170,13 @@ class HashMapOA:
         """
         return self._capacity
 
+    def _hash_keys(self, keys) -> list:
+        """
+        Returns the hash of every key in the given batch in input order,
+        using the vectorized batch hash where possible.
+        """
+        return hash_many(self._hash_function, keys)
+
     # ------------------------------------------------------------------ #
 
     def put(self, key: str, value: object) -> None:
@@ -92,27 +189,65 @@ class HashMapOA:
         Returns:
             None
         """
-        if self.table_load() >= 0.5:
-            self.resize_table(2 * self._capacity)
+        if self._old_buckets is not None:
+            self._migrate(self._migrate_step)
+
+        hash = self._hash_function(key)
+        if self._size + self._tombstones >= self._full_at or self._tombstones > self._compact_at:
+            # Replacing a value must not move entries, so only a new key
+            # grows or compacts the table
+            entry = self._find(key, hash)
+            if entry:
+                entry.value = value
+                return
+            if insert_action(self._capacity, self._size, self._tombstones, 0.5,
+                             self._tombstone_ratio) == GROW:
+                self.resize_table(2 * self._capacity)
+            else:
+                self.compact()
+        elif self._old_buckets is not None:
+            idx = self._find_old_index(key, hash)
+            if idx is not None:
+                self._old_buckets[idx].value = value
+                return
+        self._insert(key, value, hash)
 
-        idx_initial = self._hash_function(key) % self._capacity
+    def _insert(self, key: str, value: object, hash: int) -> None:
+        """
+        Stores the key-value pair with its precomputed hash without
+        checking the load factor.
+        Args:
+            key
+            value
+            hash: Hash of the key
+        Returns:
+            None
+        """
+        buckets, capacity = self._buckets.raw(), self._capacity
+        idx_initial = hash % capacity
         idx = idx_initial
+        tombstone = None
         x = 1
-        while self._buckets[idx] is not None:
-            if self._buckets[idx].key == key and not self._buckets[idx].is_tombstone:
-                self._buckets[idx].value = value
-                return
-            elif self._buckets[idx].is_tombstone:
-                self._buckets[idx].key = key
-                self._buckets[idx].value = value
-                self._buckets[idx].is_tombstone = False
-                self._size += 1
+        entry = buckets[idx]
+        while entry is not None and x < capacity:
+            if entry.is_tombstone:
+                # Remember the first reusable slot, but keep probing in case
+                # the key is stored further along
+                if tombstone is None:
+                    tombstone = idx
+            elif entry.hash == hash and entry.key == key:
+                entry.value = value
                 return
-            idx = (idx_initial + (x**2)) % self._capacity
+            idx = (idx_initial + (x**2)) % capacity
             x += 1
+            entry = buckets[idx]
 
-        self._buckets[idx] = HashEntry(key, value)
+        if tombstone is not None:
+            idx = tombstone
+            self._tombstones -= 1
+        buckets[idx] = HashEntry(key, value, hash)
         self._size += 1
+        self._mod_count += 1
 
     def table_load(self) -> float:
         """
@@ -126,15 +261,28 @@ class HashMapOA:
     def empty_buckets(self) -> int:
         """
         Returns the number of empty buckets in the HashMap.
+        Buckets holding a tombstone are not empty.
         """
-        return self._capacity - self._size
+        return self._capacity - self._size - self._tombstones
+
+    def compact(self) -> None:
+        """
+        Rebuilds the table at the same capacity, dropping every tombstone.
+        If the HashMap was created with a migrate_step, the entries are
+        moved a few slots per operation instead.
+        """
+        if self._migrate_step:
+            self._begin_migration(self._capacity)
+        else:
+            self._rehash(self._capacity)
 
     def resize_table(self, new_capacity: int) -> None:
         """
         Resizes the underlying DynamicArray of the given HashMap.
         The new capacity must be a prime number greater than the current
         number of elements in the HashMap.
-        All key-value pairs are rehashed.
+        All key-value pairs are rehashed, either right away or a few slots
+        per operation if the HashMap was created with a migrate_step.
         Args:
             new_capacity: New DynamicArray length
         Returns:
@@ -144,32 +292,252 @@ class HashMapOA:
         if cap < self._size:
             return
 
-        while not self._is_prime(cap):
-            cap = self._next_prime(cap)
+        if not is_prime(cap):
+            cap = next_prime(cap)
 
-        key_value_da = self.get_keys_and_values()
-        self._capacity = cap
-        self.clear()
+        cap = grown_capacity(cap, self._size, 0.5)
+        if self._migrate_step:
+            self._begin_migration(cap)
+        else:
+            self._rehash(cap)
+
+    def reserve(self, size: int) -> None:
+        """
+        Grows the table to the smallest prime capacity that holds the given
+        number of elements without resizing, so that loading a known number
+        of elements never triggers resize_table(). Never shrinks the table.
+        Args:
+            size: Number of elements to make room for
+        Returns:
+            None
+        """
+        cap = reserved_capacity(size, 0.5)
+        if cap > self._capacity:
+            self._finish_migration()
+            self._rehash(cap)
 
-        for x in range(key_value_da.length()):
-            self.put(key_value_da[x][0], key_value_da[x][1])
+    def shrink_to_fit(self) -> None:
+        """
+        Shrinks the table to the smallest prime capacity that holds the
+        current elements without resizing. Never grows the table.
+        """
+        cap = reserved_capacity(self._size, 0.5)
+        if cap < self._capacity:
+            self.resize_table(cap)
 
-    def get(self, key: str) -> object:
+    def _shrink(self) -> None:
         """
-        Returns the value associated with the given key, else None.
+        Shrinks the table so that its load sits halfway between shrink_load
+        and the load limit, leaving room to add or remove many elements
+        before it resizes again. Does nothing if the table is already that
+        small.
+        """
+        cap = next_prime(int(2 * self._size / (self._shrink_load + 0.5)) + 1)
+        if cap < self._capacity:
+            self.resize_table(cap)
+
+    def _rehash(self, capacity: int) -> None:
+        """
+        Moves every live entry into a new bucket array of the given
+        capacity. Entries are reused rather than copied, their cached hashes
+        are reused, tombstones are dropped, and no key comparisons are made
+        since every key is already unique.
+        Args:
+            capacity: New DynamicArray length, assumed to be prime
+        Returns:
+            None
+        """
+        buckets = DynamicArray()
+        for _ in range(capacity):
+            buckets.append(None)
+
+        new_buckets = buckets.raw()
+        for entry in self._buckets.raw():
+            if entry is None or entry.is_tombstone:
+                continue
+
+            idx_initial = entry.hash % capacity
+            idx = idx_initial
+            j = 1
+            while new_buckets[idx] is not None:
+                idx = (idx_initial + (j ** 2)) % capacity
+                j += 1
+            new_buckets[idx] = entry
+
+        self._buckets = buckets
+        self._mod_count += 1
+        self._capacity = capacity
+        self._tombstones = 0
+        self._full_at, self._compact_at = insert_limits(capacity, 0.5, self._tombstone_ratio)
+
+    def _begin_migration(self, capacity: int) -> None:
+        """
+        Replaces the bucket array with an empty one of the given capacity and
+        keeps the current one as the old table, whose entries are moved over
+        by later operations. Any migration still in progress is finished
+        first.
+        Args:
+            capacity: New DynamicArray length, assumed to be prime
+        Returns:
+            None
+        """
+        self._finish_migration()
+        self._old_buckets, self._old_capacity = self._buckets.raw(), self._capacity
+        self._migrate_index = 0
+
+        self._buckets = DynamicArray([None] * capacity)
+        self._mod_count += 1
+        self._capacity = capacity
+        self._tombstones = 0
+        self._full_at, self._compact_at = insert_limits(capacity, 0.5, self._tombstone_ratio)
+
+    def _migrate(self, count: int) -> None:
+        """
+        Moves the entries in up to count old slots into the current table,
+        in slot order, and drops the old table once it is empty. Moved slots
+        are left as tombstones so that probes for the remaining old entries
+        still pass over them.
+        Args:
+            count: Number of old slots to move
+        Returns:
+            None
+        """
+        old = self._old_buckets
+        end = min(self._migrate_index + count, self._old_capacity)
+        for x in range(self._migrate_index, end):
+            entry = old[x]
+            if entry is not None and not entry.is_tombstone:
+                old[x] = TOMBSTONE
+                # The entry is moved rather than added
+                self._size -= 1
+                self._insert(entry.key, entry.value, entry.hash)
+
+        self._migrate_index = end
+        self._mod_count += 1
+        if end == self._old_capacity:
+            self._old_buckets = None
+
+    def _finish_migration(self) -> None:
+        """
+        Moves every remaining old entry into the current table.
+        """
+        if self._old_buckets is not None:
+            self._migrate(self._old_capacity)
+
+    def _find_old_index(self, key: str, hash: int) -> int:
+        """
+        Returns the old slot holding the given key, or None if the key is
+        not in the old table.
         Args:
             key: Key to find
+            hash: Hash of the key
         Returns:
-            Value if key found, else None
+            Slot index if key found, else None
         """
-        idx_initial = self._hash_function(key) % self._capacity
+        buckets, capacity = self._old_buckets, self._old_capacity
+        idx_initial = hash % capacity
         idx = idx_initial
         x = 1
-        while self._buckets[idx] is not None and x < self._capacity:
-            if self._buckets[idx].key == key and not self._buckets[idx].is_tombstone:
-                return self._buckets[idx].value
-            idx = (idx_initial + (x**2)) % self._capacity
+        entry = buckets[idx]
+        while entry is not None and x < capacity:
+            if entry.hash == hash and entry.key == key:
+                return idx
+            idx = (idx_initial + (x**2)) % capacity
             x += 1
+            entry = buckets[idx]
+        return
+
+    def _delete_old(self, key: str, hash: int) -> None:
+        """
+        Replaces the old entry holding the given key, if present, with the
+        shared tombstone.
+        Args:
+            key: Key to remove
+            hash: Hash of the key
+        Returns:
+            None
+        """
+        idx = self._find_old_index(key, hash)
+        if idx is not None:
+            self._old_buckets[idx] = TOMBSTONE
+            self._size -= 1
+            self._mod_count += 1
+
+    def _find_index(self, key: str, hash: int) -> int:
+        """
+        Returns the slot holding the given key, or None if the key is not in
+        the HashMap.
+        Args:
+            key: Key to find
+            hash: Hash of the key
+        Returns:
+            Slot index if key found, else None
+        """
+        buckets, capacity = self._buckets.raw(), self._capacity
+        idx_initial = hash % capacity
+        idx = idx_initial
+        x = 1
+        entry = buckets[idx]
+        while entry is not None and x < capacity:
+            # The shared tombstone's hash is None, so it never matches
+            if entry.hash == hash and entry.key == key:
+                return idx
+            idx = (idx_initial + (x**2)) % capacity
+            x += 1
+            entry = buckets[idx]
+        return
+
+    def _find(self, key: str, hash: int) -> HashEntry:
+        """
+        Returns the live entry holding the given key, or None if the key is
+        not in the HashMap.
+        Args:
+            key: Key to find
+            hash: Hash of the key
+        Returns:
+            HashEntry if key found, else None
+        """
+        idx = self._find_index(key, hash)
+        if idx is not None:
+            return self._buckets.raw()[idx]
+        if self._old_buckets is not None:
+            idx = self._find_old_index(key, hash)
+            if idx is not None:
+                return self._old_buckets[idx]
+        return
+
+    def _delete(self, key: str, hash: int) -> None:
+        """
+        Replaces the entry holding the given key, if present, with the
+        shared tombstone.
+        Args:
+            key: Key to remove
+            hash: Hash of the key
+        Returns:
+            None
+        """
+        idx = self._find_index(key, hash)
+        if idx is not None:
+            self._buckets.raw()[idx] = TOMBSTONE
+            self._size -= 1
+            self._mod_count += 1
+            self._tombstones += 1
+        elif self._old_buckets is not None:
+            self._delete_old(key, hash)
+
+    def get(self, key: str) -> object:
+        """
+        Returns the value associated with the given key, else None.
+        Args:
+            key: Key to find
+        Returns:
+            Value if key found, else None
+        """
+        if self._old_buckets is not None:
+            self._migrate(self._migrate_step)
+        entry = self._find(key, self._hash_function(key))
+        if entry:
+            return entry.value
         return
 
     def contains_key(self, key: str) -> bool:
@@ -181,15 +549,9 @@ class HashMapOA:
         Returns:
             bool: True if found, else False
         """
-        idx_initial = self._hash_function(key) % self._capacity
-        idx = idx_initial
-        x = 1
-        while self._buckets[idx] is not None and x < self._capacity:
-            if self._buckets[idx].key == key and not self._buckets[idx].is_tombstone:
-                return True
-            idx = (idx_initial + (x ** 2)) % self._capacity
-            x += 1
-        return False
+        if self._old_buckets is not None:
+            self._migrate(self._migrate_step)
+        return self._find(key, self._hash_function(key)) is not None
 
     def remove(self, key: str) -> None:
         """
@@ -200,26 +562,24 @@ class HashMapOA:
         Returns:
             None
         """
-        idx_initial = self._hash_function(key) % self._capacity
-        idx = idx_initial
-        x = 1
-        while self._buckets[idx] is not None and x < self._capacity:
-            if self._buckets[idx].key == key and not self._buckets[idx].is_tombstone:
-                self._buckets[idx].is_tombstone = True
-                self._size -= 1
-                return
-            idx = (idx_initial + (x**2)) % self._capacity
-            x += 1
-        return
+        if self._old_buckets is not None:
+            self._migrate(self._migrate_step)
+        size = self._size
+        self._delete(key, self._hash_function(key))
+        if self._size < size and self._size < self._shrink_load * self._capacity:
+            self._shrink()
 
     def clear(self) -> None:
         """
         Clears the entire HashMap contents without changing the capacity.
         """
         self._buckets = DynamicArray()
+        self._mod_count += 1
         for x in range(self._capacity):
             self._buckets.append(None)
         self._size = 0
+        self._tombstones = 0
+        self._old_buckets = None
 
     def get_keys_and_values(self) -> DynamicArray:
         """
@@ -229,35 +589,121 @@ class HashMapOA:
             target_da
         """
         target_da = DynamicArray()
-        for x in range(self._capacity):
-            if self._buckets[x] is not None and not self._buckets[x].is_tombstone:
-                target_tuple = self._buckets[x].key, self._buckets[x].value
+        buckets = self._buckets.raw()
+        if self._old_buckets is not None:
+            # Entries not moved yet are still in the old table
+            buckets = buckets + self._old_buckets[self._migrate_index:]
+        for entry in buckets:
+            if entry is not None and not entry.is_tombstone:
+                target_tuple = entry.key, entry.value
                 target_da.append(target_tuple)
         return target_da
 
-    def __iter__(self):
+    def put_many(self, pairs) -> None:
+        """
+        Puts every (key, value) pair in the given iterable, in order.
+        All keys are hashed up front, and the load factor is only checked
+        before adding a new key, by the same rules as in put(). If the table
+        has to grow or be compacted, it is rebuilt once for the case where
+        every remaining key is new. Any resize still in progress is finished
+        first.
+        Args:
+            pairs: Iterable of (key, value) tuples
+        Returns:
+            None
+        """
+        pairs = list(pairs)
+        hashes = self._hash_keys([pair[0] for pair in pairs])
+        self._finish_migration()
+
+        for x, hash in enumerate(hashes):
+            key, value = pairs[x]
+            if self._size + self._tombstones >= self._full_at or self._tombstones > self._compact_at:
+                entry = self._find(key, hash)
+                if entry:
+                    entry.value = value
+                    continue
+
+                capacity = self._capacity
+                if insert_action(capacity, self._size, self._tombstones, 0.5,
+                                 self._tombstone_ratio) == GROW:
+                    capacity = next_prime(2 * capacity)
+                self._rehash(grown_capacity(capacity, self._size + len(pairs) - x, 0.5))
+
+            self._insert(key, value, hash)
+
+    def get_many(self, keys) -> DynamicArray:
         """
-        Return the iterator.
+        Returns a DynamicArray with the value of every given key, in input
+        order, with None for keys that are not in the HashMap.
+        Args:
+            keys: Iterable of keys to find
+        Returns:
+            target_da
+        """
+        keys = list(keys)
+        hashes = self._hash_keys(keys)
+        if self._old_buckets is not None:
+            self._migrate(self._migrate_step * len(keys))
+
+        values = []
+        for key, hash in zip(keys, hashes):
+            entry = self._find(key, hash)
+            values.append(entry.value if entry else None)
+        return DynamicArray(values)
+
+    def remove_many(self, keys) -> None:
+        """
+        Removes every given key from the HashMap.
+        Keys that do not exist are skipped, and the table shrinks at most
+        once, after the last key.
+        Args:
+            keys: Iterable of keys to remove
+        Returns:
+            None
         """
-        self._index = 0
-        # Track number of elements to return
-        self._progress = self._capacity - self.empty_buckets()
+        keys = list(keys)
+        hashes = self._hash_keys(keys)
+        if self._old_buckets is not None:
+            self._migrate(self._migrate_step * len(keys))
 
-        return self
+        size = self._size
+        for key, hash in zip(keys, hashes):
+            self._delete(key, hash)
 
-    def __next__(self):
+        if self._size < size and self._size < self._shrink_load * self._capacity:
+            self._shrink()
+
+    def _live_entries(self):
         """
-        Obtain the next node and advance the iterator.
+        Yields every live entry in the current table. Used by MapIterator,
+        which finishes any resize in progress first.
         """
-        if self._progress <= 0:
-            raise StopIteration
+        for entry in self._buckets.raw():
+            if entry is not None and not entry.is_tombstone:
+                yield entry
 
-        self._index += 1
+    def __iter__(self) -> MapIterator:
+        """
+        Return a new iterator over the live entries of the HashMap.
+        """
+        return MapIterator(self)
+
+    def keys(self) -> KeysView:
+        """
+        Returns a view of the keys that iterates without copying them.
+        """
+        return KeysView(self)
 
-        # Find next active value
-        while self._buckets[self._index] is None or self._buckets[self._index].is_tombstone:
-            self._index += 1
+    def values(self) -> ValuesView:
+        """
+        Returns a view of the values that iterates without copying them.
+        """
+        return ValuesView(self)
 
-        # Update element tracker
-        self._progress -= 1
-        return self._buckets[self._index]
+    def items(self) -> ItemsView:
+        """
+        Returns a view of the (key, value) pairs that iterates without
+        building a DynamicArray of them.
+        """
+        return ItemsView(self)
@@ -0,0 +1,192 @@
+# This file implements a HashMap Class that can be used to
+# store key-value pairs. It is a variant of HashMapOA that manages
+# collisions with Robin Hood linear probing: every entry records how far it
+# sits from its home slot, lookups stop as soon as they pass entries closer
+# to home than themselves, and removal shifts later entries back instead of
+# leaving tombstones.
+
+from GIVEN_DATA_STRUCTURES import (DynamicArray, HashEntry)
+from hash_map_oa import HashMapOA
+from capacity import insert_limits
+
+
+class RobinHoodEntry(HashEntry):
+
+    __slots__ = ('distance',)
+
+    def __init__(self, key: str, value: object, hash: int, distance: int = 0) -> None:
+        """Initialize an entry that records its distance from its home slot."""
+        super().__init__(key, value, hash)
+        self.distance = distance
+
+
+class HashMapRH(HashMapOA):
+    def _insert(self, key: str, value: object, hash: int) -> None:
+        """
+        Stores the key-value pair with its precomputed hash without
+        checking the load factor. The new entry takes the slot of any entry
+        that is closer to its home slot, and the displaced entry continues
+        probing in its place.
+        Args:
+            key
+            value
+            hash: Hash of the key
+        Returns:
+            None
+        """
+        buckets, capacity = self._buckets.raw(), self._capacity
+        idx = hash % capacity
+        distance = 0
+        entry = buckets[idx]
+        while entry is not None:
+            # A stored key is always found before any entry closer to home
+            if entry.distance < distance:
+                break
+            if entry.hash == hash and entry.key == key:
+                entry.value = value
+                return
+            idx = (idx + 1) % capacity
+            distance += 1
+            entry = buckets[idx]
+
+        self._place(buckets, capacity, RobinHoodEntry(key, value, hash), idx, distance)
+        self._size += 1
+        self._mod_count += 1
+
+    @staticmethod
+    def _place(buckets: list, capacity: int, entry: RobinHoodEntry,
+               idx: int = None, distance: int = 0) -> None:
+        """
+        Places an entry whose key is not in the table, starting at the given
+        slot and distance, and moves displaced entries further along until
+        one reaches an empty slot.
+        Args:
+            buckets: Raw bucket list to place the entry in
+            capacity: Length of buckets
+            entry: Entry to place
+            idx: Slot to start from, defaults to the entry's home slot
+            distance: Distance of idx from the entry's home slot
+        Returns:
+            None
+        """
+        if idx is None:
+            idx = entry.hash % capacity
+        while True:
+            current = buckets[idx]
+            if current is None:
+                entry.distance = distance
+                buckets[idx] = entry
+                return
+            if current.distance < distance:
+                entry.distance = distance
+                buckets[idx] = entry
+                entry, distance = current, current.distance
+            idx = (idx + 1) % capacity
+            distance += 1
+
+    def _load_entry(self, buckets: list, capacity: int, key: str, value: object, hash: int) -> None:
+        """
+        Places a loaded entry, whose key is not in the table yet, by Robin
+        Hood probing.
+        """
+        self._place(buckets, capacity, RobinHoodEntry(key, value, hash))
+
+    def _rehash(self, capacity: int) -> None:
+        """
+        Moves every entry into a new bucket array of the given capacity.
+        Entries and their cached hashes are reused, and no key comparisons
+        are made since every key is already unique.
+        Args:
+            capacity: New DynamicArray length, assumed to be prime
+        Returns:
+            None
+        """
+        buckets = DynamicArray()
+        for _ in range(capacity):
+            buckets.append(None)
+
+        new_buckets = buckets.raw()
+        for entry in self._buckets.raw():
+            if entry is not None:
+                self._place(new_buckets, capacity, entry)
+
+        self._buckets = buckets
+        self._mod_count += 1
+        self._capacity = capacity
+        self._full_at, self._compact_at = insert_limits(capacity, 0.5, self._tombstone_ratio)
+
+    def _find_index(self, key: str, hash: int) -> int:
+        """
+        Returns the slot holding the given key, or None if the key is not in
+        the HashMap. The search stops at the first entry that is closer to
+        its home slot than the key would be.
+        Args:
+            key: Key to find
+            hash: Hash of the key
+        Returns:
+            Slot index if key found, else None
+        """
+        buckets, capacity = self._buckets.raw(), self._capacity
+        idx = hash % capacity
+        distance = 0
+        entry = buckets[idx]
+        while entry is not None:
+            if entry.distance < distance:
+                return
+            if entry.hash == hash and entry.key == key:
+                return idx
+            idx = (idx + 1) % capacity
+            distance += 1
+            entry = buckets[idx]
+        return
+
+    def _find_old_index(self, key: str, hash: int) -> int:
+        """
+        Returns the old slot holding the given key, or None if the key is
+        not in the old table. Moved and removed old entries are replaced by
+        tombstones, which have no distance, so the search runs to the first
+        empty slot instead of stopping early.
+        Args:
+            key: Key to find
+            hash: Hash of the key
+        Returns:
+            Slot index if key found, else None
+        """
+        buckets, capacity = self._old_buckets, self._old_capacity
+        idx = hash % capacity
+        entry = buckets[idx]
+        while entry is not None:
+            if entry.hash == hash and entry.key == key:
+                return idx
+            idx = (idx + 1) % capacity
+            entry = buckets[idx]
+        return
+
+    def _delete(self, key: str, hash: int) -> None:
+        """
+        Removes the given key, if present, by shifting every following
+        entry that is away from its home slot back by one.
+        Args:
+            key: Key to remove
+            hash: Hash of the key
+        Returns:
+            None
+        """
+        idx = self._find_index(key, hash)
+        if idx is None:
+            if self._old_buckets is not None:
+                self._delete_old(key, hash)
+            return
+
+        buckets, capacity = self._buckets.raw(), self._capacity
+        following = (idx + 1) % capacity
+        entry = buckets[following]
+        while entry is not None and entry.distance > 0:
+            entry.distance -= 1
+            buckets[idx] = entry
+            idx, following = following, (following + 1) % capacity
+            entry = buckets[following]
+
+        buckets[idx] = None
+        self._size -= 1
+        self._mod_count += 1
@@ -1,13 +1,124 @@
 # This file implements a HashMap Class that can be used to
 # store key-value pairs. A DynamicArray is used as the underlying data
-# storage, while a LinkedList is utilized to manage collisions.
+# storage, while a LinkedList is utilized to manage collisions. Chains that
+# grow long are kept as a SortedBucket instead, so that keys crafted to
+# collide cannot make lookups linear.
 
 
-from GIVEN_DATA_STRUCTURES import (DynamicArray, LinkedList, hash_function_1)
+from bisect import (bisect_left, bisect_right)
+
+from GIVEN_DATA_STRUCTURES import (DynamicArray, LinkedList, SLNode, hash_function_1)
+from hash_batch import hash_many
+from hash_functions import resolve
+from capacity import (fill_limit, grown_capacity, is_prime, next_prime, reserved_capacity)
+from snapshot import (read_chunks, read_header, snapshot_header, write_snapshot)
+from views import (ItemsView, KeysView, MapIterator, ValuesView)
+
+# Chains that reach this length are kept sorted by (hash, key), and switch
+# back to a LinkedList once they shrink to UNTREEIFY_LENGTH
+TREEIFY_LENGTH = 8
+UNTREEIFY_LENGTH = 6
+
+
+class SortedBucket:
+    """
+    Bucket that keeps its nodes sorted by (hash, key), so that finding a
+    key takes O(log n) comparisons even when every key has the same hash.
+    If an inserted key cannot be ordered against the others, the bucket
+    falls back to scanning its nodes.
+    Supported methods are: insert, insert_node, remove, contains, length, iterator
+    """
+
+    __slots__ = ('_keys', '_nodes', '_ordered')
+
+    def __init__(self, nodes=()) -> None:
+        """Initialize a bucket holding the given nodes."""
+        nodes = list(nodes)
+        self._ordered = True
+        try:
+            nodes.sort(key=lambda node: (node.hash, node.key))
+        except TypeError:
+            self._ordered = False
+        self._nodes = nodes
+        self._keys = [(node.hash, node.key) for node in nodes]
+
+    def __str__(self) -> str:
+        """Override string method to provide more readable output."""
+        return 'SORTED [' + ' -> '.join(str(node) for node in self._nodes) + ']'
+
+    def __iter__(self):
+        """Return an iterator over the nodes in (hash, key) order."""
+        return iter(self._nodes)
+
+    def _index(self, key: str, hash: int) -> int:
+        """
+        Return the index of the node with matching key and hash, or -1.
+        """
+        target = (hash, key)
+        keys = self._keys
+        if self._ordered:
+            try:
+                idx = bisect_left(keys, target)
+            except TypeError:
+                pass
+            else:
+                return idx if idx < len(keys) and keys[idx] == target else -1
+
+        for idx, entry in enumerate(keys):
+            if entry == target:
+                return idx
+        return -1
+
+    def insert(self, key: str, value: object, hash: int) -> None:
+        """Insert new node in (hash, key) order."""
+        self.insert_node(SLNode(key, value, None, hash))
+
+    def insert_node(self, node: SLNode) -> None:
+        """Insert an existing node in (hash, key) order without copying it."""
+        target = (node.hash, node.key)
+        idx = len(self._keys)
+        if self._ordered:
+            try:
+                idx = bisect_right(self._keys, target)
+            except TypeError:
+                self._ordered = False
+                idx = len(self._keys)
+        # Readers without a lock bisect _keys and then index _nodes, so
+        # _nodes grows first
+        self._nodes.insert(idx, node)
+        self._keys.insert(idx, target)
+
+    def remove(self, key: str, hash: int) -> bool:
+        """
+        Remove the node with matching key and hash.
+        Return True if removal was successful, False otherwise.
+        """
+        idx = self._index(key, hash)
+        if idx < 0:
+            return False
+        # Readers without a lock bisect _keys and then index _nodes, so
+        # _keys is never longer than _nodes
+        del self._keys[idx]
+        del self._nodes[idx]
+        return True
+
+    def contains(self, key: str, hash: int) -> SLNode:
+        """
+        Return node with matching key and hash, or None if no match.
+        """
+        idx = self._index(key, hash)
+        if idx < 0:
+            return
+        return self._nodes[idx]
+
+    def length(self) -> int:
+        """Return the number of nodes in the bucket."""
+        return len(self._nodes)
 
 
 class HashMapSC:
-    def __init__(self, capacity: int = 11, function: callable = hash_function_1) -> None:
+    def __init__(self, capacity: int = 11, function: callable = hash_function_1,
+                 migrate_step: int = 0, shrink_load: float = 0.0, seed: int = None) -> None:
         """
         Initialize new HashMap that uses
         separate chaining for collision resolution
@@ -16,55 +127,114 @@ class HashMapSC:
         self._buckets = DynamicArray()
 
         # capacity must be a prime number
-        self._capacity = self._next_prime(capacity)
+        self._capacity = next_prime(capacity)
         for _ in range(self._capacity):
             self._buckets.append(LinkedList())
 
-        self._hash_function = function
+        # A name from hash_functions.FAMILIES picks a seeded hash function,
+        # with a random seed unless one is given
+        self._hash_function = resolve(function, seed)
         self._size = 0
 
-    def __str__(self) -> str:
+        # Changes that add, remove or move nodes, checked by iterators
+        self._mod_count = 0
+
+        # Number of buckets of each chain length, ending at the longest chain
+        self._chain_counts = [self._capacity]
+        # put() resizes once the size reaches this
+        self._resize_at = fill_limit(self._capacity, 1.0)
+
+        # The table shrinks once its load drops below this, or never if 0
+        if not 0 <= shrink_load < 1.0:
+            raise ValueError('shrink_load must be below the load limit of 1.0')
+        self._shrink_load = shrink_load
+
+        # Old buckets moved per operation while resizing, or 0 to move every
+        # bucket as soon as the table resizes
+        self._migrate_step = migrate_step
+        self._old_buckets = None
+        self._old_capacity = 0
+        self._migrate_index = 0
+
+    @classmethod
+    def from_pairs(cls, pairs, expected_size: int = None,
+                   function: callable = hash_function_1, seed: int = None) -> "HashMapSC":
         """
-        Override string method to provide more readable output
-        NOT ORIGINAL
+        Returns a new HashMap holding the given (key, value) pairs. The table
+        is reserved for expected_size elements up front, or for the number
+        of pairs if no size is given, so the load itself never resizes.
+        Args:
+            pairs: Iterable of (key, value) tuples
+            expected_size: Number of distinct keys in pairs
+            function: Hash function, or the name of a seeded hash function
+            seed: Seed for a named function, random if None
+        Returns:
+            New HashMapSC
         """
-        out = ''
-        for i in range(self._buckets.length()):
-            out += str(i) + ': ' + str(self._buckets[i]) + '\n'
-        return out
+        pairs = list(pairs)
+        m = cls(function=function, seed=seed)
+        m.reserve(len(pairs) if expected_size is None else expected_size)
+        m.put_many(pairs)
+        return m
 
-    def _next_prime(self, capacity: int) -> int:
+    def save(self, path: str) -> None:
         """
-        Increment from given number and the find the closest prime number
-        NOT ORIGINAL
+        Writes the HashMap to a binary snapshot at path, with its capacity,
+        options and the cached hash of every key, so that load() can
+        rebuild the table without hashing or resizing.
+        Args:
+            path: File to write
+        Returns:
+            None
         """
-        if capacity % 2 == 0:
-            capacity += 1
-
-        while not self._is_prime(capacity):
-            capacity += 2
-
-        return capacity
+        buckets = self._buckets.raw()
+        if self._old_buckets is not None:
+            # Nodes not moved yet are still in the old table
+            buckets = buckets + self._old_buckets[self._migrate_index:]
+        options = {'migrate_step': self._migrate_step, 'shrink_load': self._shrink_load}
+        write_snapshot(path, snapshot_header(self, 'HashMapSC', options),
+                       ((node.hash, node.key, node.value) for bucket in buckets for node in bucket))
+
+    @classmethod
+    def load(cls, path: str, function: callable = hash_function_1, seed: int = None) -> "HashMapSC":
+        """
+        Returns a new HashMap holding the pairs of the snapshot save() wrote
+        at path, with the saved capacity and options. Nodes are linked
+        straight into their buckets instead of going through put(), and the
+        snapshot is read one chunk at a time. The cached hashes are reused
+        unless the snapshot was written with a different hash function.
+        Only load snapshots from trusted sources, since they are unpickled.
+        Args:
+            path: File to read
+            function: Hash function, or the name of a seeded hash function
+            seed: Seed for a named function, the saved seed if None
+        Returns:
+            New HashMapSC
+        """
+        with open(path, 'rb') as file:
+            header = read_header(file, 'HashMapSC')
+            if seed is None and isinstance(function, str):
+                seed = header['seed']
+            m = cls(header['capacity'], function, seed=seed, **header['options'])
+            buckets, capacity = m._buckets.raw(), m._capacity
+            for hashes, keys, values in read_chunks(file, header, m):
+                for hash, key, value in zip(hashes, keys, values):
+                    buckets[hash % capacity].insert(key, value, hash)
+            m._size = header['size']
+
+        m._count_chains()
+        m._sort_long_chains()
+        return m
 
-    @staticmethod
-    def _is_prime(capacity: int) -> bool:
+    def __str__(self) -> str:
         """
-        Determine if given integer is a prime number and return boolean
+        Override string method to provide more readable output
         NOT ORIGINAL
         """
-        if capacity == 2 or capacity == 3:
-            return True
-
-        if capacity == 1 or capacity % 2 == 0:
-            return False
-
-        factor = 3
-        while factor ** 2 <= capacity:
-            if capacity % factor == 0:
-                return False
-            factor += 2
-
-        return True
+        out = ''
+        for i in range(self._buckets.length()):
+            out += str(i) + ': ' + str(self._buckets[i]) + '\n'
+        return out
 
     def get_size(self) -> int:
         """
@@ -80,6 +250,13 @@ class HashMapSC:
         """
         return self._capacity
 
+    def _hash_keys(self, keys) -> list:
+        """
+        Returns the hash of every key in the given batch in input order,
+        using the vectorized batch hash where possible.
+        """
+        return hash_many(self._hash_function, keys)
+
     # ------------------------------------------------------------------ #
 
     def put(self, key: str, value: object) -> None:
@@ -93,17 +270,83 @@ class HashMapSC:
         Returns:
             None
         """
-        if self.table_load() >= 1.0:
-            self.resize_table(2 * self._capacity)
-
-        idx = self._hash_function(key) % self._capacity
-        target = self._buckets[idx].contains(key)
+        if self._old_buckets is not None:
+            self._migrate(self._migrate_step)
+        self._put(key, value, self._hash_function(key))
 
+    def _put(self, key: str, value: object, hash: int) -> None:
+        """
+        Updates the key-value pair with its precomputed hash, growing the
+        table before a new key takes it past its load limit.
+        Args:
+            key
+            value
+            hash: Hash of the key
+        Returns:
+            None
+        """
+        buckets, idx = self._buckets.raw(), hash % self._capacity
+        target = buckets[idx].contains(key, hash)
+        if target is None and self._old_buckets is not None:
+            target = self._find_old(key, hash)
         if target:
             target.value = value
-        else:
-            self._buckets[idx].insert(key, value)
-            self._size += 1
+            return
+
+        # Only a new key can take the table past its load limit
+        if self._size >= self._resize_at:
+            self.resize_table(2 * self._capacity)
+            buckets, idx = self._buckets.raw(), hash % self._capacity
+        buckets[idx].insert(key, value, hash)
+        self._chain_grew(buckets, idx)
+        self._size += 1
+        self._mod_count += 1
+
+    def _chain_grew(self, buckets: list, idx: int) -> None:
+        """
+        Records that the given bucket has just gained a node, and sorts its
+        chain once it reaches TREEIFY_LENGTH.
+        """
+        length = buckets[idx].length()
+        counts = self._chain_counts
+        counts[length - 1] -= 1
+        if length == len(counts):
+            counts.append(0)
+        counts[length] += 1
+
+        if length == TREEIFY_LENGTH and type(buckets[idx]) is LinkedList:
+            buckets[idx] = SortedBucket(buckets[idx])
+
+    def _chain_shrank(self, buckets: list, idx: int) -> None:
+        """
+        Records that the given bucket has just lost a node, and turns a
+        sorted chain back into a LinkedList once it shrinks to
+        UNTREEIFY_LENGTH.
+        """
+        length = buckets[idx].length()
+        counts = self._chain_counts
+        counts[length + 1] -= 1
+        counts[length] += 1
+        if not counts[-1]:
+            counts.pop()
+
+        if length == UNTREEIFY_LENGTH and type(buckets[idx]) is SortedBucket:
+            bucket = LinkedList()
+            for node in buckets[idx]:
+                bucket.insert_node(node)
+            buckets[idx] = bucket
+
+    def _count_chains(self) -> None:
+        """
+        Recounts the chain length of every bucket.
+        """
+        counts = [0]
+        for bucket in self._buckets.raw():
+            length = bucket.length()
+            while length >= len(counts):
+                counts.append(0)
+            counts[length] += 1
+        self._chain_counts = counts
 
     def empty_buckets(self) -> int:
         """
@@ -111,11 +354,26 @@ class HashMapSC:
         Returns:
             counter: Number of empty buckets
         """
-        counter = 0
-        for x in range(self._capacity):
-            if not self._buckets[x].length():
-                counter += 1
-        return counter
+        return self._chain_counts[0]
+
+    def stats(self) -> dict:
+        """
+        Returns the size, capacity, unrounded load factor, number of empty
+        buckets, longest chain, and the number of buckets of each chain
+        length, indexed by length. While a resize is in progress, the
+        bucket figures only describe the new table.
+        Returns:
+            dict of statistics
+        """
+        counts = self._chain_counts
+        return {
+            'size': self._size,
+            'capacity': self._capacity,
+            'load': self._size / self._capacity,
+            'empty_buckets': counts[0],
+            'longest_chain': len(counts) - 1,
+            'chain_lengths': tuple(counts),
+        }
 
     def table_load(self) -> float:
         """
@@ -130,16 +388,18 @@ class HashMapSC:
         """
         Clears the entire HashMap contents without changing the capacity.
         """
-        self._buckets = DynamicArray()
-        for x in range(self._capacity):
-            self._buckets.append(LinkedList())
+        self._buckets = DynamicArray([LinkedList() for _ in range(self._capacity)])
+        self._mod_count += 1
         self._size = 0
+        self._chain_counts = [self._capacity]
+        self._old_buckets = None
 
     def resize_table(self, new_capacity: int) -> None:
         """
         Resizes underlying DynamicArray of the given HashMap.
         The new capacity must be a prime number and greater than 1.
-        All key-value pairs are rehashed.
+        All key-value pairs are rehashed, either right away or a few buckets
+        per operation if the HashMap was created with a migrate_step.
         Args:
             new_capacity: New DynamicArray length
         Returns:
@@ -149,16 +409,158 @@ class HashMapSC:
         if cap < 1:
             return
 
-        while not self._is_prime(cap):
-            cap = self._next_prime(cap)
+        if not is_prime(cap):
+            cap = next_prime(cap)
+
+        cap = grown_capacity(cap, self._size, 1.0)
+        if self._migrate_step:
+            self._begin_migration(cap)
+        else:
+            self._rehash(cap)
+
+    def reserve(self, size: int) -> None:
+        """
+        Grows the table to the smallest prime capacity that holds the given
+        number of elements without resizing, so that loading a known number
+        of elements never triggers resize_table(). Never shrinks the table.
+        Args:
+            size: Number of elements to make room for
+        Returns:
+            None
+        """
+        cap = reserved_capacity(size, 1.0)
+        if cap > self._capacity:
+            self._finish_migration()
+            self._rehash(cap)
+
+    def shrink_to_fit(self) -> None:
+        """
+        Shrinks the table to the smallest prime capacity that holds the
+        current elements without resizing. Never grows the table.
+        """
+        cap = reserved_capacity(self._size, 1.0)
+        if cap < self._capacity:
+            self.resize_table(cap)
+
+    def _shrink(self) -> None:
+        """
+        Shrinks the table so that its load sits halfway between shrink_load
+        and the load limit, leaving room to add or remove many elements
+        before it resizes again. Does nothing if the table is already that
+        small.
+        """
+        cap = next_prime(int(2 * self._size / (self._shrink_load + 1.0)) + 1)
+        if cap < self._capacity:
+            self.resize_table(cap)
+
+    def _rehash(self, capacity: int) -> None:
+        """
+        Moves every existing node into a new bucket array of the given
+        capacity. Nodes are relinked rather than copied, their cached hashes
+        are reused, and no duplicate checks are made since every key is
+        already unique.
+        Args:
+            capacity: New DynamicArray length, assumed to be prime
+        Returns:
+            None
+        """
+        buckets = DynamicArray()
+        for _ in range(capacity):
+            buckets.append(LinkedList())
+
+        new_buckets = buckets.raw()
+        for bucket in self._buckets.raw():
+            for node in bucket:
+                new_buckets[node.hash % capacity].insert_node(node)
+
+        self._buckets = buckets
+        self._mod_count += 1
+        self._capacity = capacity
+        self._resize_at = fill_limit(capacity, 1.0)
+        self._count_chains()
+        self._sort_long_chains()
+
+    def _sort_long_chains(self) -> None:
+        """
+        Turns every LinkedList chain of at least TREEIFY_LENGTH nodes into a
+        SortedBucket, using the chain counts to skip tables without any.
+        """
+        if len(self._chain_counts) > TREEIFY_LENGTH:
+            buckets = self._buckets.raw()
+            for idx, bucket in enumerate(buckets):
+                if bucket.length() >= TREEIFY_LENGTH and type(bucket) is LinkedList:
+                    buckets[idx] = SortedBucket(bucket)
+
+    def _begin_migration(self, capacity: int) -> None:
+        """
+        Replaces the bucket array with an empty one of the given capacity and
+        keeps the current one as the old table, whose buckets are moved over
+        by later operations. Any migration still in progress is finished
+        first.
+        Args:
+            capacity: New DynamicArray length, assumed to be prime
+        Returns:
+            None
+        """
+        self._finish_migration()
+        self._old_buckets, self._old_capacity = self._buckets.raw(), self._capacity
+        self._migrate_index = 0
 
-        key_value_da = self.get_keys_and_values()
+        self._buckets = DynamicArray([LinkedList() for _ in range(capacity)])
+        self._mod_count += 1
+        self._capacity = capacity
+        self._resize_at = fill_limit(capacity, 1.0)
+        self._chain_counts = [capacity]
 
-        self._capacity = cap
-        self.clear()
+    def _migrate(self, count: int) -> None:
+        """
+        Moves the nodes of up to count old buckets into the current table,
+        in bucket order, and drops the old table once it is empty.
+        Args:
+            count: Number of old buckets to move
+        Returns:
+            None
+        """
+        old, buckets, capacity = self._old_buckets, self._buckets.raw(), self._capacity
+        end = min(self._migrate_index + count, self._old_capacity)
+        for x in range(self._migrate_index, end):
+            for node in old[x]:
+                idx = node.hash % capacity
+                buckets[idx].insert_node(node)
+                self._chain_grew(buckets, idx)
+            old[x] = None
+
+        self._migrate_index = end
+        self._mod_count += 1
+        if end == self._old_capacity:
+            self._old_buckets = None
+
+    def _finish_migration(self) -> None:
+        """
+        Moves every remaining old bucket into the current table.
+        """
+        if self._old_buckets is not None:
+            self._migrate(self._old_capacity)
 
-        for x in range(key_value_da.length()):
-            self.put(key_value_da[x][0], key_value_da[x][1])
+    def _old_bucket(self, hash: int) -> LinkedList:
+        """
+        Returns the old bucket the given hash maps to, or None if that
+        bucket has already been moved.
+        """
+        idx = hash % self._old_capacity
+        if idx < self._migrate_index:
+            return
+        return self._old_buckets[idx]
+
+    def _find_old(self, key: str, hash: int):
+        """
+        Returns the node holding the given key in the old table, or None if
+        it is not there.
+        """
+        bucket = self._old_bucket(hash)
+        if bucket is None:
+            return
+        return bucket.contains(key, hash)
 
     def get(self, key: str):
         """
@@ -168,8 +570,13 @@ class HashMapSC:
         Returns:
             target: Value if key found, else None
         """
-        idx = self._hash_function(key) % self._capacity
-        target = self._buckets[idx].contains(key)
+        if self._old_buckets is not None:
+            self._migrate(self._migrate_step)
+
+        hash = self._hash_function(key)
+        target = self._buckets.raw()[hash % self._capacity].contains(key, hash)
+        if target is None and self._old_buckets is not None:
+            target = self._find_old(key, hash)
         if target:
             return target.value
         return
@@ -183,9 +590,14 @@ class HashMapSC:
         Returns:
             bool: True if found, else False
         """
-        idx = self._hash_function(key) % self._capacity
-        if self._size == 0 or self._buckets[idx].contains(key) is None:
+        if self._size == 0:
             return False
+        if self._old_buckets is not None:
+            self._migrate(self._migrate_step)
+
+        hash = self._hash_function(key)
+        if self._buckets.raw()[hash % self._capacity].contains(key, hash) is None:
+            return self._old_buckets is not None and self._find_old(key, hash) is not None
         return True
 
     def remove(self, key: str) -> None:
@@ -197,11 +609,32 @@ class HashMapSC:
         Returns:
             None
         """
-        idx = self._hash_function(key) % self._capacity
+        if self._old_buckets is not None:
+            self._migrate(self._migrate_step)
+        self._remove(key, self._hash_function(key))
 
-        val = self._buckets[idx].remove(key)
+    def _remove(self, key: str, hash: int) -> None:
+        """
+        Removes the given key, if present, using its precomputed hash, and
+        shrinks the table if the removal takes its load below shrink_load.
+        Args:
+            key: Key to remove
+            hash: Hash of the key
+        Returns:
+            None
+        """
+        buckets, idx = self._buckets.raw(), hash % self._capacity
+        val = buckets[idx].remove(key, hash)
+        if val:
+            self._chain_shrank(buckets, idx)
+        elif self._old_buckets is not None:
+            bucket = self._old_bucket(hash)
+            val = bucket is not None and bucket.remove(key, hash)
         if val:
             self._size -= 1
+            self._mod_count += 1
+            if self._size < self._shrink_load * self._capacity:
+                self._shrink()
 
     def get_keys_and_values(self) -> DynamicArray:
         """
@@ -211,13 +644,152 @@ class HashMapSC:
             target_da
         """
         target_da = DynamicArray()
-        for x in range(self._capacity):
-            for node in self._buckets[x]:
+        buckets = self._buckets.raw()
+        if self._old_buckets is not None:
+            # Nodes not moved yet are still in the old table
+            buckets = buckets + self._old_buckets[self._migrate_index:]
+        for bucket in buckets:
+            for node in bucket:
                 target_tuple = node.key, node.value
                 if target_tuple[0] is not None:
                     target_da.append(target_tuple)
         return target_da
 
+    def _live_entries(self):
+        """
+        Yields every node in the current table. Used by MapIterator, which
+        finishes any resize in progress first.
+        """
+        for bucket in self._buckets.raw():
+            if type(bucket) is LinkedList:
+                # Following the links directly skips an iterator object
+                # per bucket and a method call per node
+                node = bucket._head
+                while node is not None:
+                    yield node
+                    node = node.next
+            else:
+                yield from bucket
+
+    def __iter__(self) -> MapIterator:
+        """
+        Return a new iterator over the nodes of the HashMap.
+        """
+        return MapIterator(self)
+
+    def keys(self) -> KeysView:
+        """
+        Returns a view of the keys that iterates without copying them.
+        """
+        return KeysView(self)
+
+    def values(self) -> ValuesView:
+        """
+        Returns a view of the values that iterates without copying them.
+        """
+        return ValuesView(self)
+
+    def items(self) -> ItemsView:
+        """
+        Returns a view of the (key, value) pairs that iterates without
+        building a DynamicArray of them.
+        """
+        return ItemsView(self)
+
+    def put_many(self, pairs) -> None:
+        """
+        Puts every (key, value) pair in the given iterable, in order.
+        All keys are hashed up front, and the load factor is only checked
+        before adding a new key. If the table has to grow, it grows once
+        for the case where every remaining key is new. Any resize still in
+        progress is finished first.
+        Args:
+            pairs: Iterable of (key, value) tuples
+        Returns:
+            None
+        """
+        pairs = list(pairs)
+        hashes = self._hash_keys([pair[0] for pair in pairs])
+        self._finish_migration()
+
+        capacity, buckets = self._capacity, self._buckets.raw()
+        limit = fill_limit(capacity, 1.0)
+        for x, hash in enumerate(hashes):
+            key, value = pairs[x]
+            idx = hash % capacity
+            target = buckets[idx].contains(key, hash)
+            if target:
+                target.value = value
+                continue
+
+            if self._size >= limit:
+                self._rehash(grown_capacity(capacity, self._size + len(pairs) - x, 1.0))
+                capacity, buckets = self._capacity, self._buckets.raw()
+                limit = fill_limit(capacity, 1.0)
+                idx = hash % capacity
+
+            buckets[idx].insert(key, value, hash)
+            self._chain_grew(buckets, idx)
+            self._size += 1
+            self._mod_count += 1
+
+    def get_many(self, keys) -> DynamicArray:
+        """
+        Returns a DynamicArray with the value of every given key, in input
+        order, with None for keys that are not in the HashMap.
+        Args:
+            keys: Iterable of keys to find
+        Returns:
+            target_da
+        """
+        keys = list(keys)
+        hashes = self._hash_keys(keys)
+        if self._old_buckets is not None:
+            self._migrate(self._migrate_step * len(keys))
+
+        capacity, buckets = self._capacity, self._buckets.raw()
+        migrating = self._old_buckets is not None
+        values = []
+        for key, hash in zip(keys, hashes):
+            target = buckets[hash % capacity].contains(key, hash)
+            if target is None and migrating:
+                target = self._find_old(key, hash)
+            values.append(target.value if target else None)
+        return DynamicArray(values)
+
+    def remove_many(self, keys) -> None:
+        """
+        Removes every given key from the HashMap.
+        Keys that do not exist are skipped, and the table shrinks at most
+        once, after the last key.
+        Args:
+            keys: Iterable of keys to remove
+        Returns:
+            None
+        """
+        keys = list(keys)
+        hashes = self._hash_keys(keys)
+        if self._old_buckets is not None:
+            self._migrate(self._migrate_step * len(keys))
+
+        capacity, buckets = self._capacity, self._buckets.raw()
+        migrating = self._old_buckets is not None
+        size = self._size
+        for key, hash in zip(keys, hashes):
+            idx = hash % capacity
+            removed = buckets[idx].remove(key, hash)
+            if removed:
+                self._chain_shrank(buckets, idx)
+            elif migrating:
+                bucket = self._old_bucket(hash)
+                removed = bucket is not None and bucket.remove(key, hash)
+            if removed:
+                self._size -= 1
+                self._mod_count += 1
+
+        if self._size < size and self._size < self._shrink_load * self._capacity:
+            self._shrink()
+
 
 def find_mode(da: DynamicArray) -> tuple[DynamicArray, int]:
     """
@@ -0,0 +1,438 @@
+# This file implements a HashMap Class that can be used to
+# store key-value pairs. A DynamicArray is used as the underlying data
+# storage. Open addressing with a power of two capacity and triangular
+# probing is utilized to manage collisions. It has the same interface as
+# HashMapOA.
+
+from GIVEN_DATA_STRUCTURES import (DynamicArray, HashEntry, TOMBSTONE, hash_function_1)
+from hash_batch import hash_many
+from capacity import (GROW, grown_capacity, insert_action, insert_limits, next_power_of_two,
+                      reserved_capacity)
+
+MASK_64 = 0xFFFFFFFFFFFFFFFF
+
+
+def mix_hash(hash: int) -> int:
+    """
+    Spreads the bits of a hash over 64 bits with the MurmurHash3 finalizer,
+    so that masking off the low bits still depends on every input bit.
+    Args:
+        hash: Hash from the map's hash function
+    Returns:
+        Mixed 64-bit hash
+    """
+    hash &= MASK_64
+    hash ^= hash >> 33
+    hash = (hash * 0xFF51AFD7ED558CCD) & MASK_64
+    hash ^= hash >> 33
+    hash = (hash * 0xC4CEB9FE1A85EC53) & MASK_64
+    hash ^= hash >> 33
+    return hash
+
+
+class HashMapTP:
+    def __init__(self, capacity: int, function, tombstone_ratio: float = 0.2) -> None:
+        """
+        Initialize new HashMap that uses
+        triangular probing for collision resolution
+        """
+        self._buckets = DynamicArray()
+
+        # capacity must be a power of two
+        self._capacity = next_power_of_two(capacity)
+        for _ in range(self._capacity):
+            self._buckets.append(None)
+
+        self._hash_function = function
+        self._size = 0
+
+        # The table is compacted once tombstones fill this share of it
+        self._tombstone_ratio = tombstone_ratio
+        self._tombstones = 0
+        # put() grows or compacts the table once live entries and tombstones
+        # reach _full_at, or tombstones pass _compact_at
+        self._full_at, self._compact_at = insert_limits(self._capacity, 0.5, tombstone_ratio)
+
+    @classmethod
+    def from_pairs(cls, pairs, expected_size: int = None,
+                   function: callable = hash_function_1) -> "HashMapTP":
+        """
+        Returns a new HashMap holding the given (key, value) pairs. The table
+        is reserved for expected_size elements up front, or for the number
+        of pairs if no size is given, so the load itself never resizes.
+        Args:
+            pairs: Iterable of (key, value) tuples
+            expected_size: Number of distinct keys in pairs
+            function: Hash function
+        Returns:
+            New HashMapTP
+        """
+        pairs = list(pairs)
+        m = cls(1, function)
+        m.reserve(len(pairs) if expected_size is None else expected_size)
+        m.put_many(pairs)
+        return m
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        out = ''
+        for i in range(self._buckets.length()):
+            out += str(i) + ': ' + str(self._buckets[i]) + '\n'
+        return out
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._capacity
+
+    def _hash_keys(self, keys) -> list:
+        """
+        Returns the mixed hash of every key in the given batch in input
+        order, using the vectorized batch hash where possible.
+        """
+        return [mix_hash(hash) for hash in hash_many(self._hash_function, keys)]
+
+    # ------------------------------------------------------------------ #
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Updates the key-value pair in the given HashMap.
+        If the key already exists, only the value is updated.
+        Args:
+            key
+            value
+        Returns:
+            None
+        """
+        hash = mix_hash(self._hash_function(key))
+        if self._size + self._tombstones >= self._full_at or self._tombstones > self._compact_at:
+            entry = self._find(key, hash)
+            if entry:
+                entry.value = value
+                return
+            if insert_action(self._capacity, self._size, self._tombstones, 0.5,
+                             self._tombstone_ratio) == GROW:
+                self.resize_table(2 * self._capacity)
+            else:
+                self.compact()
+
+        self._insert(key, value, hash)
+
+    def _insert(self, key: str, value: object, hash: int) -> None:
+        """
+        Stores the key-value pair with its precomputed mixed hash without
+        checking the load factor. A new key takes the first tombstone on its
+        probe sequence, if any.
+        Args:
+            key
+            value
+            hash: Mixed hash of the key
+        Returns:
+            None
+        """
+        buckets, capacity = self._buckets.raw(), self._capacity
+        mask = capacity - 1
+        idx = hash & mask
+        tombstone = None
+        x = 1
+        entry = buckets[idx]
+        while entry is not None and x <= capacity:
+            if entry.is_tombstone:
+                if tombstone is None:
+                    tombstone = idx
+            elif entry.hash == hash and entry.key == key:
+                entry.value = value
+                return
+            # Adding 1, 2, 3... visits every slot of a power of two table
+            idx = (idx + x) & mask
+            x += 1
+            entry = buckets[idx]
+
+        if tombstone is not None:
+            idx = tombstone
+            self._tombstones -= 1
+        buckets[idx] = HashEntry(key, value, hash)
+        self._size += 1
+
+    def table_load(self) -> float:
+        """
+        Returns the load factor of the HashMap.
+        (Number of elements) / (Number of buckets).
+        Returns:
+            Load factor
+        """
+        return round(self._size / self._capacity, 2)
+
+    def empty_buckets(self) -> int:
+        """
+        Returns the number of empty buckets in the HashMap.
+        Buckets holding a tombstone are not empty.
+        """
+        return self._capacity - self._size - self._tombstones
+
+    def compact(self) -> None:
+        """
+        Rebuilds the table at the same capacity, dropping every tombstone.
+        """
+        self._rehash(self._capacity)
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Resizes the underlying DynamicArray of the given HashMap.
+        The new capacity is rounded up to a power of two and must be
+        greater than the current number of elements in the HashMap.
+        All key-value pairs are rehashed.
+        Args:
+            new_capacity: New DynamicArray length
+        Returns:
+            None
+        """
+        if new_capacity < self._size:
+            return
+
+        cap = next_power_of_two(new_capacity)
+        self._rehash(grown_capacity(cap, self._size, 0.5, next_power_of_two))
+
+    def reserve(self, size: int) -> None:
+        """
+        Grows the table to the smallest power of two capacity that holds the
+        given number of elements without resizing, so that loading a known
+        number of elements never triggers resize_table(). Never shrinks the
+        table.
+        Args:
+            size: Number of elements to make room for
+        Returns:
+            None
+        """
+        cap = reserved_capacity(size, 0.5, next_power_of_two)
+        if cap > self._capacity:
+            self._rehash(cap)
+
+    def _rehash(self, capacity: int) -> None:
+        """
+        Moves every live entry into a new bucket array of the given
+        capacity. Entries and their cached hashes are reused, tombstones
+        are dropped, and no key comparisons are made since every key is
+        already unique.
+        Args:
+            capacity: New DynamicArray length, assumed to be a power of two
+        Returns:
+            None
+        """
+        buckets = DynamicArray()
+        for _ in range(capacity):
+            buckets.append(None)
+
+        new_buckets = buckets.raw()
+        mask = capacity - 1
+        for entry in self._buckets.raw():
+            if entry is None or entry.is_tombstone:
+                continue
+
+            idx = entry.hash & mask
+            j = 1
+            while new_buckets[idx] is not None:
+                idx = (idx + j) & mask
+                j += 1
+            new_buckets[idx] = entry
+
+        self._buckets = buckets
+        self._capacity = capacity
+        self._tombstones = 0
+        self._full_at, self._compact_at = insert_limits(capacity, 0.5, self._tombstone_ratio)
+
+    def _find_index(self, key: str, hash: int) -> int:
+        """
+        Returns the slot holding the given key, or None if the key is not in
+        the HashMap.
+        Args:
+            key: Key to find
+            hash: Mixed hash of the key
+        Returns:
+            Slot index if key found, else None
+        """
+        buckets, capacity = self._buckets.raw(), self._capacity
+        mask = capacity - 1
+        idx = hash & mask
+        x = 1
+        entry = buckets[idx]
+        while entry is not None and x <= capacity:
+            # The shared tombstone's hash is None, so it never matches
+            if entry.hash == hash and entry.key == key:
+                return idx
+            idx = (idx + x) & mask
+            x += 1
+            entry = buckets[idx]
+        return
+
+    def _find(self, key: str, hash: int) -> HashEntry:
+        """
+        Returns the live entry holding the given key, or None if the key is
+        not in the HashMap.
+        Args:
+            key: Key to find
+            hash: Mixed hash of the key
+        Returns:
+            HashEntry if key found, else None
+        """
+        idx = self._find_index(key, hash)
+        if idx is None:
+            return
+        return self._buckets.raw()[idx]
+
+    def _delete(self, key: str, hash: int) -> None:
+        """
+        Replaces the entry holding the given key, if present, with the
+        shared tombstone.
+        Args:
+            key: Key to remove
+            hash: Mixed hash of the key
+        Returns:
+            None
+        """
+        idx = self._find_index(key, hash)
+        if idx is not None:
+            self._buckets.raw()[idx] = TOMBSTONE
+            self._size -= 1
+            self._tombstones += 1
+
+    def get(self, key: str) -> object:
+        """
+        Returns the value associated with the given key, else None.
+        Args:
+            key: Key to find
+        Returns:
+            Value if key found, else None
+        """
+        entry = self._find(key, mix_hash(self._hash_function(key)))
+        if entry:
+            return entry.value
+        return
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Returns True if the given key is in the HashMap, else False.
+        An empty HashMap returns False.
+        Args:
+            key: Key to find
+        Returns:
+            bool: True if found, else False
+        """
+        return self._find(key, mix_hash(self._hash_function(key))) is not None
+
+    def remove(self, key: str) -> None:
+        """
+        Remove the given key-value pair from the given HashMap.
+        If the key does not exist, this method does nothing.
+        Args:
+            key: Key-Value pair to be removed
+        Returns:
+            None
+        """
+        self._delete(key, mix_hash(self._hash_function(key)))
+
+    def clear(self) -> None:
+        """
+        Clears the entire HashMap contents without changing the capacity.
+        """
+        self._buckets = DynamicArray()
+        for x in range(self._capacity):
+            self._buckets.append(None)
+        self._size = 0
+        self._tombstones = 0
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Returns a DynamicArray where each element is a tuple of (key,
+        value) pair from the given HashMap.
+        Returns:
+            target_da
+        """
+        target_da = DynamicArray()
+        for entry in self._buckets.raw():
+            if entry is not None and not entry.is_tombstone:
+                target_tuple = entry.key, entry.value
+                target_da.append(target_tuple)
+        return target_da
+
+    def put_many(self, pairs) -> None:
+        """
+        Puts every (key, value) pair in the given iterable, in order.
+        All keys are hashed up front, and the load factor is only checked
+        before adding a new key, by the same rules as in put(). If the table
+        has to grow or be compacted, it is rebuilt once for the case where
+        every remaining key is new.
+        Args:
+            pairs: Iterable of (key, value) tuples
+        Returns:
+            None
+        """
+        pairs = list(pairs)
+        hashes = self._hash_keys([pair[0] for pair in pairs])
+
+        for x, hash in enumerate(hashes):
+            key, value = pairs[x]
+            if self._size + self._tombstones >= self._full_at or self._tombstones > self._compact_at:
+                entry = self._find(key, hash)
+                if entry:
+                    entry.value = value
+                    continue
+
+                capacity = self._capacity
+                if insert_action(capacity, self._size, self._tombstones, 0.5,
+                                 self._tombstone_ratio) == GROW:
+                    capacity = next_power_of_two(2 * capacity)
+                self._rehash(grown_capacity(capacity, self._size + len(pairs) - x,
+                                            0.5, next_power_of_two))
+
+            self._insert(key, value, hash)
+
+    def get_many(self, keys) -> DynamicArray:
+        """
+        Returns a DynamicArray with the value of every given key, in input
+        order, with None for keys that are not in the HashMap.
+        Args:
+            keys: Iterable of keys to find
+        Returns:
+            target_da
+        """
+        keys = list(keys)
+        hashes = self._hash_keys(keys)
+
+        values = []
+        for key, hash in zip(keys, hashes):
+            entry = self._find(key, hash)
+            values.append(entry.value if entry else None)
+        return DynamicArray(values)
+
+    def remove_many(self, keys) -> None:
+        """
+        Removes every given key from the HashMap.
+        Keys that do not exist are skipped.
+        Args:
+            keys: Iterable of keys to remove
+        Returns:
+            None
+        """
+        keys = list(keys)
+        hashes = self._hash_keys(keys)
+
+        for key, hash in zip(keys, hashes):
+            self._delete(key, hash)
+
+    def __iter__(self):
+        """
+        Return an iterator over the live entries.
+        """
+        for entry in self._buckets.raw():
+            if entry is not None and not entry.is_tombstone:
+                yield entry
@@ -0,0 +1,231 @@
+# This file implements optional instrumentation for HashMapSC and
+# HashMapOA. InstrumentedHashMapSC and InstrumentedHashMapOA are drop-in
+# subclasses that count the probes of every get(), put() and remove(), time
+# every resize, and report how keys are spread over the table. The plain
+# classes are not changed, so maps that are not instrumented pay nothing.
+
+import json
+import time
+
+from hash_map_sc import HashMapSC
+from hash_map_oa import HashMapOA
+
+OPERATIONS = ('get', 'put', 'remove')
+
+
+class Metrics:
+    """
+    Counters collected by an instrumented HashMap.
+    Probe counts are kept per operation as a histogram indexed by the
+    number of probes.
+    """
+
+    def __init__(self) -> None:
+        """Initialize empty counters."""
+        self.probe_lengths = {operation: [] for operation in OPERATIONS}
+        self.resizes = 0
+        self.resize_seconds = 0.0
+        self.max_resize_seconds = 0.0
+
+    def record(self, operation: str, probes: int) -> None:
+        """
+        Counts one operation that made the given number of probes.
+        """
+        lengths = self.probe_lengths[operation]
+        while probes >= len(lengths):
+            lengths.append(0)
+        lengths[probes] += 1
+
+    def record_resize(self, seconds: float) -> None:
+        """
+        Counts one resize that took the given number of seconds.
+        """
+        self.resizes += 1
+        self.resize_seconds += seconds
+        self.max_resize_seconds = max(self.max_resize_seconds, seconds)
+
+    def to_dict(self) -> dict:
+        """
+        Returns the counters as plain dicts, lists and numbers.
+        """
+        operations = {}
+        for operation, lengths in self.probe_lengths.items():
+            count = sum(lengths)
+            probes = sum(x * n for x, n in enumerate(lengths))
+            operations[operation] = {
+                'count': count,
+                'probes': probes,
+                'mean_probes': probes / count if count else 0.0,
+                'max_probes': len(lengths) - 1 if lengths else 0,
+                'probe_lengths': list(lengths),
+            }
+        return {
+            'operations': operations,
+            'resizes': {
+                'count': self.resizes,
+                'seconds': self.resize_seconds,
+                'max_seconds': self.max_resize_seconds,
+            },
+        }
+
+
+def _hash_collision_rate(hashes: list) -> float:
+    """
+    Returns the share of the given hashes that repeat an earlier one.
+    """
+    if not hashes:
+        return 0.0
+    return 1 - len(set(hashes)) / len(hashes)
+
+
+class Instrumented:
+    """
+    Mixin that records probes and resizes for a HashMap class. The map
+    class provides _probes(key, hash) and snapshot(). Batch operations are
+    not counted.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        """Initialize new HashMap with empty counters."""
+        super().__init__(*args, **kwargs)
+        self.metrics = Metrics()
+
+    def get(self, key: str) -> object:
+        """
+        Returns the value associated with the given key, else None.
+        """
+        self.metrics.record('get', self._probes(key, self._hash_function(key)))
+        return super().get(key)
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Updates the key-value pair in the given HashMap.
+        """
+        self.metrics.record('put', self._probes(key, self._hash_function(key)))
+        super().put(key, value)
+
+    def remove(self, key: str) -> None:
+        """
+        Remove the given key-value pair from the given HashMap.
+        """
+        self.metrics.record('remove', self._probes(key, self._hash_function(key)))
+        super().remove(key)
+
+    def _rehash(self, capacity: int) -> None:
+        """
+        Rehashes the table and records how long it took.
+        """
+        start = time.perf_counter()
+        super()._rehash(capacity)
+        self.metrics.record_resize(time.perf_counter() - start)
+
+    def _begin_migration(self, capacity: int) -> None:
+        """
+        Starts an incremental resize and records how long it took to start.
+        """
+        start = time.perf_counter()
+        super()._begin_migration(capacity)
+        self.metrics.record_resize(time.perf_counter() - start)
+
+    def to_json(self) -> str:
+        """
+        Returns snapshot() as a JSON string.
+        """
+        return json.dumps(self.snapshot())
+
+
+class InstrumentedHashMapSC(Instrumented, HashMapSC):
+    """
+    HashMapSC that records probes and resizes. A probe is one node
+    compared in the current table.
+    """
+
+    def _probes(self, key: str, hash: int) -> int:
+        """
+        Returns the number of nodes a lookup of key compares.
+        """
+        probes = 0
+        for node in self._buckets.raw()[hash % self._capacity]:
+            probes += 1
+            if node.hash == hash and node.key == key:
+                break
+        return probes
+
+    def snapshot(self) -> dict:
+        """
+        Returns the counters together with the shape of the table: the
+        number of buckets of each chain length, the share of keys that share
+        a bucket with an earlier key, and the share of keys whose hash
+        repeats an earlier key's hash. Takes O(n) time.
+        Returns:
+            dict of plain dicts, lists and numbers
+        """
+        stats = self.stats()
+        hashes = [node.hash for bucket in self._buckets.raw() for node in bucket]
+        size = len(hashes)
+        snapshot = self.metrics.to_dict()
+        snapshot.update({
+            'size': stats['size'],
+            'capacity': stats['capacity'],
+            'load': stats['load'],
+            'chain_lengths': list(stats['chain_lengths']),
+            'collision_rate': 1 - (stats['capacity'] - stats['empty_buckets']) / size if size else 0.0,
+            'hash_collision_rate': _hash_collision_rate(hashes),
+        })
+        return snapshot
+
+
+class InstrumentedHashMapOA(Instrumented, HashMapOA):
+    """
+    HashMapOA that records probes and resizes. A probe is one slot
+    inspected in the current table, and compactions count as resizes.
+    """
+
+    def _probes(self, key: str, hash: int) -> int:
+        """
+        Returns the number of slots a lookup of key inspects before it
+        finds the key or an empty slot.
+        """
+        buckets, capacity = self._buckets.raw(), self._capacity
+        idx_initial = hash % capacity
+        x = 0
+        while x < capacity:
+            entry = buckets[(idx_initial + x ** 2) % capacity]
+            x += 1
+            if entry is None or (entry.hash == hash and entry.key == key):
+                break
+        return x
+
+    def snapshot(self) -> dict:
+        """
+        Returns the counters together with the shape of the table: the
+        number of live entries at each probe distance from their home slot,
+        the tombstone count, the share of keys that are not in their home
+        slot, and the share of keys whose hash repeats an earlier key's
+        hash. Takes O(n) time.
+        Returns:
+            dict of plain dicts, lists and numbers
+        """
+        distances = []
+        hashes = []
+        for entry in self._buckets.raw():
+            if entry is None or entry.is_tombstone:
+                continue
+            hashes.append(entry.hash)
+            distance = self._probes(entry.key, entry.hash) - 1
+            while distance >= len(distances):
+                distances.append(0)
+            distances[distance] += 1
+
+        size = len(hashes)
+        snapshot = self.metrics.to_dict()
+        snapshot.update({
+            'size': self._size,
+            'capacity': self._capacity,
+            'load': self._size / self._capacity,
+            'tombstones': self._tombstones,
+            'probe_distances': distances,
+            'collision_rate': 1 - distances[0] / size if size else 0.0,
+            'hash_collision_rate': _hash_collision_rate(hashes),
+        })
+        return snapshot
@@ -0,0 +1,104 @@
+# This file implements the binary snapshot format behind the save() and
+# load() methods of HashMapSC and HashMapOA. A snapshot is MAGIC, a pickled
+# header with the map's capacity, size, hash function and options, and then
+# the entries as pickled chunks of parallel lists of cached hashes, keys and
+# values. Chunks are written and read one at a time, so neither side holds
+# more than CHUNK_SIZE entries beyond the map itself.
+# Snapshots are unpickled, so only load snapshots from trusted sources.
+
+import pickle
+
+MAGIC = b'HMAPSNP1'
+
+# Entries per pickled chunk
+CHUNK_SIZE = 65536
+
+# Keys hashed again on load to check that the cached hashes still hold
+CHECKED_KEYS = 16
+
+
+def snapshot_header(m, kind: str, options: dict) -> dict:
+    """
+    Returns the header save() writes for the given map.
+    Args:
+        m: HashMapSC or HashMapOA
+        kind: Name of the map class the snapshot is for
+        options: Constructor arguments that load() passes on
+    Returns:
+        dict of plain values
+    """
+    return {
+        'kind': kind,
+        'capacity': m.get_capacity(),
+        'size': m.get_size(),
+        'function': getattr(m._hash_function, '__name__', None),
+        'seed': getattr(m._hash_function, 'seed', None),
+        'options': options,
+    }
+
+
+def write_snapshot(path: str, header: dict, entries) -> None:
+    """
+    Writes a snapshot of the given (hash, key, value) entries to path.
+    Args:
+        path: File to write
+        header: Header from snapshot_header()
+        entries: Iterable of header['size'] (hash, key, value) tuples
+    Returns:
+        None
+    """
+    with open(path, 'wb') as file:
+        file.write(MAGIC)
+        pickle.dump(header, file, pickle.HIGHEST_PROTOCOL)
+        hashes, keys, values = [], [], []
+        for hash, key, value in entries:
+            hashes.append(hash)
+            keys.append(key)
+            values.append(value)
+            if len(hashes) == CHUNK_SIZE:
+                pickle.dump((hashes, keys, values), file, pickle.HIGHEST_PROTOCOL)
+                hashes, keys, values = [], [], []
+        if hashes:
+            pickle.dump((hashes, keys, values), file, pickle.HIGHEST_PROTOCOL)
+
+
+def read_header(file, kind: str) -> dict:
+    """
+    Reads the header of a snapshot from the given binary file, and raises
+    ValueError if the file is not a snapshot of the given kind of map.
+    """
+    if file.read(len(MAGIC)) != MAGIC:
+        raise ValueError(file.name + ' is not a HashMap snapshot')
+    header = pickle.load(file)
+    if header['kind'] != kind:
+        raise ValueError(file.name + ' is a snapshot of a ' + header['kind'])
+    return header
+
+
+def read_chunks(file, header: dict, m):
+    """
+    Yields the (hashes, keys, values) chunks that follow the header.
+    Cached hashes are kept if the snapshot was written with a hash function
+    of the same name and seed as the map's, and the first CHECKED_KEYS keys
+    still hash to them; otherwise every key is hashed again, which catches
+    functions such as the builtin hash() that differ between processes.
+    Args:
+        file: Binary file positioned after the header
+        header: Header from read_header()
+        m: Map being loaded, whose hash function is used
+    Returns:
+        Generator of (hashes, keys, values) list triples
+    """
+    function = m._hash_function
+    remaining = header['size']
+    rehash = None
+    while remaining > 0:
+        hashes, keys, values = pickle.load(file)
+        remaining -= len(keys)
+        if rehash is None:
+            rehash = (header['function'] != getattr(function, '__name__', None) or
+                      header['seed'] != getattr(function, 'seed', None) or
+                      any(function(key) != hash for hash, key in zip(hashes[:CHECKED_KEYS], keys)))
+        if rehash:
+            hashes = m._hash_keys(keys)
+        yield hashes, keys, values
@@ -0,0 +1,105 @@
+# This file implements the iterators and the keys(), values() and items()
+# views behind HashMapSC and HashMapOA. Each iterator keeps its own cursor,
+# a generator over the map's live entries, so any number of them can run at
+# once, nested or interleaved, and none of them copies the entries. Maps
+# count every change that adds, removes or moves entries, and an iterator
+# raises RuntimeError once the count differs from the one it started with.
+# Replacing the value of an existing key is not such a change. Creating an
+# iterator finishes any resize in progress, which writes to the map, so
+# while other threads use the map it needs the same locking as put().
+
+from operator import attrgetter
+
+# Functions that pick what an iterator returns from each entry
+KEY = attrgetter('key')
+VALUE = attrgetter('value')
+ITEM = attrgetter('key', 'value')
+
+
+class MapIterator:
+    """
+    Iterator over the live entries of a HashMapSC or HashMapOA
+    """
+
+    __slots__ = ('_map', '_entries', '_mod_count', '_pick')
+
+    def __init__(self, m, pick: callable = None) -> None:
+        """
+        Initialize new iterator over the given map, returning pick(entry)
+        for each entry, or the entry itself if pick is None. Any resize in
+        progress is finished first, so that every entry is in one table.
+        This changes the map, so callers that share the map between
+        threads must hold their lock while creating the iterator.
+        """
+        m._finish_migration()
+        self._map = m
+        self._entries = m._live_entries()
+        self._mod_count = m._mod_count
+        self._pick = pick
+
+    def __iter__(self) -> "MapIterator":
+        """Return the iterator."""
+        return self
+
+    def __next__(self):
+        """Obtain the next entry and advance the iterator."""
+        if self._map._mod_count != self._mod_count:
+            raise RuntimeError('HashMap changed during iteration')
+        entry = next(self._entries)
+        if self._pick is None:
+            return entry
+        return self._pick(entry)
+
+
+class MapView:
+    """
+    Live view of a map that makes a new iterator each time it is iterated
+    """
+
+    __slots__ = ('_map',)
+
+    # What iterating the view returns from each entry
+    _pick = None
+
+    def __init__(self, m) -> None:
+        """Initialize new view of the given map."""
+        self._map = m
+
+    def __len__(self) -> int:
+        """Return the number of entries in the map."""
+        return self._map.get_size()
+
+    def __iter__(self) -> MapIterator:
+        """Return a new iterator over the map."""
+        return MapIterator(self._map, type(self)._pick)
+
+
+class KeysView(MapView):
+    """
+    View of the keys of a map
+    """
+
+    __slots__ = ()
+    _pick = KEY
+
+    def __contains__(self, key) -> bool:
+        """Return True if the key is in the map."""
+        return self._map.contains_key(key)
+
+
+class ValuesView(MapView):
+    """
+    View of the values of a map
+    """
+
+    __slots__ = ()
+    _pick = VALUE
+
+
+class ItemsView(MapView):
+    """
+    View of the (key, value) pairs of a map
+    """
+
+    __slots__ = ()
+    _pick = ITEM